@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark do codec JSON - Claude-20x
+Compara a stdlib (como era usada antes do json_codec) com o backend ativo
+em cada caminho quente do Central Logger e do Service Discovery.
+
+Uso:
+    python bench_json_codec.py [iterações]
+"""
+
+import json
+import sys
+import timeit
+from datetime import datetime, timezone
+
+import json_codec
+
+
+def _sample_storage_dict() -> dict:
+    """Entrada típica no formato de sanitize_for_storage()"""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "level": "ERROR",
+        "source": "agent_helloworld",
+        "service": "agent_helloworld",
+        "message": "Falha ao processar tarefa 8f2c: timeout após 30s aguardando resposta do agente",
+        "metadata": {
+            "logger": "a2a.server",
+            "module": "task_manager",
+            "function": "on_send_task",
+            "line": 182,
+            "task_id": "8f2c4a0e-2b7d-4c1e-9a55-0d3f7b6e1c21",
+            "attempt": 3,
+            "tags": ["a2a", "timeout", "retry"],
+            "token": "[REDACTED]",
+        },
+        "trace_id": "4bf92f3577b34da6a3ce929d0e0e4736",
+        "session_id": None,
+        "user_id": None,
+    }
+
+
+def _sample_agent_card() -> dict:
+    """Agent card A2A típico retornado em /.well-known/agent.json"""
+    return {
+        "name": "HelloWorld Agent",
+        "description": "Agente de exemplo que responde com saudações",
+        "url": "http://localhost:9999/",
+        "version": "1.0.0",
+        "capabilities": {"streaming": True, "pushNotifications": False},
+        "defaultInputModes": ["text"],
+        "defaultOutputModes": ["text"],
+        "skills": [
+            {"id": f"skill_{i}", "name": f"Skill {i}", "description": "Responde saudações",
+             "tags": ["hello", "world"], "examples": ["hi", "hello world"]}
+            for i in range(5)
+        ],
+    }
+
+
+def _bench(func, iterations: int) -> float:
+    """Tempo médio por chamada em microssegundos (melhor de 5)"""
+    return min(timeit.repeat(func, number=iterations, repeat=5)) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    entry = _sample_storage_dict()
+    line_str = json.dumps(entry, ensure_ascii=False)
+    line_bytes = line_str.encode('utf-8')
+    card_str = json.dumps(_sample_agent_card())
+
+    # (caminho, baseline stdlib, backend ativo)
+    paths = [
+        ("logger: tail parse (_parse_line)",
+         lambda: json.loads(line_str),
+         lambda: json_codec.loads(line_str)),
+        ("logger: batch write (SegmentWriter)",
+         lambda: json.dumps(entry, ensure_ascii=False),
+         lambda: json_codec.dumps(entry)),
+        ("logger: websocket broadcast",
+         lambda: json.dumps(entry),
+         lambda: json_codec.dumps(entry)),
+        ("logger: query read (_read_log_file)",
+         lambda: json.loads(line_bytes),
+         lambda: json_codec.loads(line_bytes)),
+        ("discovery: agent card probe",
+         lambda: json.loads(card_str),
+         lambda: json_codec.loads(card_str)),
+    ]
+
+    print(f"Backend ativo: {json_codec.BACKEND} ({iterations} iterações)")
+    print(f"{'caminho':<40} {'stdlib µs':>10} {json_codec.BACKEND + ' µs':>10} {'ganho':>7}")
+    print("-" * 70)
+    for name, baseline, accelerated in paths:
+        base_us = _bench(baseline, iterations)
+        fast_us = _bench(accelerated, iterations)
+        print(f"{name:<40} {base_us:>10.2f} {fast_us:>10.2f} {base_us / fast_us:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,7 @@ class ServiceDiscoveryConfig:
     cache_ttl: int = field(default_factory=lambda: int(os.getenv('DISCOVERY_CACHE_TTL', '30')))
     scan_ranges: List[tuple] = field(default_factory=list)
     max_concurrent: int = field(default_factory=lambda: int(os.getenv('MAX_CONCURRENT_CONNECTIONS', '20')))
+    trace_spans: bool = field(default_factory=lambda: os.getenv('DISCOVERY_TRACE_SPANS', 'false').lower() == 'true')
     
     def __post_init__(self):
         """Parse scan ranges from environment"""
@@ -60,7 +61,36 @@ class LoggerConfig:
     max_file_size: str = field(default_factory=lambda: os.getenv('LOGGER_MAX_FILE_SIZE', '100MB'))
     retention_days: int = field(default_factory=lambda: int(os.getenv('LOGGER_RETENTION_DAYS', '30')))
     alert_level: str = field(default_factory=lambda: os.getenv('LOGGER_ALERT_LEVEL', 'ERROR'))
+    alert_window: float = field(default_factory=lambda: float(os.getenv('LOGGER_ALERT_WINDOW', '60')))
+    alert_rate_limit: float = field(default_factory=lambda: float(os.getenv('LOGGER_ALERT_RATE_LIMIT', '60')))
+    alert_rules: str = field(default_factory=lambda: os.getenv('LOGGER_ALERT_RULES', ''))
     log_level: str = field(default_factory=lambda: os.getenv('LOG_LEVEL', 'INFO'))
+    batch_size: int = field(default_factory=lambda: int(os.getenv('LOGGER_BATCH_SIZE', '100')))
+    flush_interval: float = field(default_factory=lambda: float(os.getenv('LOGGER_FLUSH_INTERVAL', '10')))
+    write_retries: int = field(default_factory=lambda: int(os.getenv('LOGGER_WRITE_RETRIES', '5')))
+    fsync_policy: str = field(default_factory=lambda: os.getenv('LOGGER_FSYNC_POLICY', 'none'))
+    fsync_interval: float = field(default_factory=lambda: float(os.getenv('LOGGER_FSYNC_INTERVAL', '1')))
+    writer_processes: int = field(default_factory=lambda: int(os.getenv('LOGGER_WRITER_PROCESSES', '0')))
+    shard_key: str = field(default_factory=lambda: os.getenv('LOGGER_SHARD_KEY', 'source'))
+    query_cache_mb: int = field(default_factory=lambda: int(os.getenv('LOGGER_QUERY_CACHE_MB', '64')))
+    segment_max_age: float = field(default_factory=lambda: float(os.getenv('LOGGER_SEGMENT_MAX_AGE', '0')))
+    compression_codec: str = field(default_factory=lambda: os.getenv('LOGGER_COMPRESSION_CODEC', 'gzip'))
+    compression_level: int = field(default_factory=lambda: int(os.getenv('LOGGER_COMPRESSION_LEVEL', '6')))
+    compression_workers: int = field(default_factory=lambda: int(os.getenv('LOGGER_COMPRESSION_WORKERS', '2')))
+    queue_maxsize: int = field(default_factory=lambda: int(os.getenv('LOGGER_QUEUE_MAXSIZE', '50000')))
+    overload_policy: str = field(default_factory=lambda: os.getenv('LOGGER_OVERLOAD_POLICY', 'spill'))
+    block_timeout: float = field(default_factory=lambda: float(os.getenv('LOGGER_BLOCK_TIMEOUT', '0.5')))
+    sample_rate: float = field(default_factory=lambda: float(os.getenv('LOGGER_SAMPLE_RATE', '0.1')))
+    spill_max_mb: int = field(default_factory=lambda: int(os.getenv('LOGGER_SPILL_MAX_MB', '1024')))
+    max_batch_bytes: int = field(default_factory=lambda: int(os.getenv('LOGGER_MAX_BATCH_BYTES', str(16 * 1024 * 1024))))
+    tail_poll_interval: float = field(default_factory=lambda: float(os.getenv('LOGGER_TAIL_POLL_INTERVAL', '1')))
+    tail_use_inotify: bool = field(default_factory=lambda: os.getenv('LOGGER_TAIL_INOTIFY', 'true').lower() == 'true')
+    level_patterns: str = field(default_factory=lambda: os.getenv('LOGGER_LEVEL_PATTERNS', ''))
+    redact_keys: str = field(default_factory=lambda: os.getenv('LOGGER_REDACT_KEYS', ''))
+    redact_values: bool = field(default_factory=lambda: os.getenv('LOGGER_REDACT_VALUES', 'true').lower() == 'true')
+    ws_client_queue: int = field(default_factory=lambda: int(os.getenv('LOGGER_WS_CLIENT_QUEUE', '1000')))
+    ws_max_pending: int = field(default_factory=lambda: int(os.getenv('LOGGER_WS_MAX_PENDING', '1000')))
+    trace_spans: bool = field(default_factory=lambda: os.getenv('LOGGER_TRACE_SPANS', 'false').lower() == 'true')
 
 
 @dataclass
@@ -138,6 +168,8 @@ class SecurityConfig:
     enable_auth: bool = field(default_factory=lambda: os.getenv('ENABLE_AUTH', 'false').lower() == 'true')
     jwt_secret: str = field(default_factory=lambda: os.getenv('JWT_SECRET', 'change-this-in-production'))
     api_rate_limit: int = field(default_factory=lambda: int(os.getenv('API_RATE_LIMIT', '100')))
+    # Habilita /admin/* (profiler, spans) via header X-Admin-Token; vazio = desativados
+    admin_token: str = field(default_factory=lambda: os.getenv('ADMIN_TOKEN', ''))
 
 
 @dataclass
@@ -26,7 +26,7 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import threading
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 import psutil
 import requests
@@ -39,6 +39,9 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config import get_config, Config
+import json_codec
+from telemetry import MetricsRegistry, CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE
+from profiler import SamplingProfiler, SpanTracer, ProfilerBusyError, admin_allowed, parse_thread_names
 
 # Configurar logging com base nas configurações
 config = get_config()
@@ -396,6 +399,9 @@ class ServiceDiscovery:
             self.registry: Dict[str, AgentInfo] = {}
             self.discovery_cache: Dict[str, Any] = {}
             self._last_discovery: Optional[float] = None
+
+            # Métricas pré-alocadas (exposição Prometheus em /metrics/prometheus)
+            self._setup_telemetry()
             
             # Thread de discovery automático
             self.running = True
@@ -418,6 +424,56 @@ class ServiceDiscovery:
             logger.error(f"❌ Erro ao inicializar Service Discovery: {e}")
             raise ConfigurationError(f"Falha na inicialização: {e}") from e
     
+    PROBE_OUTCOMES = ("found", "not_found", "port_closed", "invalid", "error")
+    HEALTH_OUTCOMES = ("healthy", "unhealthy", "circuit_open", "error")
+    PROBE_STAGES = ("port_check", "a2a_probe", "web_probe")
+
+    def _setup_telemetry(self) -> None:
+        """
+        Cria histogramas, contadores e gauges do serviço
+
+        Contadores por resultado são objetos fixos (um por label), então o
+        registro no probe é um incremento; gauges leem o registry só no scrape.
+        """
+        registry = self.telemetry = MetricsRegistry(namespace="service_discovery")
+        self.probe_latency = registry.histogram("probe_seconds", "Duração de um probe host:porta")
+        self.health_latency = registry.histogram("health_check_seconds", "Duração de um health check")
+        self.cycle_latency = registry.histogram("discovery_cycle_seconds", "Duração de um ciclo de descoberta")
+        self.probe_counters = {
+            outcome: registry.counter("probes", "Probes por resultado", labels={"outcome": outcome})
+            for outcome in self.PROBE_OUTCOMES
+        }
+        self.health_counters = {
+            outcome: registry.counter("health_checks", "Health checks por resultado", labels={"outcome": outcome})
+            for outcome in self.HEALTH_OUTCOMES
+        }
+        self.cycle_counter = registry.counter("discovery_cycles", "Ciclos de descoberta executados")
+        registry.gauge("registry_agents", "Agentes no registry", fn=lambda: len(self.registry))
+        registry.gauge("agents_by_status", "Agentes no registry por status",
+                       fn=lambda: self._count_agents(lambda a: a.status.value), label="status")
+        registry.gauge("circuit_breakers", "Circuit breakers dos agentes por estado",
+                       fn=lambda: self._count_agents(
+                           lambda a: a.circuit_breaker.state.value if a.circuit_breaker else "none"),
+                       label="state")
+        registry.gauge("last_discovery_timestamp_seconds", "Instante do último ciclo completo",
+                       fn=lambda: self._last_discovery or 0)
+
+        # Diagnóstico em produção: profiler sob demanda e spans por etapa do probe
+        self.profiler = SamplingProfiler()
+        self.tracer = SpanTracer(registry, self.PROBE_STAGES,
+                                 enabled=getattr(self.config.discovery, 'trace_spans', False))
+
+    def _count_agents(self, key: Callable[[Any], str]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for agent in list(self.registry.values()):
+            value = key(agent)
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def get_prometheus_metrics(self) -> str:
+        """Métricas no formato de exposição Prometheus"""
+        return self.telemetry.render()
+
     def _validate_config(self) -> None:
         """
         Valida as configurações do sistema
@@ -516,6 +572,8 @@ class ServiceDiscovery:
             self._last_discovery = time.time()
             
             discovery_time = time.time() - start_time
+            self.cycle_latency.record(discovery_time)
+            self.cycle_counter.inc()
             logger.info(f"✅ Descoberta concluída: {len(unique_agents)} agentes únicos em {discovery_time:.2f}s")
             
             return unique_agents
@@ -778,6 +836,8 @@ class ServiceDiscovery:
         Raises:
             AgentProbeError: Se houver erro crítico no probe
         """
+        started = time.perf_counter()
+        outcome = "not_found"
         try:
             # Validar entradas
             validated_host = InputValidator.validate_host(host)
@@ -785,45 +845,66 @@ class ServiceDiscovery:
             
             logger.debug(f"🔎 Probando agente em {validated_host}:{validated_port}")
             
+            tracer = self.tracer
             # Verificar se porta está aberta primeiro (mais rápido)
-            if not await self._is_port_open_async(validated_host, validated_port):
+            span = tracer.start()
+            port_open = await self._is_port_open_async(validated_host, validated_port)
+            if span:
+                tracer.record("port_check", span)
+            if not port_open:
                 logger.debug(f"❌ Porta {validated_host}:{validated_port} não está aberta")
+                outcome = "port_closed"
                 return None
             
             base_url = f"http://{validated_host}:{validated_port}"
             
             # Tentar endpoints A2A primeiro (agentes especializados)
+            span = tracer.start()
             try:
                 agent_info = await self._probe_a2a_agent(base_url, expected_name, expected_type)
                 if agent_info:
                     logger.debug(f"✅ Agente A2A encontrado: {agent_info.name}")
+                    outcome = "found"
                     return agent_info
             except NetworkTimeoutError:
                 logger.debug(f"⏰ Timeout no probe A2A para {base_url}")
             except AgentProbeError as e:
                 logger.debug(f"❌ Erro no probe A2A para {base_url}: {e}")
+            finally:
+                if span:
+                    tracer.record("a2a_probe", span)
             
             # Tentar endpoints web como fallback
+            span = tracer.start()
             try:
                 agent_info = await self._probe_web_service(base_url, expected_name, expected_type)
                 if agent_info:
                     logger.debug(f"✅ Serviço web encontrado: {agent_info.name}")
+                    outcome = "found"
                     return agent_info
             except NetworkTimeoutError:
                 logger.debug(f"⏰ Timeout no probe web para {base_url}")
             except AgentProbeError as e:
                 logger.debug(f"❌ Erro no probe web para {base_url}: {e}")
+            finally:
+                if span:
+                    tracer.record("web_probe", span)
             
             logger.debug(f"❌ Nenhum agente encontrado em {validated_host}:{validated_port}")
             return None
             
         except (ValueError, ConfigurationError) as e:
             logger.warning(f"⚠️ Erro de validação ao probar {host}:{port}: {e}")
+            outcome = "invalid"
             return None
         except Exception as e:
             logger.debug(f"❌ Erro inesperado ao probar {host}:{port}: {e}")
+            outcome = "error"
             # Para scan rápido, não propagar erro
             return None
+        finally:
+            self.probe_latency.record(time.perf_counter() - started)
+            self.probe_counters[outcome].inc()
     
     async def _is_port_open_async(self, host: str, port: int, timeout: float = 1.0) -> bool:
         """
@@ -893,7 +974,7 @@ class ServiceDiscovery:
                         async with session.get(endpoint_url) as response:
                             if response.status == 200:
                                 try:
-                                    card_data = await response.json()
+                                    card_data = await response.json(loads=json_codec.loads)
                                     logger.debug(f"✅ Agent card encontrado em {endpoint}")
                                     return self._create_agent_from_card(
                                         validated_url, card_data, expected_name, expected_type
@@ -1314,6 +1395,8 @@ class ServiceDiscovery:
             return False
         
         agent = self.registry[agent_id]
+        started = time.perf_counter()
+        outcome = "error"
         
         try:
             # Usar circuit breaker se disponível
@@ -1323,18 +1406,24 @@ class ServiceDiscovery:
                     return await self._perform_health_check(agent)
                 
                 try:
-                    return await check_health()
+                    healthy = await check_health()
                 except AgentUnreachableError:
                     logger.warning(f"Circuit breaker aberto para {agent_id}")
                     agent.status = AgentStatus.OFFLINE
+                    outcome = "circuit_open"
                     return False
             else:
-                return await self._perform_health_check(agent)
+                healthy = await self._perform_health_check(agent)
+            outcome = "healthy" if healthy else "unhealthy"
+            return healthy
                 
         except Exception as e:
             logger.error(f"Erro no health check de {agent_id}: {e}")
             agent.status = AgentStatus.ERROR
             return False
+        finally:
+            self.health_latency.record(time.perf_counter() - started)
+            self.health_counters[outcome].inc()
     
     async def _perform_health_check(self, agent: AgentInfo) -> bool:
         """
@@ -1615,6 +1704,51 @@ def create_discovery_api(discovery_service: ServiceDiscovery) -> FastAPI:
             logger.error(f"Erro ao obter estatísticas: {e}")
             raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
     
+    @app.get("/metrics/prometheus")
+    async def get_prometheus_metrics():
+        """Métricas no formato Prometheus/OpenMetrics"""
+        return Response(content=discovery_service.get_prometheus_metrics(),
+                        media_type=PROMETHEUS_CONTENT_TYPE)
+    
+    def require_admin(request: Request):
+        if not discovery_service.config.security.admin_token:
+            raise HTTPException(status_code=403,
+                                detail="Endpoints de administração desativados: defina ADMIN_TOKEN")
+        if not admin_allowed(discovery_service.config.security.admin_token,
+                             request.headers.get("X-Admin-Token")):
+            raise HTTPException(status_code=403, detail="Token de administração inválido")
+
+    @app.get("/admin/profile")
+    async def profile(request: Request, seconds: float = 5.0, interval_ms: float = 5.0,
+                      threads: Optional[str] = None, include_idle: bool = False):
+        """
+        Profile por amostragem das threads (stacks colapsadas para flamegraph)
+        
+        Ex.: /admin/profile?seconds=10&threads=ServiceDiscoveryWorker
+        """
+        require_admin(request)
+        try:
+            stacks = await asyncio.to_thread(
+                discovery_service.profiler.profile, seconds, interval_ms / 1000.0,
+                parse_thread_names(threads), include_idle
+            )
+        except ProfilerBusyError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return Response(content=stacks, media_type="text/plain; charset=utf-8")
+    
+    @app.get("/admin/tracing")
+    async def get_tracing(request: Request):
+        """Estado e histogramas dos spans do probe"""
+        require_admin(request)
+        return discovery_service.tracer.snapshot()
+    
+    @app.post("/admin/tracing")
+    async def set_tracing(request: Request, enabled: bool):
+        """Liga/desliga os spans de port_check, a2a_probe e web_probe"""
+        require_admin(request)
+        discovery_service.tracer.set_enabled(enabled)
+        return {"enabled": discovery_service.tracer.enabled}
+    
     @app.get("/health")
     async def api_health():
         """Health check da própria API"""
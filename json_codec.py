@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+⚡ Codec JSON - Claude-20x
+Camada de serialização compartilhada pelo Central Logger e pelo Service Discovery.
+Usa orjson quando instalado (`pip install orjson`) e cai para a stdlib caso
+contrário. JSON_BACKEND=json força a stdlib.
+
+Ambos os backends produzem JSON compacto em UTF-8 (sem escapes ASCII) e
+convertem tipos não serializáveis com str(). As diferenças entre eles são
+normalizadas aqui:
+- Enum vira o seu valor; datetime/date/time e dataclasses passam por str()
+  (o orjson os serializaria nativamente em outro formato)
+- NaN e ±Infinity viram null (JSON não tem esses valores)
+- Inteiros fora de 64 bits são escritos exatos (orjson recusa; cai para a stdlib)
+- Bytes com UTF-8 inválido, BOM e os literais NaN/Infinity na leitura
+  levantam JSONDecodeError
+Na leitura, inteiros fora de 64 bits continuam virando float no orjson.
+"""
+
+import json
+import math
+import os
+from enum import Enum
+from typing import Any, Union
+
+JSONDecodeError = json.JSONDecodeError
+
+_requested = os.getenv('JSON_BACKEND', 'auto').lower()
+
+# ---------- stdlib (backend de fallback e caminho lento do orjson) ----------
+
+def _default(obj: Any) -> Any:
+    """Tipos não nativos: Enum pelo valor (como o orjson), o resto por str()"""
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+
+_strict_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default,
+                                   allow_nan=False)
+
+
+def _finite(obj: Any) -> Any:
+    """Cópia com floats não finitos trocados por None (caminho raro)"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _std_dumps(obj: Any) -> str:
+    try:
+        return _strict_encoder.encode(obj)
+    except ValueError:
+        # NaN/Infinity: como o orjson, grava null
+        return _strict_encoder.encode(_finite(obj))
+
+
+def _reject_constant(name: str):
+    raise ValueError(f"{name} não é JSON válido")
+
+
+_std_decoder = json.JSONDecoder(parse_constant=_reject_constant)
+
+
+def _std_loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    if not isinstance(data, str):
+        try:
+            data = bytes(data).decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise JSONDecodeError(f"UTF-8 inválido: {e.reason}", '', e.start) from None
+    try:
+        return _std_decoder.decode(data)
+    except JSONDecodeError:
+        raise
+    except ValueError as e:  # NaN/Infinity
+        raise JSONDecodeError(str(e), data, 0) from None
+
+
+try:
+    if _requested == 'json':
+        raise ImportError("stdlib forçada por JSON_BACKEND")
+    import orjson
+
+    BACKEND = "orjson"
+
+    _orjson_dumps = orjson.dumps
+    _orjson_loads = orjson.loads
+    # datetime e dataclass vão para default=str, como na stdlib
+    _OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Serializa para bytes UTF-8"""
+        try:
+            return _orjson_dumps(obj, default=str, option=_OPTIONS)
+        except TypeError:
+            # Inteiro fora de 64 bits: a stdlib escreve o valor exato
+            return _std_dumps(obj).encode('utf-8')
+
+    def dumps(obj: Any) -> str:
+        """Serializa para str"""
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        """Desserializa str ou bytes (orjson.JSONDecodeError herda de JSONDecodeError)"""
+        return _orjson_loads(data)
+
+except ImportError:
+    BACKEND = "json"
+
+    def dumps(obj: Any) -> str:
+        """Serializa para str"""
+        return _std_dumps(obj)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Serializa para bytes UTF-8"""
+        return _std_dumps(obj).encode('utf-8')
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        """Desserializa str ou bytes"""
+        return _std_loads(data)
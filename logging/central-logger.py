@@ -16,21 +16,22 @@ import json
 import asyncio
 import logging
 import traceback
-import gzip
-import shutil
+import zlib
+import heapq
+import itertools
 import psutil
 import statistics
 from collections import deque, defaultdict
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass, asdict, field
+from typing import Deque, Dict, List, Optional, Any, Tuple, Union
+from dataclasses import dataclass, field
 from enum import Enum
 import aiofiles
 import structlog
 from logging.handlers import RotatingFileHandler
 import uvicorn
-from fastapi import FastAPI, WebSocket, HTTPException, status
+from fastapi import FastAPI, WebSocket, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 import threading
 import queue
@@ -39,25 +40,26 @@ import time
 # Importar configurações usando sys.path
 sys.path.append('..')
 from config import get_config
+import json_codec
+from telemetry import MetricsRegistry, CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE
+from profiler import SamplingProfiler, SpanTracer, ProfilerBusyError, admin_allowed, parse_thread_names
 
-
-class LogLevel(Enum):
-    """Níveis de log padronizados"""
-    DEBUG = "DEBUG"
-    INFO = "INFO"
-    WARNING = "WARNING"
-    ERROR = "ERROR"
-    CRITICAL = "CRITICAL"
-
-
-class LogSource(Enum):
-    """Fontes de log identificadas na auditoria"""
-    UI = "ui"
-    AGENT_HELLOWORLD = "agent_helloworld"
-    MCP_SERVER = "mcp_server"
-    CLAUDE_FLOW = "claude_flow"
-    A2A_INSPECTOR = "a2a_inspector"
-    GENERAL = "general"
+# Schema compartilhado com o cliente (log_shipper)
+from log_schema import LogLevel, LogSource, LogEntry, SubscriptionFilter
+from log_tailer import LogTailer
+from log_parsers import LevelDetector, ParserRegistry, ParsedLine, BRACKETED
+from log_redaction import Redactor, DEFAULT_REDACTOR
+from log_broadcaster import LogBroadcaster
+from log_alerts import AlertEngine
+from log_rules import RuleEngine
+from log_windows import SlidingWindowCounter
+from log_segments import (FsyncPolicy, SegmentWriter, list_segments, parse_size, plain_path,
+                          segment_date, segment_seq, segment_shard, ARCHIVE_SUFFIXES)
+from log_compression import CompressionPool, CODECS, codec_available
+from log_shards import ShardedWriter, SHARD_KEYS
+from log_reader import SegmentScanner
+from log_query_cache import QueryCache
+from log_rollups import RollupStore
 
 
 class CircuitBreakerState(Enum):
@@ -111,23 +113,209 @@ class CircuitBreaker:
             self.state = CircuitBreakerState.OPEN
 
 
+class ThroughputMeter:
+    """Throughput de um estágio do pipeline: total e taxa na última janela"""
+
+    def __init__(self, window_seconds: float = 60):
+        self.total = 0
+        self.window = SlidingWindowCounter(window_seconds)
+        self._lock = threading.Lock()
+
+    def add(self, n: int = 1):
+        with self._lock:
+            self.total += n
+            self.window.add(n)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"total": self.total, "per_second": round(self.window.rate(), 2)}
+
+
+class HandoffBuffer:
+    """
+    Buffer de handoff entre LogProcessor (produtor) e BatchWriter (consumidor)
+
+    Sem locks: append e popleft de deque são atômicos no CPython. O consumidor
+    drena somente as entradas presentes no momento do swap, então entradas
+    adicionadas durante uma escrita ficam para o próximo batch em vez de
+    serem descartadas por um clear().
+    """
+
+    def __init__(self):
+        self._items = deque()
+        # (quantidade, entrada na queue, entrada no buffer) de cada lote, na ordem dos itens
+        self._marks = deque()
+
+    def append(self, item):
+        self._items.append(item)
+
+    def extend(self, items, enqueued_at: Optional[float] = None,
+               buffered_at: Optional[float] = None):
+        # A marca entra antes dos itens: take_marks nunca a consome sem eles
+        if enqueued_at is not None:
+            if buffered_at is None:
+                buffered_at = time.monotonic()
+            self._marks.append((len(items), enqueued_at, buffered_at))
+        self._items.extend(items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def swap(self, max_items: Optional[int] = None) -> List[Any]:
+        """Retira atomicamente (por item) as entradas pendentes"""
+        items = self._items
+        count = len(items) if max_items is None else min(len(items), max_items)
+        popleft = items.popleft
+        return [popleft() for _ in range(count)]
+
+    def oldest_mark(self) -> Optional[float]:
+        """Entrada na queue do lote mais antigo ainda no buffer"""
+        try:
+            return self._marks[0][1]
+        except IndexError:
+            return None
+
+    def take_marks(self, count: int) -> List[Tuple[int, float, float]]:
+        """Retira as marcas cobertas pelos `count` itens retirados no último swap"""
+        marks = self._marks
+        taken = []
+        while count > 0 and marks:
+            size, enqueued_at, buffered_at = marks[0]
+            if size > count:
+                marks[0] = (size - count, enqueued_at, buffered_at)
+                taken.append((count, enqueued_at, buffered_at))
+                break
+            marks.popleft()
+            taken.append((size, enqueued_at, buffered_at))
+            count -= size
+        return taken
+
+
+def _oldest_stamp(*stamps: Optional[float]) -> Optional[float]:
+    present = [stamp for stamp in stamps if stamp is not None]
+    return min(present) if present else None
+
+
+class WriteRetry:
+    """
+    Entradas cujo write falhou, devolvidas direto ao BatchWriter
+
+    Não voltam para a ingestão: já foram transmitidas e avaliadas pelos
+    alertas, e não ficam sujeitas à política de sobrecarga. Cada lote tem
+    um número limitado de tentativas com backoff exponencial; o que esgota
+    as tentativas é descartado e contado.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # (entradas, tentativas já feitas, instante da próxima, entrada na queue mais antiga)
+        self._batches: Deque[Tuple[List[LogEntry], int, float, Optional[float]]] = deque()
+        self.entries = 0
+        self.counters = {"retried": 0, "dropped": 0}
+
+    def __bool__(self) -> bool:
+        return bool(self._batches)
+
+    def schedule(self, entries: List[LogEntry], attempts: int, since: Optional[float] = None,
+                 now: Optional[float] = None) -> bool:
+        """Agenda nova tentativa; False (e descarta) se as tentativas acabaram"""
+        if attempts >= self.max_attempts:
+            self.counters["dropped"] += len(entries)
+            return False
+        now = time.monotonic() if now is None else now
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        self._batches.append((entries, attempts, now + delay, since))
+        self.entries += len(entries)
+        return True
+
+    def take_ready(self, now: Optional[float] = None) -> List[Tuple[List[LogEntry], int, Optional[float]]]:
+        """Retira os lotes cujo backoff venceu (na ordem em que falharam)"""
+        now = time.monotonic() if now is None else now
+        ready = []
+        for _ in range(len(self._batches)):
+            batch = self._batches.popleft()
+            entries, attempts, ready_at, since = batch
+            if ready_at <= now:
+                ready.append((entries, attempts, since))
+                self.entries -= len(entries)
+                self.counters["retried"] += len(entries)
+            else:
+                self._batches.append(batch)
+        return ready
+
+    def oldest(self) -> Optional[float]:
+        """Entrada na queue mais antiga entre os lotes aguardando (lido de outras threads)"""
+        stamps = [since for _, _, _, since in tuple(self._batches) if since is not None]
+        return min(stamps) if stamps else None
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "pending": self.entries}
+
+
+def _default_telemetry() -> MetricsRegistry:
+    """Histogramas do pipeline, pré-alocados (registro O(1) nos caminhos quentes)"""
+    registry = MetricsRegistry(namespace="central_logger")
+    # Latência ponta a ponta por estágio (ponderada pelo tamanho de cada lote)
+    registry.histogram("queue_wait_seconds", "Espera na log_queue até o LogProcessor")
+    registry.histogram("buffer_wait_seconds", "Espera no batch_buffer até o BatchWriter drenar")
+    registry.histogram("ingest_to_disk_seconds", "Da entrada na queue até o write do batch")
+    registry.histogram("ingest_to_durable_seconds", "Da entrada na queue até o dado durável (fsync)")
+    registry.histogram("ingest_to_broadcast_seconds", "Da entrada na queue até as filas WebSocket")
+    registry.histogram("parse_seconds", "Parse de uma linha coletada")
+    registry.histogram("batch_size", "Entradas por batch escrito", scale=1)
+    registry.histogram("batch_write_seconds", "Duração do write_batch")
+    registry.histogram("query_seconds", "Duração de uma consulta em /logs")
+    registry.histogram("aggregate_seconds", "Duração de uma consulta em /logs/aggregate")
+    registry.histogram("websocket_send_seconds", "Envio de uma mensagem a um cliente WebSocket")
+    registry.histogram("queue_size", "Profundidade da queue amostrada pelo MetricsCollector", scale=1)
+    return registry
+
+
 @dataclass
 class PerformanceMetrics:
     """Métricas de performance do sistema"""
-    log_write_times: deque = field(default_factory=lambda: deque(maxlen=1000))
-    queue_sizes: deque = field(default_factory=lambda: deque(maxlen=1000))
     error_counts: defaultdict = field(default_factory=lambda: defaultdict(int))
     disk_usage: deque = field(default_factory=lambda: deque(maxlen=100))
     memory_usage: deque = field(default_factory=lambda: deque(maxlen=100))
-    
+    stages: Dict[str, ThroughputMeter] = field(default_factory=lambda: {
+        "ingested": ThroughputMeter(),
+        "processed": ThroughputMeter(),
+        "written": ThroughputMeter(),
+    })
+    telemetry: MetricsRegistry = field(default_factory=_default_telemetry)
+    current_queue_size: int = 0
+    # Linhas vistas, decodificadas e retornadas pelas consultas (eficácia dos pré-filtros)
+    query_scan: Dict[str, int] = field(default_factory=lambda: {
+        "bytes": 0, "candidates": 0, "decoded": 0, "matched": 0, "matched_bytes": 0,
+        "blocks_read": 0, "blocks_skipped": 0
+    })
+
+    def record_stage(self, stage: str, count: int = 1):
+        """Registra entradas que passaram por um estágio do pipeline"""
+        self.stages[stage].add(count)
+
+    def histogram(self, name: str):
+        return self.telemetry.histograms[name]
+
     def add_write_time(self, duration: float):
         """Adiciona tempo de escrita"""
-        self.log_write_times.append(duration)
+        self.telemetry.histograms["batch_write_seconds"].record(duration)
     
     def add_queue_size(self, size: int):
         """Adiciona tamanho da queue"""
-        self.queue_sizes.append(size)
+        self.current_queue_size = size
+        self.telemetry.histograms["queue_size"].record(size)
     
+    def record_query_scan(self, stats: Dict[str, int]):
+        """Soma as contagens de um SegmentScanner"""
+        for key, value in stats.items():
+            self.query_scan[key] += value
+
     def increment_error(self, error_type: str):
         """Incrementa contador de erro"""
         self.error_counts[error_type] += 1
@@ -143,19 +331,19 @@ class PerformanceMetrics:
             pass  # Ignore errors in metrics collection
     
     def get_stats(self) -> Dict[str, Any]:
-        """Retorna estatísticas consolidadas"""
+        """Retorna estatísticas consolidadas
+
+        Percentis vêm dos histogramas (janela de 60s); avg/max/min de
+        write_times e queue_sizes são mantidos para os consumidores atuais.
+        """
+        latency = self.telemetry.snapshot()
         stats = {
-            "write_times": {
-                "avg": statistics.mean(self.log_write_times) if self.log_write_times else 0,
-                "max": max(self.log_write_times) if self.log_write_times else 0,
-                "min": min(self.log_write_times) if self.log_write_times else 0
-            },
-            "queue_sizes": {
-                "avg": statistics.mean(self.queue_sizes) if self.queue_sizes else 0,
-                "max": max(self.queue_sizes) if self.queue_sizes else 0,
-                "current": self.queue_sizes[-1] if self.queue_sizes else 0
-            },
+            "write_times": latency["batch_write_seconds"],
+            "queue_sizes": {**latency["queue_size"], "current": self.current_queue_size},
+            "latency": latency,
             "errors": dict(self.error_counts),
+            "query_scan": dict(self.query_scan),
+            "throughput": {stage: meter.snapshot() for stage, meter in self.stages.items()},
             "system": {
                 "disk_usage_avg": statistics.mean(self.disk_usage) if self.disk_usage else 0,
                 "memory_usage_avg": statistics.mean(self.memory_usage) if self.memory_usage else 0
@@ -164,66 +352,243 @@ class PerformanceMetrics:
         return stats
 
 
-@dataclass
-class LogEntry:
-    """Estrutura padronizada de log com validação"""
-    timestamp: str
-    level: LogLevel
-    source: LogSource
-    service: str
-    message: str
-    metadata: Dict[str, Any]
-    trace_id: Optional[str] = None
-    session_id: Optional[str] = None
-    user_id: Optional[str] = None
-    
-    def __post_init__(self):
-        """Validação após inicialização"""
-        self._validate()
-    
-    def _validate(self):
-        """Valida campos obrigatórios e tipos"""
-        if not isinstance(self.message, str):
-            raise ValueError("Message deve ser string")
-        
-        if len(self.message.strip()) == 0:
-            raise ValueError("Message não pode estar vazia")
-        
-        if not isinstance(self.service, str) or len(self.service.strip()) == 0:
-            raise ValueError("Service deve ser string não vazia")
-        
-        if not isinstance(self.metadata, dict):
-            raise ValueError("Metadata deve ser dict")
-        
-        # Validar timestamp
+class OverloadPolicy(Enum):
+    """Políticas de ingestão quando a queue principal está sob pressão"""
+    BLOCK = "block"                  # Bloqueia o produtor até block_timeout
+    DROP_BY_LEVEL = "drop_by_level"  # Descarta DEBUG, depois INFO, depois WARNING
+    SAMPLE = "sample"                # Mantém 1 a cada N entradas abaixo de ERROR
+    SPILL = "spill"                  # Grava overflow em disco e reaplica depois
+
+
+class OverflowSpill:
+    """
+    💾 Segmentos de overflow em disco
+
+    Recebe entradas que não couberam na queue e as devolve, segmento a
+    segmento, quando o replay consegue reaplicá-las.
+    """
+
+    def __init__(self, spill_dir: Path, max_bytes: int,
+                 segment_bytes: int = 16 * 1024 * 1024,
+                 redactor: Optional[Redactor] = None):
+        self.spill_dir = spill_dir
+        self.redactor = redactor or DEFAULT_REDACTOR
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._current: Optional[Path] = None
+        self._handle = None
+        self._current_bytes = 0
+        self.pending_bytes = sum(f.stat().st_size for f in self.spill_dir.glob("overflow-*.jsonl"))
+
+    def write(self, entries: List[LogEntry]) -> bool:
+        """Grava entradas no segmento corrente; False se o limite foi atingido"""
+        data = ''.join(
+            json_codec.dumps(entry.sanitize_for_storage(self.redactor)) + '\n'
+            for entry in entries
+        ).encode('utf-8')
+
+        with self._lock:
+            if self.pending_bytes + len(data) > self.max_bytes:
+                return False
+            if self._handle is None or self._current_bytes >= self.segment_bytes:
+                self._seal_locked()
+                self._current = self.spill_dir / f"overflow-{time.time_ns()}.jsonl"
+                self._handle = open(self._current, 'ab', buffering=0)
+                self._current_bytes = 0
+            SegmentWriter._write_all(self._handle, data)
+            self._current_bytes += len(data)
+            self.pending_bytes += len(data)
+        return True
+
+    def _seal_locked(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            self._current = None
+
+    def pop_segment(self) -> List[LogEntry]:
+        """Retira o segmento mais antigo (selando o corrente se necessário)"""
+        with self._lock:
+            segments = sorted(self.spill_dir.glob("overflow-*.jsonl"))
+            if not segments:
+                return []
+            oldest = segments[0]
+            if oldest == self._current:
+                self._seal_locked()
+            size = oldest.stat().st_size
+            with open(oldest, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            oldest.unlink()
+            self.pending_bytes = max(0, self.pending_bytes - size)
+
+        entries = []
+        for line in lines:
+            try:
+                entries.append(LogEntry.from_dict(json_codec.loads(line), trusted=True))
+            except (json.JSONDecodeError, KeyError, ValueError):
+                continue
+        return entries
+
+
+class EntryQueue(queue.Queue):
+    """
+    Queue de lotes limitada pelo número de entradas
+
+    Cada item é uma lista de LogEntry; maxsize e qsize() contam entradas,
+    não lotes. Um put pode exceder maxsize em no máximo um lote.
+    """
+
+    def _init(self, maxsize: int):
+        super()._init(maxsize)
+        self._entries = 0
+        self._stamps = deque()
+        # Instante em que o último lote retirado foi enfileirado (consumidor único)
+        self.last_enqueued_at: Optional[float] = None
+        # Lote retirado que o consumidor ainda não passou adiante (None depois do handoff)
+        self.in_hand_since: Optional[float] = None
+
+    def _qsize(self) -> int:
+        return self._entries
+
+    def _put(self, item: List[LogEntry]):
+        self.queue.append(item)
+        self._stamps.append(time.monotonic())
+        self._entries += len(item)
+
+    def _get(self) -> List[LogEntry]:
+        item = self.queue.popleft()
+        # in_hand_since antes de tirar de _stamps: o lote nunca fica invisível
+        self.in_hand_since = self._stamps[0]
+        self.last_enqueued_at = self._stamps.popleft()
+        self._entries -= len(item)
+        return item
+
+    def oldest_stamp(self) -> Optional[float]:
         try:
-            datetime.fromisoformat(self.timestamp.replace('Z', '+00:00'))
-        except ValueError:
-            raise ValueError("Timestamp deve estar em formato ISO")
-    
-    def to_dict(self) -> Dict[str, Any]:
+            return self._stamps[0]
+        except IndexError:
+            return None
+
+
+class IngestionGate:
+    """
+    🚦 Porta de entrada da queue principal com política de sobrecarga explícita
+
+    Toda entrada aceita, descartada, amostrada ou desviada para disco é
+    contabilizada, em vez de ser perdida silenciosamente.
+    """
+
+    # Ocupação da queue a partir da qual cada nível é descartado (DROP_BY_LEVEL)
+    DROP_THRESHOLDS = {
+        LogLevel.DEBUG: 0.70,
+        LogLevel.INFO: 0.85,
+        LogLevel.WARNING: 0.95,
+    }
+    # Ocupação a partir da qual a amostragem entra em ação (SAMPLE)
+    SAMPLE_THRESHOLD = 0.80
+    PROTECTED_LEVELS = (LogLevel.ERROR, LogLevel.CRITICAL)
+
+    def __init__(self, log_queue: queue.Queue, policy: OverloadPolicy,
+                 block_timeout: float = 0.5, sample_rate: float = 0.1,
+                 spill: Optional[OverflowSpill] = None):
+        self.log_queue = log_queue
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self.spill = spill
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._sample_seq = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def _fill_ratio(self) -> float:
+        maxsize = self.log_queue.maxsize
+        return self.log_queue.qsize() / maxsize if maxsize > 0 else 0.0
+
+    def offer(self, entry: LogEntry) -> bool:
+        """Tenta enfileirar a entrada aplicando a política; True se aceita"""
+        return self.offer_batch([entry]) == 1
+
+    def offer_batch(self, entries: List[LogEntry]) -> int:
+        """Enfileira um lote com uma única operação na queue; retorna aceitas"""
+        if not entries:
+            return 0
+
+        policy = self.policy
+        blocking = policy == OverloadPolicy.BLOCK
+        counts: Dict[str, int] = defaultdict(int)
+        kept = entries
+
+        if policy == OverloadPolicy.DROP_BY_LEVEL:
+            fill = self._fill_ratio()
+            kept = []
+            for entry in entries:
+                threshold = self.DROP_THRESHOLDS.get(entry.level)
+                if threshold is None:
+                    blocking = True  # ERROR/CRITICAL esperam por espaço
+                    kept.append(entry)
+                elif fill >= threshold:
+                    counts[f"dropped_{entry.level.value.lower()}"] += 1
+                else:
+                    kept.append(entry)
+
+        elif policy == OverloadPolicy.SAMPLE and self._fill_ratio() >= self.SAMPLE_THRESHOLD:
+            kept = []
+            with self._lock:
+                for entry in entries:
+                    if entry.level in self.PROTECTED_LEVELS:
+                        kept.append(entry)
+                        continue
+                    self._sample_seq += 1
+                    if self.sample_every and self._sample_seq % self.sample_every == 0:
+                        kept.append(entry)
+                        counts["sampled_in"] += 1
+                    else:
+                        counts["sampled_out"] += 1
+
+        accepted = 0
+        if kept:
+            try:
+                if blocking:
+                    self.log_queue.put(kept, timeout=self.block_timeout)
+                else:
+                    self.log_queue.put_nowait(kept)
+                counts["accepted"] += len(kept)
+                accepted = len(kept)
+            except queue.Full:
+                spilled = False
+                if policy == OverloadPolicy.SPILL and self.spill is not None:
+                    try:
+                        spilled = self.spill.write(kept)
+                    except OSError:
+                        counts["spill_errors"] += 1
+                if spilled:
+                    counts["spilled"] += len(kept)
+                    accepted = len(kept)
+                else:
+                    counts["blocked_timeout" if blocking else "dropped_queue_full"] += len(kept)
+
+        with self._lock:
+            for name, n in counts.items():
+                self.counters[name] += n
+        return accepted
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores da política para /metrics"""
+        with self._lock:
+            counters = dict(self.counters)
         return {
-            **asdict(self),
-            'level': self.level.value,
-            'source': self.source.value
+            "policy": self.policy.value,
+            "queue_size": self.log_queue.qsize(),
+            "queue_maxsize": self.log_queue.maxsize,
+            "spill_pending_bytes": self.spill.pending_bytes if self.spill else 0,
+            "counters": counters
         }
-    
-    def sanitize_for_storage(self) -> Dict[str, Any]:
-        """Sanitiza dados para armazenamento seguro"""
-        sanitized = self.to_dict().copy()
-        
-        # Limitar tamanho da mensagem
-        if len(sanitized['message']) > 10000:
-            sanitized['message'] = sanitized['message'][:10000] + "... [TRUNCATED]"
-        
-        # Remover dados sensíveis do metadata
-        sensitive_keys = ['password', 'token', 'key', 'secret', 'auth']
-        if isinstance(sanitized['metadata'], dict):
-            for key in list(sanitized['metadata'].keys()):
-                if any(sensitive in key.lower() for sensitive in sensitive_keys):
-                    sanitized['metadata'][key] = "[REDACTED]"
-        
-        return sanitized
 
 
 class CentralLogger:
@@ -264,11 +629,99 @@ class CentralLogger:
         # Inicializar componentes
         self.circuit_breaker = CircuitBreaker()
         self.metrics = PerformanceMetrics()
-        self.log_buffer = deque(maxlen=10000)  # Buffer para situações críticas
-        self.batch_buffer = []
-        self.batch_size = 100
+        # Diagnóstico em produção: profiler sob demanda e spans por estágio
+        self.profiler = SamplingProfiler()
+        self.tracer = SpanTracer(
+            self.metrics.telemetry, ("parse", "validate", "enqueue", "serialize", "write"),
+            enabled=getattr(self.config.logger, 'trace_spans', False)
+        )
+        self.batch_buffer = HandoffBuffer()
+        write_retries = getattr(self.config.logger, 'write_retries', 5)
+        if write_retries < 1:
+            logging.warning("LOGGER_WRITE_RETRIES inválido, usando 5")
+            write_retries = 5
+        self.write_retry = WriteRetry(max_attempts=write_retries)
+        # Entrada na queue mais antiga do que o BatchWriter está escrevendo agora
+        self._writing_since: Optional[float] = None
+        self.batch_size = getattr(self.config.logger, 'batch_size', 100)
+        self.flush_interval = getattr(self.config.logger, 'flush_interval', 10.0)
         self.last_batch_time = time.time()
         self.max_disk_usage = 90  # Porcentagem máxima de uso do disco
+
+        # Writer com handles abertos e group commit
+        try:
+            fsync_policy = FsyncPolicy(getattr(self.config.logger, 'fsync_policy', 'none').lower())
+        except ValueError:
+            logging.warning("LOGGER_FSYNC_POLICY inválida, usando 'none'")
+            fsync_policy = FsyncPolicy.NONE
+        # Redação de segredos (chaves e valores, em todos os níveis) antes do disco
+        self.redactor = Redactor.from_config(
+            getattr(self.config.logger, 'redact_keys', ''),
+            scan_values=getattr(self.config.logger, 'redact_values', True)
+        )
+        # Rotação dentro do dia (LOGGER_MAX_FILE_SIZE, 0 desliga) e por idade
+        try:
+            max_segment_bytes = parse_size(getattr(self.config.logger, 'max_file_size', '100MB'))
+        except ValueError:
+            logging.warning("LOGGER_MAX_FILE_SIZE inválido, usando 100MB")
+            max_segment_bytes = 100 * 1024 * 1024
+        segment_max_age = getattr(self.config.logger, 'segment_max_age', 0.0)
+        # Segmentos selados são comprimidos logo em seguida por um pool pequeno
+        codec = getattr(self.config.logger, 'compression_codec', 'gzip').lower()
+        if codec not in CODECS or not codec_available(codec):
+            logging.warning(f"LOGGER_COMPRESSION_CODEC '{codec}' indisponível, usando gzip")
+            codec = 'gzip'
+        self.compression_pool = CompressionPool(
+            workers=getattr(self.config.logger, 'compression_workers', 2),
+            codec=codec,
+            level=getattr(self.config.logger, 'compression_level', 6),
+            before=lambda log_file: self.segment_writer.close_segment(log_file),
+            after=self._on_segment_compressed,
+            on_error=self._on_compression_error
+        )
+        self.retention_counters = {"removed_segments": 0, "removed_bytes": 0}
+        # Modo multi-processo opcional: writers por shard em processos separados
+        writer_processes = getattr(self.config.logger, 'writer_processes', 0)
+        shard_key = getattr(self.config.logger, 'shard_key', 'source').lower()
+        if shard_key not in SHARD_KEYS:
+            logging.warning("LOGGER_SHARD_KEY inválida, usando 'source'")
+            shard_key = 'source'
+        if writer_processes > 0:
+            self.segment_writer = ShardedWriter(
+                self.logs_dir,
+                processes=writer_processes,
+                shard_key=shard_key,
+                fsync_policy=fsync_policy,
+                fsync_interval=getattr(self.config.logger, 'fsync_interval', 1.0),
+                redact_keys=getattr(self.config.logger, 'redact_keys', ''),
+                redact_values=getattr(self.config.logger, 'redact_values', True),
+                tracer=self.tracer,
+                durable_latency=self.metrics.histogram("ingest_to_durable_seconds"),
+                max_bytes=max_segment_bytes,
+                max_age=segment_max_age,
+                on_seal=self.compression_pool.submit
+            )
+        else:
+            self.segment_writer = SegmentWriter(
+                self.logs_dir,
+                fsync_policy=fsync_policy,
+                fsync_interval=getattr(self.config.logger, 'fsync_interval', 1.0),
+                redactor=self.redactor,
+                tracer=self.tracer,
+                durable_latency=self.metrics.histogram("ingest_to_durable_seconds"),
+                max_bytes=max_segment_bytes,
+                max_age=segment_max_age,
+                on_seal=self.compression_pool.submit
+            )
+        # Cache de consultas por segmento (0 desliga)
+        query_cache_mb = getattr(self.config.logger, 'query_cache_mb', 64)
+        if query_cache_mb < 0:
+            logging.warning("LOGGER_QUERY_CACHE_MB inválido, usando 64")
+            query_cache_mb = 64
+        self.query_cache = QueryCache(max_bytes=query_cache_mb * 1024 * 1024)
+        # Rollups por minuto para agregações (antes do writer começar a escrever)
+        self.rollups = RollupStore(self.logs_dir)
+        self._flush_event = threading.Event()
         
         # Configuração estruturada de logs
         try:
@@ -295,24 +748,179 @@ class CentralLogger:
             self.logger = logging.getLogger(__name__)
         
         # Queue com limite para prevenir memory leak
-        self.log_queue = queue.Queue(maxsize=50000)
-        self.websocket_connections: List[WebSocket] = []
+        self.log_queue = EntryQueue(maxsize=getattr(self.config.logger, 'queue_maxsize', 50000))
+
+        # Política de sobrecarga explícita no lugar do deque de emergência
+        try:
+            overload_policy = OverloadPolicy(getattr(self.config.logger, 'overload_policy', 'spill').lower())
+        except ValueError:
+            logging.warning("LOGGER_OVERLOAD_POLICY inválida, usando 'spill'")
+            overload_policy = OverloadPolicy.SPILL
+        spill = None
+        if overload_policy == OverloadPolicy.SPILL:
+            spill = OverflowSpill(
+                self.logs_dir / "overflow",
+                max_bytes=getattr(self.config.logger, 'spill_max_mb', 1024) * 1024 * 1024,
+                redactor=self.redactor
+            )
+        self.ingestion_gate = IngestionGate(
+            self.log_queue,
+            overload_policy,
+            block_timeout=getattr(self.config.logger, 'block_timeout', 0.5),
+            sample_rate=getattr(self.config.logger, 'sample_rate', 0.1),
+            spill=spill
+        )
+        # Tempo real: fan-out no event loop do servidor com filas por cliente
+        self.broadcaster = LogBroadcaster(
+            max_queue=getattr(self.config.logger, 'ws_client_queue', 1000),
+            max_pending=getattr(self.config.logger, 'ws_max_pending', 1000),
+            redactor=self.redactor,
+            send_latency=self.metrics.histogram("websocket_send_seconds"),
+            delivery_latency=self.metrics.histogram("ingest_to_broadcast_seconds")
+        )
+
+        # Alertas: dedup, janelas e limite de taxa numa thread própria
+        try:
+            alert_level = LogLevel(getattr(self.config.logger, 'alert_level', 'ERROR').upper())
+        except ValueError:
+            logging.warning("LOGGER_ALERT_LEVEL inválido, usando 'ERROR'")
+            alert_level = LogLevel.ERROR
+        self.alert_engine = AlertEngine(
+            self.logs_dir / "alerts.jsonl",
+            min_level=alert_level,
+            window_seconds=getattr(self.config.logger, 'alert_window', 60.0),
+            rate_per_minute=getattr(self.config.logger, 'alert_rate_limit', 60),
+            redactor=self.redactor,
+            on_alerts=self._on_alerts,
+            on_error=lambda e: self.logger.error(f"Erro no motor de alertas: {e}")
+        )
+        # Regras (taxas, padrões, ausência) avaliadas sobre o fluxo, na mesma thread
+        self.rule_engine = RuleEngine()
+        try:
+            self.rule_engine.load_config(getattr(self.config.logger, 'alert_rules', ''))
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            logging.warning(f"LOGGER_ALERT_RULES inválido, regras desativadas: {e}")
+            self.rule_engine = RuleEngine()
+        self.rule_engine.attach(self.alert_engine)
+
+        # Detecção de nível para linhas de texto (padrões extras por fonte)
+        self.level_detector = LevelDetector()
+        try:
+            self.level_detector.load_config(getattr(self.config.logger, 'level_patterns', ''))
+        except (ValueError, AttributeError) as e:
+            logging.warning(f"LOGGER_LEVEL_PATTERNS inválido, usando padrões padrão: {e}")
+        self.parser_registry = ParserRegistry(self.level_detector)
+        # Logs do Claude Flow/MCP (Node) usam timestamp entre colchetes
+        self.parser_registry.register(BRACKETED, source=LogSource.MCP_SERVER)
+        for pattern in self.CLAUDE_FLOW_PARSER_GLOBS:
+            self.parser_registry.register(BRACKETED, glob=pattern)
         
+        # Tailer único para todos os arquivos coletados
+        self.tailer = LogTailer(
+            on_lines=lambda source, path, lines: self._parse_and_queue_lines(lines, source, str(path)),
+            state_file=self.logs_dir / "tail-offsets.json",
+            poll_interval=getattr(self.config.logger, 'tail_poll_interval', 1.0),
+            use_inotify=getattr(self.config.logger, 'tail_use_inotify', True),
+            on_error=self._on_tailer_error,
+            # Offsets só avançam no disco depois que as linhas lidas foram escritas
+            is_durable=self.durable_through
+        )
+
         # Configurar coletores para cada fonte identificada
         try:
             self.setup_log_collectors()
         except Exception as e:
             self.logger.error(f"Erro ao configurar coletores: {e}")
         
+        # Contadores e gauges da exposição Prometheus (lidos só no scrape)
+        self._register_metrics()
+
         # Iniciar threads de processamento
         self._start_background_threads()
         
-        # Agendar compressão de logs antigos
+        # Agendar compressão de segmentos selados e retenção
         self._schedule_log_compression()
     
+    def _register_metrics(self):
+        """Registra as métricas derivadas do estado que o logger já mantém"""
+        registry = self.metrics.telemetry
+        gate = self.ingestion_gate
+
+        def gate_counters() -> Dict[str, int]:
+            with gate._lock:
+                return dict(gate.counters)
+
+        registry.gauge("queue_entries", "Entradas aguardando na log_queue",
+                       fn=self.log_queue.qsize)
+        registry.gauge("queue_capacity_entries", "Capacidade da log_queue",
+                       fn=lambda: self.log_queue.maxsize)
+        registry.gauge("batch_buffer_entries", "Entradas aguardando o BatchWriter",
+                       fn=lambda: len(self.batch_buffer))
+        registry.counter("write_retry_entries", "Entradas reescritas ou descartadas após falha de escrita",
+                         fn=lambda: dict(self.write_retry.counters), label="outcome")
+        registry.gauge("write_retry_pending_entries", "Entradas aguardando nova tentativa de escrita",
+                       fn=lambda: self.write_retry.entries)
+        registry.gauge("spill_pending_bytes", "Bytes no overflow em disco",
+                       fn=lambda: gate.spill.pending_bytes if gate.spill else 0)
+        registry.counter("ingestion_entries", "Entradas por resultado da política de sobrecarga",
+                         fn=gate_counters, label="outcome")
+        registry.counter("pipeline_entries", "Entradas que passaram por cada estágio",
+                         fn=lambda: {stage: meter.total for stage, meter in self.metrics.stages.items()},
+                         label="stage")
+        registry.counter("errors", "Erros por tipo", fn=lambda: dict(self.metrics.error_counts),
+                         label="type")
+        registry.counter("bytes_written", "Bytes escritos nos segmentos",
+                         fn=lambda: self.segment_writer.bytes_written)
+        registry.counter("query_scanned_bytes", "Bytes percorridos pelas consultas",
+                         fn=lambda: self.metrics.query_scan["bytes"])
+        registry.counter("query_lines", "Linhas das consultas por etapa dos pré-filtros",
+                         fn=lambda: {k: self.metrics.query_scan[k] for k in ("candidates", "decoded", "matched")},
+                         label="stage")
+        registry.counter("query_archive_blocks", "Blocos de segmentos comprimidos lidos ou saltados pelo índice",
+                         fn=lambda: {"read": self.metrics.query_scan["blocks_read"],
+                                     "skipped": self.metrics.query_scan["blocks_skipped"]},
+                         label="outcome")
+        registry.counter("segments_sealed", "Segmentos selados pela rotação",
+                         fn=lambda: self.segment_writer.sealed)
+        registry.counter("segments_compressed", "Segmentos comprimidos pelo pool",
+                         fn=lambda: self.compression_pool.counters["compressed"])
+        registry.gauge("compression_pending", "Segmentos selados aguardando compressão",
+                       fn=lambda: self.compression_pool.stats()["pending"])
+        registry.counter("segments_removed", "Segmentos removidos pela retenção",
+                         fn=lambda: self.retention_counters["removed_segments"])
+        registry.counter("query_cache", "Leituras de segmento por resultado do cache de consultas",
+                         fn=lambda: {k: self.query_cache.counters[k] for k in ("hits", "incremental", "misses")},
+                         label="outcome")
+        registry.gauge("query_cache_bytes", "Bytes estimados no cache de consultas",
+                       fn=lambda: self.query_cache.bytes)
+        registry.gauge("websocket_subscribers", "Clientes WebSocket conectados",
+                       fn=lambda: self.broadcaster.subscriber_count)
+        registry.counter("websocket_dropped_messages", "Mensagens descartadas por clientes lentos",
+                         fn=lambda: self.broadcaster.stats()["dropped"])
+        registry.counter("websocket_backlog_dropped_entries",
+                         "Entradas descartadas do backlog com o event loop sem drenar",
+                         fn=lambda: self.broadcaster.backlog_dropped)
+        registry.counter("alerts", "Alertas por resultado",
+                         fn=lambda: {k: self.alert_engine.counters[k] for k in ("emitted", "suppressed", "backlog_dropped")},
+                         label="outcome")
+        registry.gauge("circuit_breaker_state", "1 no estado atual do circuit breaker",
+                       fn=lambda: {state.value: int(self.circuit_breaker.state == state)
+                                   for state in CircuitBreakerState},
+                       label="state")
+
+    def get_prometheus_metrics(self) -> str:
+        """📈 Métricas no formato de exposição Prometheus"""
+        return self.metrics.telemetry.render()
+
     def _start_background_threads(self):
         """Inicia threads de processamento em background"""
         try:
+            # Processos de escrita (modo multi-processo) antes de quem os alimenta
+            if isinstance(self.segment_writer, ShardedWriter):
+                self.segment_writer.start()
+            CompressionPool.cleanup(self.logs_dir)
+            self.compression_pool.start()
+
             # Thread principal de processamento
             self.processing_thread = threading.Thread(
                 target=self._process_logs_worker, 
@@ -336,6 +944,18 @@ class CentralLogger:
                 name="BatchWriter"
             )
             self.batch_thread.start()
+
+            # Thread de alertas (recebe só referências dos lotes)
+            self.alert_engine.start()
+
+            # Thread para replay do overflow em disco
+            if self.ingestion_gate.spill is not None:
+                self.replay_thread = threading.Thread(
+                    target=self._overflow_replay_worker,
+                    daemon=True,
+                    name="OverflowReplayer"
+                )
+                self.replay_thread.start()
             
         except Exception as e:
             self.logger.error(f"Erro ao iniciar threads: {e}")
@@ -373,151 +993,137 @@ class CentralLogger:
                     self._setup_file_watcher(full_path, source)
                 except Exception as e:
                     self.logger.error(f"Erro ao configurar watcher para {full_path}: {e}")
+
+        self.tailer.start()
     
     def _setup_file_watcher(self, file_path: Path, source: LogSource):
-        """👁️ Configura watcher para arquivo de log específico com circuit breaker"""
-        
-        def watch_file():
-            file_watcher_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
-            
-            while True:
-                try:
-                    def read_file():
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            # Ir para o final do arquivo
-                            f.seek(0, 2)
-                            
-                            while True:
-                                line = f.readline()
-                                if line:
-                                    self._parse_and_queue_log(line.strip(), source, str(file_path))
-                                else:
-                                    time.sleep(0.1)
-                                    # Verificar se arquivo ainda existe
-                                    if not file_path.exists():
-                                        return
-                    
-                    file_watcher_breaker.call(read_file)
-                    
-                except Exception as e:
-                    self.logger.error(f"Erro no watcher para {file_path}: {e}")
-                    self.metrics.increment_error("file_watcher_error")
-                    time.sleep(5)  # Backoff em caso de erro
-        
-        # Executar watcher em thread separada
+        """👁️ Registra arquivo de log no tailer compartilhado"""
         try:
-            watcher_thread = threading.Thread(
-                target=watch_file, 
-                daemon=True,
-                name=f"FileWatcher-{source.value}"
-            )
-            watcher_thread.start()
-            self.logger.info(f"Watcher iniciado para {file_path}")
+            self.tailer.add(file_path, source)
+            self.logger.info(f"Watcher iniciado para {file_path} ({self.tailer.mode})")
         except Exception as e:
-            self.logger.error(f"Erro ao iniciar watcher thread: {e}")
+            self.logger.error(f"Erro ao registrar watcher para {file_path}: {e}")
             raise
+
+    def _on_tailer_error(self, file_path: Path, error: Exception):
+        """Callback de erro do tailer"""
+        self.logger.error(f"Erro no watcher para {file_path}: {error}")
+        self.metrics.increment_error("file_watcher_error")
     
+    # Tamanho máximo de cada lote enviado à queue pelos coletores
+    COLLECTOR_BATCH_SIZE = 1000
+
+    # Equivalentes fnmatch (caminho absoluto) dos padrões de busca do Claude Flow/MCP
+    CLAUDE_FLOW_PARSER_GLOBS = ("*/claude-flow*/logs/*.log", "*/mcp-*/*.log")
+
     def _parse_and_queue_log(self, line: str, source: LogSource, file_path: str):
         """📝 Parseia linha de log e adiciona à queue com validação"""
-        if not line or not line.strip():
-            return
-        
-        try:
-            # Validação básica de entrada
-            if len(line) > 50000:  # Limitar tamanho da linha
-                line = line[:50000] + "... [TRUNCATED]"
-            
-            # Tentar parsear como JSON primeiro
+        self._parse_and_queue_lines([line], source, file_path)
+
+    def _parse_line(self, line: str, source: LogSource, file_path: str,
+                    timestamp: str, parsed: Optional[ParsedLine] = None) -> LogEntry:
+        """Converte uma linha (JSON ou texto) em LogEntry
+
+        parsed é o resultado já obtido em lote pelo ParserRegistry para
+        linhas que não são JSON.
+        """
+        # Tentar parsear como JSON primeiro
+        data = None
+        if line[0] == '{':
             try:
-                data = json.loads(line)
-                level_str = data.get('level', 'INFO')
-                # Validar nível de log
-                try:
-                    level = LogLevel(level_str.upper())
-                except ValueError:
-                    level = LogLevel.INFO
-                
-                message = str(data.get('message', line))[:10000]  # Limitar tamanho
-                metadata = data if isinstance(data, dict) else {"raw_data": str(data)}
-                
-            except (json.JSONDecodeError, ValueError, TypeError):
-                # Fallback para log texto simples
-                level = self._detect_log_level(line)
-                message = line[:10000]  # Limitar tamanho
-                metadata = {"raw_line": line, "file_path": file_path, "parse_method": "text"}
-            
-            # Criar entrada de log com validação
+                data = json_codec.loads(line)
+            except (json.JSONDecodeError, ValueError):
+                data = None
+
+        if isinstance(data, dict):
+            # Validar nível de log
             try:
-                log_entry = LogEntry(
-                    timestamp=datetime.now(timezone.utc).isoformat(),
-                    level=level,
-                    source=source,
-                    service=source.value,
-                    message=message,
-                    metadata=metadata
-                )
-                
-                # Tentar adicionar à queue principal
-                try:
-                    self.log_queue.put_nowait(log_entry)
-                except queue.Full:
-                    # Se queue está cheia, usar buffer de emergência
-                    self.log_buffer.append(log_entry)
-                    self.metrics.increment_error("queue_full")
-                    self.logger.warning("Queue principal cheia, usando buffer")
-                
+                level = LogLevel(str(data.get('level', 'INFO')).upper())
+            except ValueError:
+                level = LogLevel.INFO
+            return LogEntry(
+                timestamp=timestamp,
+                level=level,
+                source=source,
+                service=source.value,
+                message=str(data.get('message', line))[:10000],  # Limitar tamanho
+                metadata=data
+            )
+
+        # Texto: formato conhecido (timestamp/nível/logger originais) ou texto simples
+        if parsed is None:
+            parsed = self.parser_registry.parse_line(line, source, file_path)
+        metadata = {"raw_line": line, "file_path": file_path, "parse_method": parsed.parser}
+        if parsed.logger:
+            metadata["logger"] = parsed.logger
+        metadata.update(parsed.fields)
+
+        # Campos garantidos pelo parser: linha não vazia e timestamp normalizado
+        return LogEntry.trusted(
+            timestamp=parsed.timestamp or timestamp,
+            level=parsed.level,
+            source=source,
+            service=source.value,
+            message=(parsed.message or line)[:10000],  # Limitar tamanho
+            metadata=metadata,
+            trace_id=parsed.trace_id
+        )
+
+    def _parse_and_queue_lines(self, lines: List[str], source: LogSource, file_path: str):
+        """📝 Parseia um bloco de linhas e enfileira em lotes (uma operação por lote)"""
+        started = time.perf_counter()
+        timestamp = datetime.now(timezone.utc).isoformat()
+        entries = []
+
+        # Normalizar o bloco e interpretar as linhas de texto de uma vez
+        lines = [line[:50000] + "... [TRUNCATED]" if len(line) > 50000 else line
+                 for line in map(str.strip, lines) if line]  # Limitar tamanho da linha
+        parsed_lines = self.parser_registry.parse_block(lines, source, file_path)
+
+        for line, parsed in zip(lines, parsed_lines):
+            try:
+                entries.append(self._parse_line(line, source, file_path, timestamp, parsed))
+
             except ValueError as ve:
                 self.logger.error(f"Erro de validação no log entry: {ve}", extra={"line": line[:1000]})
                 self.metrics.increment_error("validation_error")
-            
-        except Exception as e:
-            self.logger.error(f"Erro crítico ao parsear log: {e}", extra={"line": line[:1000]})
-            self.metrics.increment_error("parse_error")
-            # Em caso de erro crítico, ainda tentar salvar informação básica
-            try:
-                emergency_entry = LogEntry(
-                    timestamp=datetime.now(timezone.utc).isoformat(),
-                    level=LogLevel.ERROR,
-                    source=LogSource.GENERAL,
-                    service="parser",
-                    message=f"Erro ao parsear log: {str(e)[:1000]}",
-                    metadata={"original_line": line[:1000], "error": str(e)}
-                )
-                self.log_buffer.append(emergency_entry)
-            except Exception:
-                pass  # Se nem isso funcionar, desistir silenciosamente
-    
-    def _detect_log_level(self, line: str) -> LogLevel:
-        """🔍 Detecta nível de log em texto simples com análise aprimorada"""
-        if not line:
-            return LogLevel.INFO
-        
-        line_upper = line.upper()
-        
-        # Ordem de prioridade: CRITICAL > ERROR > WARNING > DEBUG > INFO
-        critical_patterns = ['CRITICAL', 'FATAL', 'CRITICO', 'PANIC', 'EMERGENCY']
-        error_patterns = ['ERROR', 'ERRO', 'EXCEPTION', 'FAILED', 'FAILURE', 'TRACEBACK']
-        warning_patterns = ['WARNING', 'WARN', 'AVISO', 'DEPRECATED', 'ALERT']
-        debug_patterns = ['DEBUG', 'TRACE', 'VERBOSE']
-        
-        for pattern in critical_patterns:
-            if pattern in line_upper:
-                return LogLevel.CRITICAL
-        
-        for pattern in error_patterns:
-            if pattern in line_upper:
-                return LogLevel.ERROR
-        
-        for pattern in warning_patterns:
-            if pattern in line_upper:
-                return LogLevel.WARNING
-        
-        for pattern in debug_patterns:
-            if pattern in line_upper:
-                return LogLevel.DEBUG
-        
-        return LogLevel.INFO
-    
+
+            except Exception as e:
+                self.logger.error(f"Erro crítico ao parsear log: {e}", extra={"line": line[:1000]})
+                self.metrics.increment_error("parse_error")
+                # Em caso de erro crítico, ainda tentar salvar informação básica
+                try:
+                    entries.append(LogEntry.trusted(
+                        timestamp=timestamp,
+                        level=LogLevel.ERROR,
+                        source=LogSource.GENERAL,
+                        service="parser",
+                        message=f"Erro ao parsear log: {str(e)[:1000]}",
+                        metadata={"original_line": line[:1000], "error": str(e)}
+                    ))
+                except Exception:
+                    pass  # Se nem isso funcionar, desistir silenciosamente
+
+        tracer = self.tracer
+        if lines:
+            # Custo médio por linha do bloco, com peso do tamanho do bloco
+            self.metrics.histogram("parse_seconds").record(
+                (time.perf_counter() - started) / len(lines), len(lines))
+            if tracer.enabled:
+                tracer.record("parse", started, count=len(lines))
+
+        # Adicionar à queue principal conforme a política de sobrecarga
+        span = tracer.start()
+        for start in range(0, len(entries), self.COLLECTOR_BATCH_SIZE):
+            batch = entries[start:start + self.COLLECTOR_BATCH_SIZE]
+            accepted = self.ingestion_gate.offer_batch(batch)
+            if accepted:
+                self.metrics.record_stage("ingested", accepted)
+            if accepted < len(batch):
+                self.metrics.increment_error("queue_full")
+        if span:
+            tracer.record("enqueue", span, count=len(entries))
+
     def _metrics_worker(self):
         """Worker para coleta de métricas do sistema"""
         while True:
@@ -541,128 +1147,160 @@ class CentralLogger:
                 time.sleep(60)  # Esperar mais tempo em caso de erro
     
     def _batch_write_worker(self):
-        """Worker para escritas em batch"""
+        """Worker para escritas em batch (acordado por tamanho ou por tempo)"""
         while True:
             try:
-                current_time = time.time()
-                
-                # Verifica se deve escrever batch (por tamanho ou tempo)
-                if (len(self.batch_buffer) >= self.batch_size or 
-                    (current_time - self.last_batch_time) > 10):  # 10 segundos
-                    
-                    if self.batch_buffer:
-                        self._write_batch_logs()
-                        self.last_batch_time = current_time
-                
-                time.sleep(1)  # Verificar a cada segundo
-                
+                # Espera até o batch encher ou o intervalo de flush expirar
+                self._flush_event.wait(timeout=self.flush_interval)
+                self._flush_event.clear()
+
+                if self.batch_buffer or self.write_retry:
+                    self._write_batch_logs()
+                    self.last_batch_time = time.time()
+
+                self.segment_writer.tick()
+
             except Exception as e:
                 self.logger.error(f"Erro no worker de batch: {e}")
                 time.sleep(5)
-    
+
     def _write_batch_logs(self):
-        """Escreve logs em batch para otimização"""
-        if not self.batch_buffer:
-            return
-        
-        start_time = time.time()
-        
+        """Escreve logs em batch via SegmentWriter (um write por arquivo)"""
+        # Visível para durable_through() enquanto os lotes saem do buffer e da fila de retry
+        self._writing_since = _oldest_stamp(self.write_retry.oldest(), self.batch_buffer.oldest_mark())
         try:
-            # Agrupar logs por data
-            logs_by_date = defaultdict(list)
-            
-            for log_entry in self.batch_buffer:
-                try:
-                    log_date = datetime.fromisoformat(
-                        log_entry.timestamp.replace('Z', '+00:00')
-                    ).date()
-                    logs_by_date[log_date].append(log_entry.sanitize_for_storage())
-                except Exception as e:
-                    self.logger.warning(f"Erro ao processar log para batch: {e}")
-                    continue
-            
-            # Escrever logs agrupados
-            for log_date, logs in logs_by_date.items():
-                log_file = self.logs_dir / f"central-{log_date}.jsonl"
-                
-                try:
-                    with open(log_file, 'a', encoding='utf-8') as f:
-                        for log_data in logs:
-                            f.write(json.dumps(log_data, ensure_ascii=False) + '\n')
-                except Exception as e:
-                    self.logger.error(f"Erro ao escrever batch para {log_file}: {e}")
-                    # Em caso de erro, tentar salvar no buffer de emergência
-                    for log_data in logs:
-                        try:
-                            log_entry = LogEntry(**log_data)
-                            self.log_buffer.append(log_entry)
-                        except Exception:
-                            pass
-            
-            # Limpar buffer
-            self.batch_buffer.clear()
-            
+            # Lotes que falharam antes vão primeiro, preservando a ordem
+            for entries, attempts, since in self.write_retry.take_ready():
+                self._write_entries(entries, [], attempts, since)
+
+            # Swap-on-flush: o processador continua adicionando no buffer
+            batch = self.batch_buffer.swap()
+            if not batch:
+                return
+
+            swapped_at = time.monotonic()
+            marks = self.batch_buffer.take_marks(len(batch))
+            buffer_wait = self.metrics.histogram("buffer_wait_seconds")
+            for count, _, buffered_at in marks:
+                buffer_wait.record(swapped_at - buffered_at, count)
+            self._write_entries(batch, marks, since=_oldest_stamp(*(mark[1] for mark in marks)))
+        finally:
+            self._writing_since = None
+
+    def durable_through(self, checkpoint: float) -> bool:
+        """Tudo que entrou na queue até `checkpoint` já foi escrito (ou descartado de vez)
+
+        Lê as etapas na ordem do fluxo (queue, handoff, buffer, escrita,
+        retry): um lote que avança durante a leitura é visto de novo adiante.
+        """
+        pending = (
+            self.log_queue.oldest_stamp(),
+            self.log_queue.in_hand_since,
+            self.batch_buffer.oldest_mark(),
+            self._writing_since,
+            self.write_retry.oldest(),
+        )
+        return all(stamp is None or stamp > checkpoint for stamp in pending)
+
+    def _write_entries(self, batch: List[LogEntry], marks: List[Tuple[int, float, float]],
+                       attempts: int = 0, since: Optional[float] = None):
+        """Um write do lote; falhas vão para o WriteRetry"""
+        start_time = time.perf_counter()
+        try:
+            self.segment_writer.write_batch(batch, [(count, enqueued_at) for count, enqueued_at, _ in marks])
+            self.rollups.record(batch)
+
             # Registrar métricas
-            write_duration = time.time() - start_time
+            write_duration = time.perf_counter() - start_time
             self.metrics.add_write_time(write_duration)
-            
+            self.metrics.record_stage("written", len(batch))
+            self.metrics.histogram("batch_size").record(len(batch))
+            now = time.monotonic()
+            ingest_to_disk = self.metrics.histogram("ingest_to_disk_seconds")
+            for count, enqueued_at, _ in marks:
+                ingest_to_disk.record(now - enqueued_at, count)
+
         except Exception as e:
             self.logger.error(f"Erro crítico ao escrever batch: {e}")
             self.metrics.increment_error("batch_write_error")
+            # Só o que não foi escrito volta (no modo multi-processo, os
+            # shards que falharam), direto para o BatchWriter com backoff
+            failed = getattr(e, 'entries', batch)
+            if failed is not batch:
+                failed_ids = {id(log_entry) for log_entry in failed}
+                self.rollups.record(log_entry for log_entry in batch if id(log_entry) not in failed_ids)
+            if not self.write_retry.schedule(list(failed), attempts + 1, since):
+                self.logger.error(f"Descartadas {len(failed)} entradas após "
+                                  f"{self.write_retry.max_attempts} tentativas de escrita")
     
     def _process_logs_worker(self):
         """⚙️ Worker thread para processar logs da queue"""
+        queue_wait = self.metrics.histogram("queue_wait_seconds")
         while True:
             try:
-                log_entry = self.log_queue.get(timeout=1)
+                entries = self.log_queue.get(timeout=1)
+                enqueued_at = self.log_queue.last_enqueued_at
+                dequeued_at = time.monotonic()
+                queue_wait.record(dequeued_at - enqueued_at, len(entries))
                 
                 # Adicionar ao buffer de batch
-                self.batch_buffer.append(log_entry)
-                
-                # Enviar para websockets em tempo real (se houver conexões)
-                if self.websocket_connections:
-                    asyncio.create_task(self._broadcast_to_websockets(log_entry))
-                
-                # Verificar alertas
-                self._check_alerts(log_entry)
-                
+                self.batch_buffer.extend(entries, enqueued_at, dequeued_at)
+                self.log_queue.in_hand_since = None  # Já visível nas marcas do buffer
+                self.metrics.record_stage("processed", len(entries))
+                if len(self.batch_buffer) >= self.batch_size:
+                    self._flush_event.set()
+
+                # Enviar para websockets em tempo real (no-op sem assinantes)
+                self.broadcaster.publish(entries, enqueued_at)
+
+                # Alertas avaliados fora desta thread
+                self.alert_engine.submit(entries)
+
                 self.log_queue.task_done()
                 
             except queue.Empty:
-                # Processar buffer de emergência se houver
-                if self.log_buffer:
-                    try:
-                        emergency_log = self.log_buffer.popleft()
-                        self.batch_buffer.append(emergency_log)
-                    except IndexError:
-                        pass
                 continue
             except Exception as e:
                 self.logger.error(f"Erro no processamento de logs: {e}")
                 self.metrics.increment_error("processing_error")
     
+    def _overflow_replay_worker(self):
+        """Reaplica segmentos de overflow quando a queue tem folga"""
+        spill = self.ingestion_gate.spill
+        while True:
+            try:
+                low_watermark = self.log_queue.maxsize * 0.5
+                if spill.pending_bytes > 0 and self.log_queue.qsize() < low_watermark:
+                    entries = spill.pop_segment()
+                    for start in range(0, len(entries), self.batch_size):
+                        self.log_queue.put(entries[start:start + self.batch_size])
+                    if entries:
+                        self.ingestion_gate._count("replayed", len(entries))
+                    continue
+
+                time.sleep(1)
+
+            except Exception as e:
+                self.logger.error(f"Erro no replay de overflow: {e}")
+                self.metrics.increment_error("overflow_replay_error")
+                time.sleep(5)
+
     def _schedule_log_compression(self):
-        """Agenda compressão de logs antigos"""
+        """Agenda a manutenção dos segmentos: compressão pendente, retenção e rollups"""
         def compression_worker():
             while True:
                 try:
-                    # Comprimir logs mais antigos que X dias
-                    retention_days = getattr(self.config.logger, 'retention_days', 30)
-                    cutoff_date = datetime.now() - timedelta(days=7)  # Comprimir logs de 7+ dias
+                    # Selados que ficaram sem comprimir (reinício, falha, dia encerrado)
+                    self._compress_sealed_segments()
+
+                    # Apagar o que passou de retention_days
+                    self._enforce_retention()
                     
-                    for log_file in self.logs_dir.glob("central-*.jsonl"):
-                        try:
-                            # Extrair data do nome do arquivo
-                            date_str = log_file.stem.replace('central-', '')
-                            file_date = datetime.strptime(date_str, '%Y-%m-%d')
-                            
-                            if file_date.date() < cutoff_date.date():
-                                self._compress_log_file(log_file)
-                        except Exception as e:
-                            self.logger.warning(f"Erro ao processar {log_file} para compressão: {e}")
+                    # Persistir os rollups dos dias que fecharam
+                    self.rollups.close_days()
                     
-                    # Dormir por 24 horas
-                    time.sleep(86400)
+                    # A rotação comprime na hora; aqui só as sobras
+                    time.sleep(600)
                     
                 except Exception as e:
                     self.logger.error(f"Erro no worker de compressão: {e}")
@@ -671,102 +1309,96 @@ class CentralLogger:
         compression_thread = threading.Thread(
             target=compression_worker,
             daemon=True,
-            name="LogCompressor"
+            name="LogMaintenance"
         )
         compression_thread.start()
     
-    def _compress_log_file(self, log_file: Path):
-        """Comprime arquivo de log específico"""
-        compressed_file = log_file.with_suffix('.jsonl.gz')
-        
-        if compressed_file.exists():
-            return  # Já comprimido
-        
-        try:
-            with open(log_file, 'rb') as f_in:
-                with gzip.open(compressed_file, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            
-            # Remover arquivo original após compressão bem-sucedida
-            log_file.unlink()
-            self.logger.info(f"Log comprimido: {log_file} -> {compressed_file}")
-            
-        except Exception as e:
-            self.logger.error(f"Erro ao comprimir {log_file}: {e}")
-            # Remover arquivo comprimido parcial em caso de erro
-            if compressed_file.exists():
-                try:
-                    compressed_file.unlink()
-                except Exception:
-                    pass
+    def _sealed_segments(self) -> List[Path]:
+        """Segmentos não comprimidos que nenhum writer vai estender
+
+        Selados são os que têm sequencial posterior no mesmo writer e os de
+        dias anteriores (UTC); fechar o handle antes de comprimir garante que
+        o writer continue em um sequencial novo.
+        """
+        today = datetime.now(timezone.utc).date()
+        latest: Dict[Tuple[Any, Any], int] = {}
+        candidates = []
+        for log_file in self.logs_dir.glob("central-*.jsonl"):
+            file_date = segment_date(log_file)
+            if file_date is None:
+                continue
+            key = (file_date, segment_shard(log_file))
+            latest[key] = max(latest.get(key, 0), segment_seq(log_file))
+            candidates.append((log_file, key))
+        for log_file in self.logs_dir.glob("central-*.jsonl.*"):
+            file_date = segment_date(log_file)
+            if file_date is not None:
+                key = (file_date, segment_shard(log_file))
+                latest[key] = max(latest.get(key, 0), segment_seq(log_file))
+        return [log_file for log_file, key in candidates
+                if key[0] < today or segment_seq(log_file) < latest[key]]
+
+    def _compress_sealed_segments(self):
+        for log_file in self._sealed_segments():
+            self.compression_pool.submit(log_file)
+
+    def _on_segment_compressed(self, log_file: Path, compressed_file: Path):
+        """Original removido: o cache de consultas não pode servir o caminho antigo"""
+        self.query_cache.invalidate(log_file)
+        self.query_cache.invalidate(compressed_file)
+        self.logger.info(f"Log comprimido: {log_file} -> {compressed_file}")
+
+    def _on_compression_error(self, log_file: Path, error: Exception):
+        self.logger.error(f"Erro ao comprimir {log_file}: {error}")
+        self.metrics.increment_error("compression_error")
+
+    def _enforce_retention(self):
+        """Remove segmentos (de qualquer codec) mais antigos que retention_days"""
+        retention_days = getattr(self.config.logger, 'retention_days', 30)
+        if retention_days <= 0:
+            return  # Retenção desligada
+        cutoff = datetime.now(timezone.utc).date() - timedelta(days=retention_days)
+        removed_days = set()
+        for log_file in self.logs_dir.glob("central-*.jsonl*"):
+            file_date = segment_date(log_file)
+            if file_date is None or file_date >= cutoff:
+                continue
+            try:
+                self.segment_writer.close_segment(plain_path(log_file))
+                size = log_file.stat().st_size
+                log_file.unlink()
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                self.logger.warning(f"Erro ao remover {log_file} pela retenção: {e}")
+                continue
+            self.query_cache.invalidate(log_file)
+            self.retention_counters["removed_segments"] += 1
+            self.retention_counters["removed_bytes"] += size
+            removed_days.add(file_date)
+        for file_date in removed_days:
+            self.rollups.forget(file_date.isoformat())
+        if removed_days:
+            self.logger.info(f"Retenção: removidos segmentos de {len(removed_days)} dia(s) anteriores a {cutoff}")
     
     def _compress_old_logs(self):
-        """Comprime logs antigos quando disco está cheio"""
+        """Comprime logs já selados quando disco está cheio"""
         try:
-            # Comprimir logs de mais de 1 dia quando disco está cheio
-            cutoff_date = datetime.now() - timedelta(days=1)
-            
-            for log_file in self.logs_dir.glob("central-*.jsonl"):
-                try:
-                    date_str = log_file.stem.replace('central-', '')
-                    file_date = datetime.strptime(date_str, '%Y-%m-%d')
-                    
-                    if file_date.date() < cutoff_date.date():
-                        self._compress_log_file(log_file)
-                except Exception as e:
-                    self.logger.warning(f"Erro na compressão de emergência de {log_file}: {e}")
-                    
+            self._compress_sealed_segments()
         except Exception as e:
             self.logger.error(f"Erro na compressão de emergência: {e}")
     
-    async def _broadcast_to_websockets(self, log_entry: LogEntry):
-        """📡 Envia log para todas as conexões WebSocket"""
-        if not self.websocket_connections:
-            return
-        
-        message = json.dumps(log_entry.to_dict())
-        
-        # Remover conexões fechadas
-        active_connections = []
-        for ws in self.websocket_connections:
-            try:
-                await ws.send_text(message)
-                active_connections.append(ws)
-            except Exception:
-                pass  # Conexão fechada
-        
-        self.websocket_connections = active_connections
-    
-    def _check_alerts(self, log_entry: LogEntry):
-        """🚨 Verifica se log dispara algum alerta"""
-        
-        # Alertas para erros críticos
-        if log_entry.level in [LogLevel.ERROR, LogLevel.CRITICAL]:
-            self._send_alert(log_entry)
-    
-    def _send_alert(self, log_entry: LogEntry):
-        """📢 Envia alerta para log crítico"""
-        alert = {
-            "type": "critical_log",
-            "timestamp": log_entry.timestamp,
-            "source": log_entry.source.value,
-            "message": log_entry.message,
-            "level": log_entry.level.value
-        }
-        
-        # Salvar alerta
-        try:
-            alerts_file = self.logs_dir / "alerts.jsonl"
-            with open(alerts_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(alert, ensure_ascii=False) + '\n')
-        except Exception as e:
-            self.logger.error(f"Erro ao salvar alerta: {e}")
-        
-        self.logger.critical("ALERTA GERADO", **alert)
+    def _on_alerts(self, alerts: List[Dict[str, Any]]):
+        """📢 Registra os alertas gravados em um ciclo do motor"""
+        for alert in alerts:
+            self.logger.critical("ALERTA GERADO", **alert)
     
     def log(self, level: LogLevel, source: LogSource, service: str, 
             message: str, **metadata):
-        """📝 API pública para logging com validação"""
+        """📝 API pública para logging com validação
+
+        Retorna False quando a entrada é descartada pela política de sobrecarga.
+        """
         
         # Validações de entrada
         if not isinstance(message, str) or not message.strip():
@@ -779,7 +1411,10 @@ class CentralLogger:
             metadata = {}
         
         try:
-            log_entry = LogEntry(
+            tracer = self.tracer
+            span = tracer.start()
+            # Campos já validados acima
+            log_entry = LogEntry.trusted(
                 timestamp=datetime.now(timezone.utc).isoformat(),
                 level=level,
                 source=source,
@@ -787,19 +1422,142 @@ class CentralLogger:
                 message=message.strip(),
                 metadata=metadata
             )
-            
-            try:
-                self.log_queue.put_nowait(log_entry)
-            except queue.Full:
-                # Usar buffer de emergência
-                self.log_buffer.append(log_entry)
-                self.metrics.increment_error("queue_full_api")
+            if span:
+                tracer.record("validate", span)
+                span = tracer.start()
+
+            offered = self.ingestion_gate.offer(log_entry)
+            if span:
+                tracer.record("enqueue", span)
+            if offered:
+                self.metrics.record_stage("ingested")
+                return True
+
+            self.metrics.increment_error("queue_full_api")
+            return False
                 
         except Exception as e:
             self.logger.error(f"Erro ao adicionar log via API: {e}")
             self.metrics.increment_error("api_log_error")
             raise
     
+    # Lookup de fontes aceitando valor ("ui") ou nome ("UI")
+    _SOURCE_LOOKUP = {
+        **{source.value: source for source in LogSource},
+        **{source.name: source for source in LogSource},
+    }
+
+    def _entry_from_payload(self, data: Dict[str, Any], default_timestamp: str) -> LogEntry:
+        """Constrói e valida uma entrada recebida de um cliente externo"""
+        if not isinstance(data, dict):
+            raise ValueError("Entrada deve ser um objeto JSON")
+
+        level = data.get('level', 'INFO')
+        try:
+            level = LogLevel(str(level).upper())
+        except ValueError:
+            raise ValueError(f"Nível inválido: {level}")
+
+        source = self._SOURCE_LOOKUP.get(data.get('source', 'general'))
+        if source is None:
+            raise ValueError(f"Fonte inválida: {data.get('source')}")
+
+        timestamp = data.get('timestamp') or default_timestamp
+        if not isinstance(timestamp, str):
+            raise ValueError("Timestamp deve estar em formato ISO")
+
+        message = data.get('message')
+        if isinstance(message, str):
+            message = message.strip()
+
+        return LogEntry(
+            timestamp=timestamp,
+            level=level,
+            source=source,
+            service=data.get('service', 'api'),
+            message=message,
+            metadata=data.get('metadata') or {},
+            trace_id=data.get('trace_id'),
+            session_id=data.get('session_id'),
+            user_id=data.get('user_id')
+        )
+
+    @staticmethod
+    def _decompress_body(body: bytes, max_bytes: int) -> bytes:
+        """Descomprime corpo gzip/zlib (multi-member) respeitando o limite"""
+        chunks = []
+        total = 0
+        while body:
+            decompressor = zlib.decompressobj(wbits=47)  # Detecta gzip ou zlib
+            chunk = decompressor.decompress(body, max_bytes - total + 1)
+            total += len(chunk)
+            if total > max_bytes or decompressor.unconsumed_tail:
+                raise OverflowError("Corpo descomprimido excede o limite")
+            chunks.append(chunk)
+            body = decompressor.unused_data.lstrip(b'\x00')
+        return b''.join(chunks)
+
+    def ingest_batch(self, payload: bytes, max_errors: int = 20) -> Dict[str, Any]:
+        """📦 Ingestão em lote de NDJSON ou array JSON (opcionalmente gzip)"""
+        max_bytes = getattr(self.config.logger, 'max_batch_bytes', 16 * 1024 * 1024)
+        if payload[:2] == b'\x1f\x8b':
+            payload = self._decompress_body(payload, max_bytes)
+        elif len(payload) > max_bytes:
+            raise OverflowError("Corpo excede o limite")
+
+        stripped = payload.lstrip()
+        if stripped[:1] == b'[':
+            try:
+                records = json_codec.loads(stripped)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Array JSON inválido: {e}")
+        else:
+            records = []
+            for line in stripped.split(b'\n'):
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json_codec.loads(line))
+                except json.JSONDecodeError as e:
+                    records.append(e)
+
+        default_timestamp = datetime.now(timezone.utc).isoformat()
+        entries = []
+        errors = []
+        rejected = 0
+        tracer = self.tracer
+        span = tracer.start()
+        for index, record in enumerate(records):
+            try:
+                if isinstance(record, Exception):
+                    raise ValueError(f"JSON inválido: {record}")
+                entries.append(self._entry_from_payload(record, default_timestamp))
+            except (ValueError, TypeError) as e:
+                rejected += 1
+                if len(errors) < max_errors:
+                    errors.append({"index": index, "error": str(e)})
+        if span:
+            tracer.record("validate", span, count=len(records))
+            span = tracer.start()
+
+        accepted = self.ingestion_gate.offer_batch(entries)
+        if span:
+            tracer.record("enqueue", span, count=len(entries))
+        dropped = len(entries) - accepted
+        if accepted:
+            self.metrics.record_stage("ingested", accepted)
+        if rejected:
+            self.metrics.increment_error("batch_validation_error")
+        if dropped:
+            self.metrics.increment_error("queue_full_api")
+
+        return {
+            "accepted": accepted,
+            "rejected": rejected,
+            "dropped": dropped,
+            "errors": errors
+        }
+
     async def query_logs(self, 
                         source: Optional[LogSource] = None,
                         level: Optional[LogLevel] = None,
@@ -813,6 +1571,8 @@ class CentralLogger:
             raise ValueError("Limit deve estar entre 1 e 10000")
         
         logs = []
+        started = time.perf_counter()
+        scanner = None
         
         try:
             # Determinar arquivos a serem pesquisados
@@ -826,90 +1586,127 @@ class CentralLogger:
             else:
                 end_date = datetime.now().date()
             
-            # Pesquisar em arquivos de log
+            scanner = SegmentScanner(
+                source=source.value if source else None,
+                level=level.value if level else None,
+                start_time=start_time,
+                end_time=end_time
+            )
+            
+            # Pesquisar em arquivos de log: em cada data, a sequência de
+            # segmentos de cada writer (o do processo e os dos shards),
+            # normais ou comprimidos
             current_date = start_date
             while current_date <= end_date and len(logs) < limit:
-                log_file = self.logs_dir / f"central-{current_date}.jsonl"
-                compressed_file = self.logs_dir / f"central-{current_date}.jsonl.gz"
-                
-                # Tentar arquivo normal primeiro, depois comprimido
-                file_to_read = None
-                is_compressed = False
-                
-                if log_file.exists():
-                    file_to_read = log_file
-                elif compressed_file.exists():
-                    file_to_read = compressed_file
-                    is_compressed = True
-                
-                if file_to_read:
-                    logs.extend(await self._read_log_file(
-                        file_to_read, is_compressed, source, level, 
-                        start_time, end_time, limit - len(logs)
-                    ))
+                remaining = limit - len(logs)
+                per_writer = [
+                    await self._read_segment_chain(list(chain), scanner, remaining)
+                    for _, chain in itertools.groupby(list_segments(self.logs_dir, current_date),
+                                                      key=segment_shard)
+                ]
+                if len(per_writer) == 1:
+                    logs.extend(per_writer[0])
+                elif per_writer:
+                    # Cada writer está em ordem de escrita; intercalar por timestamp
+                    merged = heapq.merge(*per_writer, key=lambda log: log.get('timestamp') or '')
+                    logs.extend(itertools.islice(merged, remaining))
                 
                 current_date += timedelta(days=1)
             
         except Exception as e:
             self.logger.error(f"Erro ao consultar logs: {e}")
             raise
+        finally:
+            self.metrics.histogram("query_seconds").record(time.perf_counter() - started)
+            if scanner is not None:
+                self.metrics.record_query_scan(scanner.stats)
         
         return logs[-limit:]  # Retornar os mais recentes
     
-    async def _read_log_file(self, file_path: Path, is_compressed: bool,
-                           source: Optional[LogSource], level: Optional[LogLevel],
-                           start_time: Optional[str], end_time: Optional[str],
-                           limit: int) -> List[Dict[str, Any]]:
-        """Lê arquivo de log com filtros"""
-        logs = []
-        
+    async def aggregate_logs(self,
+                             group_by: Optional[str] = "level",
+                             interval: int = 60,
+                             top: int = 10,
+                             source: Optional[LogSource] = None,
+                             level: Optional[LogLevel] = None,
+                             service: Optional[str] = None,
+                             start_time: Optional[str] = None,
+                             end_time: Optional[str] = None) -> Dict[str, Any]:
+        """📊 Contagens, top-k e histograma a partir dos rollups por minuto"""
+        started = time.perf_counter()
         try:
-            if is_compressed:
-                with gzip.open(file_path, 'rt', encoding='utf-8') as f:
-                    lines = f.readlines()
-            else:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-            
-            for line in lines:
-                if len(logs) >= limit:
+            # Datas como em query_logs (valida os limites)
+            start_date = datetime.fromisoformat(start_time.replace('Z', '+00:00')).date() if start_time else None
+            end_date = datetime.fromisoformat(end_time.replace('Z', '+00:00')).date() if end_time else None
+            # Dias fechados podem precisar ser lidos do disco na primeira vez
+            return await asyncio.to_thread(
+                self.rollups.aggregate,
+                start_time=start_time,
+                end_time=end_time,
+                group_by=group_by,
+                interval=interval,
+                top=top,
+                level=level.value if level else None,
+                source=source.value if source else None,
+                service=service,
+                start_date=start_date,
+                end_date=end_date
+            )
+        finally:
+            self.metrics.histogram("aggregate_seconds").record(time.perf_counter() - started)
+
+    async def _read_segment_chain(self, segments: List[Path], scanner: SegmentScanner,
+                                  limit: int) -> List[Dict[str, Any]]:
+        """Lê os segmentos de um writer em sequência até completar o limite"""
+        results: List[Dict[str, Any]] = []
+        for segment in segments:
+            results.extend(await self._read_log_file(segment, scanner, limit - len(results)))
+            if len(results) >= limit:
+                break
+        return results
+
+    async def _read_log_file(self, file_path: Path, scanner: SegmentScanner,
+                             limit: int) -> List[Dict[str, Any]]:
+        """Lê um segmento com os pré-filtros do scanner, pelo cache de consultas"""
+        if not file_path.exists():
+            # Comprimido entre a listagem e a leitura
+            for suffix in ARCHIVE_SUFFIXES:
+                if file_path.with_name(file_path.name + suffix).exists():
+                    file_path = file_path.with_name(file_path.name + suffix)
                     break
-                
-                try:
-                    log_data = json.loads(line.strip())
-                    
-                    # Aplicar filtros
-                    if source and log_data.get('source') != source.value:
-                        continue
-                    if level and log_data.get('level') != level.value:
-                        continue
-                    
-                    # Filtro de tempo
-                    if start_time or end_time:
-                        log_time = log_data.get('timestamp')
-                        if log_time:
-                            if start_time and log_time < start_time:
-                                continue
-                            if end_time and log_time > end_time:
-                                continue
-                    
-                    logs.append(log_data)
-                    
-                except json.JSONDecodeError:
-                    continue
-                    
+        try:
+            # Fora do event loop: segmentos grandes não travam a API
+            return await asyncio.to_thread(self.query_cache.read, file_path, scanner, limit)
         except Exception as e:
             self.logger.error(f"Erro ao ler arquivo {file_path}: {e}")
-        
-        return logs
+            return []
     
+    def get_metrics(self) -> Dict[str, Any]:
+        """📈 Métricas de performance e contadores de ingestão"""
+        stats = self.metrics.get_stats()
+        stats["ingestion"] = self.ingestion_gate.stats()
+        stats["write_retry"] = self.write_retry.stats()
+        stats["query_cache"] = self.query_cache.stats()
+        stats["rollups"] = self.rollups.stats()
+        stats["segments"] = self._segment_stats()
+        return stats
+
+    def _segment_stats(self) -> Dict[str, Any]:
+        return {
+            "sealed": self.segment_writer.sealed,
+            "max_bytes": self.segment_writer.max_bytes,
+            "compression": self.compression_pool.stats(),
+            "retention": dict(self.retention_counters),
+        }
+
     def get_health_status(self) -> Dict[str, Any]:
         """🔍 Health check detalhado"""
         try:
             # Métricas básicas
             queue_size = self.log_queue.qsize()
-            buffer_size = len(self.log_buffer)
-            websocket_count = len(self.websocket_connections)
+            ingestion_stats = self.ingestion_gate.stats()
+            spill_pending = ingestion_stats["spill_pending_bytes"]
+            websocket_count = self.broadcaster.subscriber_count
             
             # Métricas de performance
             performance_stats = self.metrics.get_stats()
@@ -926,6 +1723,8 @@ class CentralLogger:
                 "processing_thread": self.processing_thread.is_alive() if hasattr(self, 'processing_thread') else False,
                 "metrics_thread": self.metrics_thread.is_alive() if hasattr(self, 'metrics_thread') else False,
                 "batch_thread": self.batch_thread.is_alive() if hasattr(self, 'batch_thread') else False,
+                "tailer_thread": self.tailer.thread.is_alive() if self.tailer.thread else False,
+                "alert_thread": self.alert_engine.thread.is_alive() if self.alert_engine.thread else False,
             }
             
             # Status do disco
@@ -944,12 +1743,12 @@ class CentralLogger:
             status = "healthy"
             issues = []
             
-            if queue_size > 40000:
+            if queue_size > self.log_queue.maxsize * 0.8:
                 issues.append("Queue quase cheia")
                 status = "degraded"
             
-            if buffer_size > 5000:
-                issues.append("Buffer de emergência em uso")
+            if spill_pending > 0:
+                issues.append("Overflow em disco em uso")
                 status = "degraded"
             
             if self.circuit_breaker.state != CircuitBreakerState.CLOSED:
@@ -960,6 +1759,12 @@ class CentralLogger:
                 issues.append("Algumas threads não estão rodando")
                 status = "unhealthy"
             
+            writers = (self.segment_writer.stats()
+                       if isinstance(self.segment_writer, ShardedWriter) else {"processes": 0})
+            if writers["processes"] and writers["alive"] < writers["processes"]:
+                issues.append("Processos de escrita inativos (recriados no próximo batch)")
+                status = "degraded"
+            
             if disk_status.get("percent_used", 0) > 90:
                 issues.append("Disco quase cheio")
                 status = "degraded"
@@ -970,17 +1775,27 @@ class CentralLogger:
                 "issues": issues,
                 "metrics": {
                     "queue_size": queue_size,
-                    "buffer_size": buffer_size,
+                    "spill_pending_bytes": spill_pending,
                     "websocket_connections": websocket_count,
-                    "batch_buffer_size": len(self.batch_buffer)
+                    "batch_buffer_size": len(self.batch_buffer),
+                    "bytes_written": self.segment_writer.bytes_written
                 },
+                "writers": writers,
                 "performance": performance_stats,
+                "query_cache": self.query_cache.stats(),
+                "segments": self._segment_stats(),
+                "ingestion": ingestion_stats,
+                "websocket": self.broadcaster.stats(),
+                "alerts": {**self.alert_engine.stats(), "rules": self.rule_engine.stats()},
                 "circuit_breaker": circuit_breaker_status,
                 "threads": threads_status,
                 "disk": disk_status,
                 "config": {
                     "max_queue_size": self.log_queue.maxsize,
+                    "overload_policy": self.ingestion_gate.policy.value,
                     "batch_size": self.batch_size,
+                    "flush_interval": self.flush_interval,
+                    "fsync_policy": self.segment_writer.fsync_policy.value,
                     "logs_dir": str(self.logs_dir)
                 }
             }
@@ -1010,18 +1825,21 @@ def create_logging_api(central_logger: CentralLogger) -> FastAPI:
     
     @app.websocket("/ws/logs")
     async def websocket_logs(websocket: WebSocket):
-        """WebSocket para logs em tempo real"""
+        """WebSocket para logs em tempo real
+
+        Filtros opcionais: ?level=ERROR,CRITICAL&min_level=WARNING&source=ui&service=web
+        """
+        try:
+            subscription = SubscriptionFilter.from_params(websocket.query_params)
+        except (ValueError, KeyError) as e:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e)[:120])
+            return
+
         await websocket.accept()
-        central_logger.websocket_connections.append(websocket)
-        
         try:
-            while True:
-                await websocket.receive_text()  # Keep alive
+            await central_logger.broadcaster.serve(websocket, subscription)
         except Exception:
             pass  # Conexão fechada
-        finally:
-            if websocket in central_logger.websocket_connections:
-                central_logger.websocket_connections.remove(websocket)
     
     @app.get("/logs")
     async def get_logs(
@@ -1062,24 +1880,77 @@ def create_logging_api(central_logger: CentralLogger) -> FastAPI:
             central_logger.logger.error(f"Erro na consulta de logs: {e}")
             raise HTTPException(status_code=500, detail="Erro interno do servidor")
     
+    @app.get("/logs/aggregate")
+    async def aggregate_logs(
+        group_by: Optional[str] = "level",
+        interval: int = 60,
+        top: int = 10,
+        source: Optional[str] = None,
+        level: Optional[str] = None,
+        service: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None
+    ):
+        """Agregações (contagem, top-k e histograma por intervalo em minutos)
+
+        group_by: level, source, service ou none
+        """
+        try:
+            source_enum = LogSource(source) if source else None
+            level_enum = LogLevel(level) if level else None
+
+            return await central_logger.aggregate_logs(
+                group_by=None if group_by == "none" else group_by,
+                interval=interval,
+                top=top,
+                source=source_enum,
+                level=level_enum,
+                service=service,
+                start_time=start_time,
+                end_time=end_time
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            central_logger.logger.error(f"Erro na agregação de logs: {e}")
+            raise HTTPException(status_code=500, detail="Erro interno do servidor")
+    
     @app.post("/logs")
     async def add_log(log_data: dict):
         """Adicionar novo log via API"""
         try:
-            central_logger.log(
+            # put() pode bloquear com a fila cheia (LOGGER_OVERLOAD_POLICY=block): fora do event loop
+            accepted = await asyncio.to_thread(
+                central_logger.log,
                 level=LogLevel(log_data.get('level', 'INFO')),
                 source=LogSource(log_data.get('source', 'GENERAL')),
                 service=log_data.get('service', 'api'),
                 message=log_data.get('message', ''),
                 **log_data.get('metadata', {})
             )
-            return {"status": "success"}
+            return {"status": "success" if accepted else "dropped"}
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             central_logger.logger.error(f"Erro ao adicionar log via API: {e}")
             raise HTTPException(status_code=500, detail="Erro interno do servidor")
     
+    @app.post("/logs/batch")
+    async def add_logs_batch(request: Request):
+        """Adicionar logs em lote (NDJSON ou array JSON, gzip opcional)"""
+        try:
+            body = await request.body()
+            # Descompressão, parse e put (que pode bloquear) fora do event loop
+            result = await asyncio.to_thread(central_logger.ingest_batch, body)
+            return {"status": "success", **result}
+        except OverflowError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except (ValueError, zlib.error) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            central_logger.logger.error(f"Erro ao adicionar lote via API: {e}")
+            raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
     @app.get("/health")
     async def health_check():
         """Health check detalhado"""
@@ -1088,7 +1959,50 @@ def create_logging_api(central_logger: CentralLogger) -> FastAPI:
     @app.get("/metrics")
     async def get_metrics():
         """Métricas de performance"""
-        return central_logger.metrics.get_stats()
+        return central_logger.get_metrics()
+
+    @app.get("/metrics/prometheus")
+    async def get_prometheus_metrics():
+        """Métricas no formato Prometheus/OpenMetrics"""
+        return Response(content=central_logger.get_prometheus_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    def require_admin(request: Request):
+        if not central_logger.config.security.admin_token:
+            raise HTTPException(status_code=403,
+                                detail="Endpoints de administração desativados: defina ADMIN_TOKEN")
+        if not admin_allowed(central_logger.config.security.admin_token,
+                             request.headers.get("X-Admin-Token")):
+            raise HTTPException(status_code=403, detail="Token de administração inválido")
+
+    @app.get("/admin/profile")
+    async def profile(request: Request, seconds: float = 5.0, interval_ms: float = 5.0,
+                      threads: Optional[str] = None, include_idle: bool = False):
+        """🔬 Profile por amostragem das threads (stacks colapsadas para flamegraph)
+
+        Ex.: /admin/profile?seconds=10&threads=LogProcessor,BatchWriter
+        """
+        require_admin(request)
+        try:
+            stacks = await asyncio.to_thread(
+                central_logger.profiler.profile, seconds, interval_ms / 1000.0,
+                parse_thread_names(threads), include_idle
+            )
+        except ProfilerBusyError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return Response(content=stacks, media_type="text/plain; charset=utf-8")
+
+    @app.get("/admin/tracing")
+    async def get_tracing(request: Request):
+        """Estado e histogramas dos spans por estágio"""
+        require_admin(request)
+        return central_logger.tracer.snapshot()
+
+    @app.post("/admin/tracing")
+    async def set_tracing(request: Request, enabled: bool):
+        """Liga/desliga os spans de parse, validate, enqueue, serialize e write"""
+        require_admin(request)
+        central_logger.tracer.set_enabled(enabled)
+        return {"enabled": central_logger.tracer.enabled}
     
     @app.get("/config")
     async def get_config_info():
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+🚨 Log Alerts - Claude-20x
+Pipeline de alertas fora da thread de processamento:
+- A thread de processamento só entrega referências de lotes (O(1))
+- Deduplicação por chave (fonte, serviço, nível e mensagem normalizada)
+- Agregação em janela: "N ocorrências de X em 60s" em vez de um alerta por linha
+- Limite de taxa (token bucket) com contagem do que foi suprimido
+- Escrita em lote em alerts.jsonl (uma abertura de arquivo por ciclo)
+- Mensagens passam pelo Redactor antes de entrar no alerta (arquivo e log)
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import json_codec
+from log_redaction import Redactor, DEFAULT_REDACTOR
+from log_schema import LEVEL_ORDER, LogEntry, LogLevel, LogSource
+
+# Partes variáveis da mensagem (ids, números, endereços) não mudam a chave
+_VARIABLE_PARTS = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|0x[0-9a-fA-F]+|\d+"
+)
+
+
+def message_fingerprint(message: str, max_length: int = 200) -> str:
+    """Mensagem normalizada usada na chave de deduplicação"""
+    return _VARIABLE_PARTS.sub("#", message[:max_length * 2])[:max_length]
+
+
+class TokenBucket:
+    """Limite de taxa: rate_per_minute alertas, com rajada de até `burst`"""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, rate_per_minute)
+        self.tokens = self.capacity
+        self.updated: Optional[float] = None
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+@dataclass
+class AlertAggregate:
+    """Janela aberta de uma chave de deduplicação"""
+    dedup_key: str
+    level: LogLevel
+    source: LogSource
+    service: str
+    message: str
+    first_seen: str
+    last_seen: str
+    opened_at: float
+    count: int = 0  # Ocorrências na janela ainda não reportadas
+
+
+class AlertWriter:
+    """Anexa alertas ao arquivo em um único write por lote"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.writes = 0
+
+    def write(self, alerts: List[Dict[str, Any]]):
+        if not alerts:
+            return
+        data = ''.join(json_codec.dumps(alert) + '\n' for alert in alerts)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(data)
+        self.writes += 1
+
+
+class AlertEngine:
+    """
+    🚨 Motor de alertas com deduplicação, janelas e limite de taxa
+
+    submit() é chamado pela thread de processamento com cada lote e apenas
+    guarda a referência. A thread AlertEngine acorda a cada flush_interval,
+    consome os lotes pendentes e:
+    - na primeira ocorrência de uma chave emite um alerta imediato
+      (type=critical_log) e abre uma janela de window_seconds;
+    - ocorrências seguintes só incrementam a janela; ao fechar, se houve
+      repetições, emite type=aggregated com a contagem e reabre a janela;
+    - todo alerta passa pelo token bucket; os suprimidos são somados no
+      campo `suppressed` do próximo alerta emitido;
+    - os alertas do ciclo são gravados com um único write e entregues a
+      on_alerts (ex.: log estruturado).
+
+    Avaliadores extras (ex.: regras) podem ser plugados com add_evaluator:
+    observe() recebe cada lote, tick() roda uma vez por ciclo, e ambos
+    emitem alertas com emit().
+    """
+
+    def __init__(self, alerts_file: Path,
+                 min_level: LogLevel = LogLevel.ERROR,
+                 window_seconds: float = 60.0,
+                 rate_per_minute: float = 60.0,
+                 flush_interval: float = 1.0,
+                 max_keys: int = 10000,
+                 max_pending_batches: int = 10000,
+                 redactor: Optional[Redactor] = None,
+                 on_alerts: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self.min_order = LEVEL_ORDER[min_level]
+        self.window_seconds = window_seconds
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self.writer = AlertWriter(alerts_file)
+        self.limiter = TokenBucket(rate_per_minute)
+        self.redactor = redactor or DEFAULT_REDACTOR
+        self.on_alerts = on_alerts
+        self.on_error = on_error
+
+        self._pending: Deque[List[LogEntry]] = deque(maxlen=max_pending_batches)
+        self._windows: 'OrderedDict[str, AlertAggregate]' = OrderedDict()
+        self._outbox: List[Dict[str, Any]] = []
+        self._evaluators: List[Any] = []
+        self._suppressed_since_emit = 0
+        self._stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.counters: Dict[str, int] = {
+            "entries_seen": 0, "matched": 0, "emitted": 0,
+            "suppressed": 0, "backlog_dropped": 0, "write_errors": 0,
+        }
+
+    # ---------- lado da thread de processamento ----------
+
+    def submit(self, entries: List[LogEntry]):
+        """Entrega um lote para avaliação (sem trabalho por entrada)"""
+        if len(self._pending) == self._pending.maxlen:
+            self.counters["backlog_dropped"] += len(self._pending[0])
+        self._pending.append(entries)
+
+    # ---------- thread de alertas ----------
+
+    def add_evaluator(self, evaluator: Any):
+        """Pluga um avaliador com observe(entries, now) e tick(now)"""
+        self._evaluators.append(evaluator)
+
+    def emit(self, alert: Dict[str, Any], now: Optional[float] = None):
+        """Enfileira um alerta para o próximo write, respeitando o limite de taxa"""
+        if not self.limiter.allow(now):
+            self.counters["suppressed"] += 1
+            self._suppressed_since_emit += 1
+            return
+        if self._suppressed_since_emit:
+            alert["suppressed"] = self._suppressed_since_emit
+            self._suppressed_since_emit = 0
+        self.counters["emitted"] += 1
+        self._outbox.append(alert)
+
+    def _dedup_key(self, entry: LogEntry) -> str:
+        raw = f"{entry.source.value}|{entry.service}|{entry.level.value}|{message_fingerprint(entry.message)}"
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=8).hexdigest()
+
+    def _alert_for(self, aggregate: AlertAggregate, alert_type: str, count: int) -> Dict[str, Any]:
+        alert = {
+            "type": alert_type,
+            "timestamp": aggregate.last_seen,
+            "source": aggregate.source.value,
+            "service": aggregate.service,
+            "level": aggregate.level.value,
+            "message": aggregate.message,
+            "dedup_key": aggregate.dedup_key,
+            "count": count,
+        }
+        if alert_type == "aggregated":
+            alert["window_seconds"] = self.window_seconds
+            alert["first_seen"] = aggregate.first_seen
+            alert["summary"] = (f"{count} ocorrências de '{aggregate.message[:200]}' "
+                                f"em {self.window_seconds:g}s")
+        return alert
+
+    def _observe(self, entries: List[LogEntry], now: float):
+        min_order = self.min_order
+        windows = self._windows
+        matched = 0
+        for entry in entries:
+            if LEVEL_ORDER[entry.level] < min_order:
+                continue
+            matched += 1
+            key = self._dedup_key(entry)
+            aggregate = windows.get(key)
+            if aggregate is not None:
+                aggregate.count += 1
+                aggregate.last_seen = entry.timestamp
+                continue
+
+            if len(windows) >= self.max_keys:
+                self._close_window(*windows.popitem(last=False), now=now, reopen=False)
+            aggregate = AlertAggregate(
+                dedup_key=key, level=entry.level, source=entry.source,
+                service=entry.service, message=self.redactor.redact_text(entry.message[:1000]),
+                first_seen=entry.timestamp, last_seen=entry.timestamp, opened_at=now
+            )
+            windows[key] = aggregate
+            self.emit(self._alert_for(aggregate, "critical_log", 1), now)
+        self.counters["entries_seen"] += len(entries)
+        self.counters["matched"] += matched
+
+    def _close_window(self, key: str, aggregate: AlertAggregate, now: float, reopen: bool = True):
+        if aggregate.count:
+            self.emit(self._alert_for(aggregate, "aggregated", aggregate.count), now)
+            if reopen:
+                # Tempestade contínua: uma agregação por janela, sem novo alerta imediato
+                aggregate.count = 0
+                aggregate.opened_at = now
+                aggregate.first_seen = aggregate.last_seen
+                self._windows[key] = aggregate
+                self._windows.move_to_end(key)
+
+    def _expire_windows(self, now: float, force: bool = False):
+        windows = self._windows
+        # Janelas reabertas vão para o fim; cada chave é visitada no máximo uma vez
+        for _ in range(len(windows)):
+            key, aggregate = next(iter(windows.items()))
+            if not force and now - aggregate.opened_at < self.window_seconds:
+                break  # Ordem de abertura: as demais são mais novas
+            del windows[key]
+            self._close_window(key, aggregate, now, reopen=not force)
+
+    def run_cycle(self, now: Optional[float] = None):
+        """Processa os lotes pendentes, fecha janelas vencidas e grava os alertas"""
+        now = time.monotonic() if now is None else now
+        pending = self._pending
+        evaluators = self._evaluators
+        while pending:
+            entries = pending.popleft()
+            self._observe(entries, now)
+            for evaluator in evaluators:
+                evaluator.observe(entries, now)
+        # tick roda mesmo sem lotes: regras de ausência dependem só do relógio
+        for evaluator in evaluators:
+            evaluator.tick(now)
+        self._expire_windows(now)
+        self._flush_outbox()
+
+    def _flush_outbox(self):
+        alerts, self._outbox = self._outbox, []
+        if not alerts:
+            return
+        try:
+            self.writer.write(alerts)
+        except Exception as e:
+            self.counters["write_errors"] += 1
+            if self.on_error is not None:
+                self.on_error(e)
+        if self.on_alerts is not None:
+            self.on_alerts(alerts)
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.run_cycle()
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name="AlertEngine")
+        self.thread.start()
+
+    def stop(self):
+        """Para a thread e grava o que estiver pendente (janelas incluídas)"""
+        self._stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.flush_interval * 2)
+        now = time.monotonic()
+        self.run_cycle(now)
+        self._expire_windows(now, force=True)
+        self._flush_outbox()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "open_windows": len(self._windows),
+            "pending_batches": len(self._pending),
+            "file_writes": self.writer.writes,
+        }
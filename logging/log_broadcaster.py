@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+📡 Log Broadcaster - Claude-20x
+Fan-out de logs em tempo real para clientes WebSocket:
+- Roda no event loop do servidor; a thread de processamento só entrega
+  lotes via call_soon_threadsafe (uma chamada por lote, coalescida)
+- Fila limitada por cliente com descarte das mensagens mais antigas:
+  um dashboard lento não atrasa os demais nem a ingestão
+- Filtros no servidor por nível, fonte e serviço
+- Cada entrada é serializada uma vez e compartilhada entre os clientes
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import json_codec
+from log_redaction import Redactor, DEFAULT_REDACTOR
+from log_schema import LogEntry, SubscriptionFilter
+
+
+class Subscriber:
+    """Um cliente conectado: fila limitada (drop-oldest) e task de envio própria"""
+
+    def __init__(self, websocket, subscription: SubscriptionFilter, max_queue: int,
+                 send_latency=None):
+        self.websocket = websocket
+        self.send_latency = send_latency
+        self.subscription = subscription
+        self.queue: Deque[str] = deque(maxlen=max_queue)
+        self.wakeup = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def push(self, message: str):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1  # deque com maxlen descarta a mais antiga
+        self.queue.append(message)
+        self.wakeup.set()
+
+    async def sender(self):
+        queue = self.queue
+        send_text = self.websocket.send_text
+        latency = self.send_latency
+        try:
+            while True:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                while queue:
+                    started = time.perf_counter()
+                    await send_text(queue.popleft())
+                    self.sent += 1
+                    if latency is not None:
+                        latency.record(time.perf_counter() - started)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # Conexão fechada; o loop de recepção faz a limpeza
+
+
+class LogBroadcaster:
+    """
+    📡 Distribui entradas de log para assinantes WebSocket
+
+    publish() pode ser chamado de qualquer thread e não bloqueia: empilha o
+    lote e agenda um único dreno no event loop. O dreno avalia cada filtro
+    distinto uma vez por entrada (assinantes com o mesmo filtro compartilham
+    o resultado), serializa a entrada só se alguém a recebe e coloca a
+    mesma string na fila de cada assinante.
+
+    Com delivery_latency, cada lote entregue registra o tempo desde a
+    entrada na queue de ingestão até chegar às filas dos assinantes.
+
+    Se o event loop não drena (travado ou sobrecarregado), o backlog guarda
+    no máximo max_pending lotes; os mais antigos são descartados e contados
+    em backlog_dropped, como as filas por assinante fazem com max_queue.
+    """
+
+    def __init__(self, max_queue: int = 1000, redactor: Optional[Redactor] = None,
+                 send_latency=None, delivery_latency=None, max_pending: int = 1000):
+        self.max_queue = max_queue
+        self.max_pending = max_pending
+        self.redactor = redactor or DEFAULT_REDACTOR
+        self.send_latency = send_latency  # WindowedHistogram opcional (telemetry)
+        self.delivery_latency = delivery_latency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._groups: Dict[SubscriptionFilter, Set[Subscriber]] = {}
+        self._subscriber_count = 0
+        # (lote, instante de entrada na queue de ingestão ou None)
+        self._pending: Deque[Tuple[List[LogEntry], Optional[float]]] = deque()
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self.published = 0
+        self.disconnected_dropped = 0
+        self.backlog_dropped = 0  # Entradas de lotes descartados do backlog
+        self.backlog_dropped_batches = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._subscriber_count
+
+    # ---------- lado da thread de processamento ----------
+
+    def publish(self, entries: List[LogEntry], enqueued_at: Optional[float] = None):
+        """Entrega um lote ao event loop (thread-safe, sem espera)"""
+        loop = self._loop
+        if not self._subscriber_count or loop is None or not entries:
+            return
+        pending = self._pending
+        with self._lock:
+            if len(pending) >= self.max_pending:
+                try:
+                    oldest, _ = pending.popleft()
+                except IndexError:  # O dreno esvaziou o backlog nesse meio tempo
+                    pass
+                else:
+                    self.backlog_dropped += len(oldest)
+                    self.backlog_dropped_batches += 1
+            pending.append((entries, enqueued_at))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:  # Loop encerrado
+            with self._lock:
+                self._scheduled = False
+            self._pending.clear()
+
+    # ---------- lado do event loop ----------
+
+    def _drain(self):
+        with self._lock:
+            self._scheduled = False
+        pending = self._pending
+        groups = list(self._groups.items())
+        if not groups:
+            pending.clear()
+            return
+        redactor = self.redactor
+        dumps = json_codec.dumps
+        delivery_latency = self.delivery_latency
+        while pending:
+            entries, enqueued_at = pending.popleft()
+            delivered = 0
+            for entry in entries:
+                message = None
+                for subscription, subscribers in groups:
+                    if subscribers and subscription.matches(entry):
+                        if message is None:
+                            message = dumps(entry.sanitize_for_storage(redactor))
+                        for subscriber in subscribers:
+                            subscriber.push(message)
+                if message is not None:
+                    delivered += 1
+            self.published += delivered
+            if delivered and enqueued_at is not None and delivery_latency is not None:
+                delivery_latency.record(time.monotonic() - enqueued_at, delivered)
+
+    def _add(self, subscriber: Subscriber):
+        self._groups.setdefault(subscriber.subscription, set()).add(subscriber)
+        self._subscriber_count += 1
+
+    def _remove(self, subscriber: Subscriber):
+        group = self._groups.get(subscriber.subscription)
+        if group is not None:
+            group.discard(subscriber)
+            if not group:
+                del self._groups[subscriber.subscription]
+        self._subscriber_count -= 1
+
+    def _resubscribe(self, subscriber: Subscriber, subscription: SubscriptionFilter):
+        self._remove(subscriber)
+        subscriber.subscription = subscription
+        self._add(subscriber)
+
+    async def serve(self, websocket, subscription: SubscriptionFilter):
+        """Atende um cliente já aceito até a desconexão
+
+        O cliente pode trocar o filtro enviando
+        {"subscribe": {"level": "...", "min_level": "...", "source": "...", "service": "..."}}.
+        """
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(websocket, subscription, self.max_queue, self.send_latency)
+        self._add(subscriber)
+        sender = asyncio.create_task(subscriber.sender())
+        try:
+            while True:
+                text = await websocket.receive_text()
+                if not text.startswith('{'):
+                    continue  # Keep alive
+                try:
+                    request = json_codec.loads(text)
+                    params = request.get("subscribe") if isinstance(request, dict) else None
+                    if params is None:
+                        continue
+                    self._resubscribe(subscriber, SubscriptionFilter.from_params(params))
+                    reply = {"type": "subscribed", "filters": subscriber.subscription.describe()}
+                except (ValueError, KeyError, AttributeError) as e:
+                    reply = {"type": "error", "detail": str(e)}
+                subscriber.push(json_codec.dumps(reply))
+        finally:
+            self._remove(subscriber)
+            sender.cancel()
+            self.disconnected_dropped += subscriber.dropped
+
+    def stats(self) -> Dict[str, Any]:
+        subscribers = [s for group in list(self._groups.values()) for s in list(group)]
+        return {
+            "subscribers": self._subscriber_count,
+            "distinct_filters": len(self._groups),
+            "published": self.published,
+            "queued": sum(len(s.queue) for s in subscribers),
+            "dropped": sum(s.dropped for s in subscribers) + self.disconnected_dropped,
+            "max_queue": self.max_queue,
+            "pending_batches": len(self._pending),
+            "backlog_dropped": self.backlog_dropped,
+            "backlog_dropped_batches": self.backlog_dropped_batches,
+            "max_pending": self.max_pending,
+        }
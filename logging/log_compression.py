@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+🗜️ Log Compression - Claude-20x
+Compressão de segmentos selados:
+- Codecs: gzip (stdlib) e zstd (`pip install zstandard`, opcional);
+  .jsonl.gz / .jsonl.zst
+- CompressionPool: poucas threads daemon comprimem cada segmento assim
+  que o writer o sela (zlib e zstd liberam o GIL durante a compressão)
+- open_segment abre qualquer segmento para leitura sequencial em bytes
+- .jsonl.gz em blocos: membros gzip independentes de ~256KB (cortados em
+  fim de linha) e um membro final vazio cujo campo FEXTRA guarda o índice
+  (offset comprimido, tamanho, offset descomprimido e faixa de timestamps
+  de cada bloco). Continua sendo um gzip válido (zcat, gzip.open); com o
+  índice, uma consulta por horário descomprime só os blocos da faixa
+"""
+
+import gzip
+import os
+import queue
+import re
+import struct
+import threading
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import json_codec
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from log_segments import ARCHIVE_SUFFIXES, plain_path
+
+CODECS = {"gzip": ".gz", "zstd": ".zst"}
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+_CHUNK_SIZE = 1024 * 1024
+
+BLOCK_SIZE = 256 * 1024
+INDEX_VERSION = 1
+_INDEX_MAGIC = b"CIDX"
+# Membro final: FEXTRA com o índice, bloco deflate vazio, CRC32 e ISIZE zerados
+_EMPTY_MEMBER_TAIL = b"\x03\x00" + b"\x00" * 8
+_MAX_EXTRA = 65535 - 4
+# Timestamp no início da linha (o writer grava timestamp como primeiro campo)
+_LINE_TIMESTAMP = re.compile(rb'^\{"timestamp":\s*"([^"]*)"', re.MULTILINE)
+# Bloco com linha sem timestamp legível: faixa aberta (nunca é pulado)
+_OPEN_RANGE = ("", "\uffff")
+
+# (offset comprimido, bytes comprimidos, offset descomprimido, bytes, menor timestamp, maior)
+Block = Tuple[int, int, int, int, str, str]
+
+
+def codec_available(codec: str) -> bool:
+    return codec == "gzip" or (codec == "zstd" and zstandard is not None)
+
+
+def open_segment(path: Path):
+    """Abre um segmento (.jsonl, .jsonl.gz ou .jsonl.zst) para leitura em bytes
+
+    Os objetos comprimidos aceitam seek() para frente (descomprimindo até
+    o offset), usado para retomar leituras.
+    """
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rb')
+    if path.suffix == '.zst':
+        if zstandard is None:
+            raise RuntimeError("Segmento .zst requer o pacote zstandard")
+        return zstandard.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def archive_path(path: Path, codec: str) -> Path:
+    """Caminho do segmento comprimido com o codec"""
+    return path.with_name(path.name + CODECS[codec])
+
+
+def _block_range(data: bytes) -> Tuple[str, str]:
+    """Menor e maior timestamp das linhas de um bloco (comparação de strings, como o filtro)"""
+    stamps = _LINE_TIMESTAMP.findall(data)
+    if not stamps or len(stamps) != data.count(b"\n") + (not data.endswith(b"\n")):
+        return _OPEN_RANGE
+    return min(stamps).decode("utf-8", "replace"), max(stamps).decode("utf-8", "replace")
+
+
+def _index_member(blocks: List[Block], size: int) -> Optional[bytes]:
+    """Membro gzip vazio com o índice no FEXTRA; None se o índice não cabe"""
+    packed = zlib.compress(json_codec.dumps_bytes({"v": INDEX_VERSION, "size": size, "blocks": blocks}))
+    payload = packed + struct.pack("<I", len(packed)) + _INDEX_MAGIC
+    if len(payload) > _MAX_EXTRA:
+        return None
+    extra = b"CI" + struct.pack("<H", len(payload)) + payload
+    # ID, CM=deflate, FLG=FEXTRA, MTIME=0, XFL=0, OS=desconhecido
+    return b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff" + struct.pack("<H", len(extra)) + extra + _EMPTY_MEMBER_TAIL
+
+
+def _write_blocks(f_in, raw, level: int, block_size: int):
+    """Escreve membros gzip independentes cortados em fim de linha, seguidos do índice"""
+    blocks: List[Block] = []
+    offset = 0
+    size = 0
+    pending = b""
+    while True:
+        chunk = f_in.read(block_size)
+        data = pending + chunk
+        if chunk:
+            cut = data.rfind(b"\n") + 1
+            if cut == 0:
+                pending = data  # Linha maior que o bloco: continua acumulando
+                continue
+            data, pending = data[:cut], data[cut:]
+        elif not data:
+            break
+        else:
+            pending = b""  # Linha final sem quebra vira o último bloco
+        member = gzip.compress(data, compresslevel=level, mtime=0)
+        raw.write(member)
+        blocks.append((offset, len(member), size, len(data), *_block_range(data)))
+        offset += len(member)
+        size += len(data)
+    footer = _index_member(blocks, size)
+    if footer is not None:
+        raw.write(footer)
+
+
+@lru_cache(maxsize=1024)
+def _cached_index(path: str, mtime_ns: int, file_size: int) -> Optional[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        if file_size < 18 + 18:
+            return None
+        f.seek(-18, os.SEEK_END)
+        tail = f.read(18)
+        if tail[8:] != _EMPTY_MEMBER_TAIL or tail[4:8] != _INDEX_MAGIC:
+            return None
+        packed_len = struct.unpack("<I", tail[:4])[0]
+        start = file_size - 18 - packed_len
+        if start < 16:
+            return None
+        f.seek(start - 16)
+        header = f.read(16 + packed_len)
+    if header[:4] != b"\x1f\x8b\x08\x04" or header[12:14] != b"CI":
+        return None
+    try:
+        index = json_codec.loads(zlib.decompress(header[16:]))
+    except (zlib.error, json_codec.JSONDecodeError):
+        return None
+    if not isinstance(index, dict) or index.get("v") != INDEX_VERSION:
+        return None
+    return index
+
+
+def read_archive_index(path: Path) -> Optional[Dict[str, Any]]:
+    """Índice de blocos de um .jsonl.gz ({"size", "blocks"}); None se não indexado"""
+    if path.suffix != '.gz':
+        return None
+    stat = path.stat()
+    return _cached_index(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def read_block(f, block: Block) -> bytes:
+    """Descomprime um bloco a partir do arquivo aberto em modo binário"""
+    f.seek(block[0])
+    return zlib.decompress(f.read(block[1]), wbits=31)
+
+
+def archive_size(path: Path) -> int:
+    """Tamanho descomprimido de um .jsonl.gz: pelo índice ou pelo ISIZE (módulo 2**32)"""
+    index = read_archive_index(path)
+    if index is not None:
+        return index["size"]
+    with open(path, 'rb') as f:
+        f.seek(-4, os.SEEK_END)
+        return int.from_bytes(f.read(4), 'little')
+
+
+def compress_file(source: Path, codec: str = "gzip", level: Optional[int] = None) -> Path:
+    """Comprime `source` em um arquivo temporário e o publica com rename atômico
+
+    gzip grava o formato em blocos com índice; zstd, um frame único. O
+    original não é removido: quem chama decide (depois de invalidar caches).
+    """
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    target = archive_path(source, codec)
+    temp = target.with_name(target.name + '.tmp')
+    try:
+        with open(source, 'rb') as f_in, open(temp, 'wb') as raw:
+            if codec == "zstd":
+                with zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=False) as f_out:
+                    while chunk := f_in.read(_CHUNK_SIZE):
+                        f_out.write(chunk)
+            else:
+                _write_blocks(f_in, raw, level, BLOCK_SIZE)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(temp, target)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    return target
+
+
+class CompressionPool:
+    """
+    🗜️ Pool de compressão para segmentos selados
+
+    submit() só enfileira (chamado pelo writer ao selar um segmento);
+    cada worker chama `before(segmento)` (fechar handles), comprime,
+    remove o original e chama `after(segmento, comprimido)` (invalidar
+    caches). Um segmento já na fila ou em compressão não é enfileirado
+    de novo. Se o comprimido já existe (queda entre o rename e a remoção),
+    só o original é removido: o writer nunca estende um segmento que tem
+    versão comprimida.
+    """
+
+    def __init__(self, workers: int = 2, codec: str = "gzip", level: Optional[int] = None,
+                 before: Optional[Callable[[Path], Any]] = None,
+                 after: Optional[Callable[[Path, Path], Any]] = None,
+                 on_error: Optional[Callable[[Path, Exception], Any]] = None):
+        if codec not in CODECS:
+            raise ValueError(f"codec deve ser um de {tuple(CODECS)}")
+        if not codec_available(codec):
+            raise ValueError(f"codec {codec} indisponível (instale o pacote zstandard)")
+        self.workers = max(1, workers)
+        self.codec = codec
+        self.level = DEFAULT_LEVELS[codec] if level is None else level
+        self.before = before
+        self.after = after
+        self.on_error = on_error
+        self._queue: "queue.Queue[Path]" = queue.Queue()
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._threads = []
+        self.counters = {"compressed": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def start(self):
+        """Cria as threads (idempotente)"""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, daemon=True, name=f"LogCompressor-{i}")
+            thread.start()
+            self._threads.append(thread)
+
+    @staticmethod
+    def cleanup(logs_dir: Path):
+        """Remove temporários de compressões interrompidas"""
+        for temp in logs_dir.glob("central-*.jsonl.*.tmp"):
+            temp.unlink(missing_ok=True)
+
+    def submit(self, path: Path) -> bool:
+        """Enfileira um segmento selado; False se já comprimido ou pendente"""
+        path = plain_path(path)
+        with self._lock:
+            if path in self._pending or not path.exists():
+                return False
+            self._pending.add(path)
+        self._queue.put(path)
+        return True
+
+    def _worker(self):
+        while True:
+            path = self._queue.get()
+            try:
+                self._compress(path)
+            finally:
+                with self._lock:
+                    self._pending.discard(path)
+                    self._idle.notify_all()
+
+    def _compress(self, path: Path):
+        try:
+            existing = [path.with_name(path.name + suffix) for suffix in ARCHIVE_SUFFIXES]
+            existing = [archived for archived in existing if archived.exists()]
+            if self.before is not None:
+                self.before(path)
+            if existing:
+                target = existing[0]
+            else:
+                size = path.stat().st_size
+                target = compress_file(path, self.codec, self.level)
+                with self._lock:
+                    self.counters["compressed"] += 1
+                    self.counters["bytes_in"] += size
+                    self.counters["bytes_out"] += target.stat().st_size
+            path.unlink()
+            if self.after is not None:
+                self.after(path, target)
+        except FileNotFoundError:
+            pass  # Removido pela retenção enquanto esperava
+        except Exception as e:
+            with self._lock:
+                self.counters["failed"] += 1
+            if self.on_error is not None:
+                self.on_error(path, e)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a fila esvaziar (testes e encerramento)"""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._pending, timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counters,
+                "pending": len(self._pending),
+                "workers": self.workers,
+                "codec": self.codec,
+                "level": self.level,
+            }
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+🔍 Log Parsers - Claude-20x
+Interpretação de linhas de texto simples lidas pelos coletores:
+- Detecção de nível com tabela de padrões compilada por fonte
+- Padrões extras registráveis por fonte (LOGGER_LEVEL_PATTERNS)
+- Detecção em lote para os blocos de linhas do tailer
+- Parsers estruturados por fonte e por glob de arquivo, que extraem
+  timestamp original, nível, logger e trace_id uma única vez na ingestão
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from log_schema import LogLevel, LogSource
+
+
+# Ordem de prioridade: CRITICAL > ERROR > WARNING > DEBUG > INFO (padrão)
+LEVEL_PRIORITY: Tuple[LogLevel, ...] = (
+    LogLevel.CRITICAL, LogLevel.ERROR, LogLevel.WARNING, LogLevel.DEBUG
+)
+
+DEFAULT_LEVEL_PATTERNS: Dict[LogLevel, Tuple[str, ...]] = {
+    LogLevel.CRITICAL: ('CRITICAL', 'FATAL', 'CRITICO', 'PANIC', 'EMERGENCY'),
+    LogLevel.ERROR: ('ERROR', 'ERRO', 'EXCEPTION', 'FAILED', 'FAILURE', 'TRACEBACK'),
+    LogLevel.WARNING: ('WARNING', 'WARN', 'AVISO', 'DEPRECATED', 'ALERT'),
+    LogLevel.DEBUG: ('DEBUG', 'TRACE', 'VERBOSE'),
+}
+
+# Chave de LOGGER_LEVEL_PATTERNS que vale para todas as fontes
+ALL_SOURCES = "*"
+
+LevelTable = Tuple[Tuple[str, LogLevel], ...]
+
+
+def compile_level_table(patterns: Dict[LogLevel, Iterable[str]]) -> LevelTable:
+    """Compila padrões em uma tabela única (padrão, nível) em ordem de prioridade
+
+    Padrões redundantes são removidos: se um padrão de prioridade igual ou
+    maior está contido em outro, o maior nunca decide o resultado
+    (ex.: 'ERRO' cobre 'ERROR', 'WARN' cobre 'WARNING'). 'TRACE' (DEBUG)
+    não remove 'TRACEBACK' (ERROR), que tem prioridade maior.
+    """
+    ordered: List[Tuple[str, LogLevel]] = []
+    seen = set()
+    for level in LEVEL_PRIORITY:
+        for pattern in patterns.get(level, ()):
+            pattern = pattern.upper()
+            if pattern and pattern not in seen:
+                seen.add(pattern)
+                ordered.append((pattern, level))
+
+    rank = {level: i for i, level in enumerate(LEVEL_PRIORITY)}
+    return tuple(
+        (pattern, level) for pattern, level in ordered
+        if not any(
+            other != pattern and other in pattern and rank[other_level] <= rank[level]
+            for other, other_level in ordered
+        )
+    )
+
+
+class LevelDetector:
+    """
+    🔍 Detector de nível para linhas de texto simples
+
+    Cada fonte usa uma tabela compilada uma única vez (padrões globais +
+    padrões registrados para a fonte). A linha é convertida para maiúsculas
+    uma vez e o primeiro padrão da tabela encontrado decide o nível, o que
+    preserva a ordem de prioridade original.
+
+    Uma regex de alternância com IGNORECASE foi medida 2x a 15x mais lenta
+    que as buscas de substring do CPython para linhas típicas, por isso a
+    tabela usa `in` em vez de `re`.
+    """
+
+    def __init__(self, patterns: Optional[Dict[LogLevel, Iterable[str]]] = None):
+        base = DEFAULT_LEVEL_PATTERNS if patterns is None else patterns
+        self._patterns: Dict[Optional[LogSource], Dict[LogLevel, List[str]]] = {
+            None: {level: list(base.get(level, ())) for level in LEVEL_PRIORITY}
+        }
+        self._tables: Dict[Optional[LogSource], LevelTable] = {}
+
+    def register(self, level: LogLevel, patterns: Iterable[str],
+                 source: Optional[LogSource] = None):
+        """Adiciona padrões a um nível; source=None vale para todas as fontes"""
+        if level not in LEVEL_PRIORITY:
+            raise ValueError(f"Nível {level.value} não aceita padrões (é o padrão)")
+        levels = self._patterns.setdefault(source, {lvl: [] for lvl in LEVEL_PRIORITY})
+        levels[level].extend(patterns)
+        self._tables.clear()  # Recompilar na próxima detecção
+
+    def load_config(self, raw: str):
+        """Carrega padrões extras do JSON de LOGGER_LEVEL_PATTERNS
+
+        Formato: {"ui": {"ERROR": ["UNCAUGHT"]}, "*": {"WARNING": ["RETRYING"]}}
+        """
+        if not raw or not raw.strip():
+            return
+        config = json.loads(raw)
+        if not isinstance(config, dict):
+            raise ValueError("LOGGER_LEVEL_PATTERNS deve ser um objeto JSON")
+        for source_key, levels in config.items():
+            source = None if source_key == ALL_SOURCES else LogSource(source_key)
+            for level_name, patterns in levels.items():
+                if isinstance(patterns, str):
+                    patterns = [patterns]
+                self.register(LogLevel(level_name.upper()), patterns, source)
+
+    def table(self, source: Optional[LogSource] = None) -> LevelTable:
+        """Tabela compilada da fonte (cache até o próximo register)"""
+        table = self._tables.get(source)
+        if table is None:
+            merged = {level: list(p) for level, p in self._patterns[None].items()}
+            if source is not None:
+                for level, extra in self._patterns.get(source, {}).items():
+                    merged[level].extend(extra)
+            table = self._tables[source] = compile_level_table(merged)
+        return table
+
+    def detect(self, line: str, source: Optional[LogSource] = None) -> LogLevel:
+        """Nível de uma linha; INFO quando nenhum padrão aparece"""
+        if not line:
+            return LogLevel.INFO
+        line_upper = line.upper()
+        for pattern, level in self.table(source):
+            if pattern in line_upper:
+                return level
+        return LogLevel.INFO
+
+    def detect_many(self, lines: List[str],
+                    source: Optional[LogSource] = None) -> List[LogLevel]:
+        """Nível de cada linha de um bloco (tabela resolvida uma vez por bloco)"""
+        table = self.table(source)
+        info = LogLevel.INFO
+        levels = []
+        append = levels.append
+        for line in lines:
+            line_upper = line.upper()
+            for pattern, level in table:
+                if pattern in line_upper:
+                    append(level)
+                    break
+            else:
+                append(info)
+        return levels
+
+
+# ---------- parsers estruturados ----------
+
+# Nomes de nível encontrados nos formatos conhecidos
+LEVEL_ALIASES: Dict[str, LogLevel] = {
+    "DEBUG": LogLevel.DEBUG, "TRACE": LogLevel.DEBUG, "VERBOSE": LogLevel.DEBUG,
+    "INFO": LogLevel.INFO, "NOTICE": LogLevel.INFO,
+    "WARN": LogLevel.WARNING, "WARNING": LogLevel.WARNING,
+    "ERR": LogLevel.ERROR, "ERROR": LogLevel.ERROR,
+    "CRITICAL": LogLevel.CRITICAL, "FATAL": LogLevel.CRITICAL,
+}
+
+_TIMESTAMP = r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+_LEVEL = r"(?i:DEBUG|TRACE|VERBOSE|INFO|NOTICE|WARN|WARNING|ERR|ERROR|CRITICAL|FATAL)"
+
+# trace_id=abc, trace-id: "abc", traceId=abc ou traceparent W3C (00-<trace>-<span>-01)
+_TRACE_ID = re.compile(
+    r"trace[_-]?id[\"']?\s*[=:]\s*[\"']?(?P<id>[0-9A-Za-z-]{8,64})"
+    r"|\b00-(?P<w3c>[0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}\b",
+    re.IGNORECASE
+)
+
+
+def normalize_timestamp(raw: str) -> Optional[str]:
+    """Converte o timestamp da linha para ISO 8601 em UTC
+
+    Timestamps sem fuso (ex.: asctime do `logging`) são interpretados no
+    horário local, como foram escritos. Retorna None se não for válido.
+    """
+    try:
+        parsed = datetime.fromisoformat(raw.replace(",", ".", 1))
+    except ValueError:
+        return None
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def extract_trace_id(text: str) -> Optional[str]:
+    """trace_id presente no texto, se houver"""
+    if "race" not in text and "RACE" not in text and "00-" not in text:
+        return None
+    match = _TRACE_ID.search(text)
+    if match is None:
+        return None
+    return match.group("id") or match.group("w3c")
+
+
+@dataclass
+class ParsedLine:
+    """Campos extraídos de uma linha de texto"""
+    parser: str
+    message: str
+    timestamp: Optional[str] = None  # ISO 8601 UTC; None = usar o horário de ingestão
+    level: Optional[LogLevel] = None
+    logger: Optional[str] = None
+    trace_id: Optional[str] = None
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+
+class LineParser:
+    """
+    📐 Parser de um formato de linha baseado em regex pré-compilada
+
+    Grupos nomeados reconhecidos: timestamp, level, logger, message.
+    Os demais grupos nomeados com valor viram `fields`.
+    """
+
+    _KNOWN_GROUPS = frozenset({"timestamp", "level", "logger", "message"})
+
+    def __init__(self, name: str, pattern: str, flags: int = 0):
+        self.name = name
+        self.regex: Pattern[str] = re.compile(pattern, flags)
+        if "message" not in self.regex.groupindex:
+            raise ValueError(f"Parser {name}: o padrão precisa do grupo 'message'")
+        self._extra_groups = tuple(
+            g for g in self.regex.groupindex if g not in self._KNOWN_GROUPS
+        )
+
+    def parse(self, line: str) -> Optional[ParsedLine]:
+        match = self.regex.match(line)
+        if match is None:
+            return None
+        groups = match.groupdict()
+        message = groups["message"] or ""
+
+        timestamp = None
+        if groups.get("timestamp"):
+            timestamp = normalize_timestamp(groups["timestamp"])
+            if timestamp is None:
+                return None
+
+        level = None
+        if groups.get("level"):
+            level = LEVEL_ALIASES.get(groups["level"].upper())
+
+        return ParsedLine(
+            parser=self.name,
+            message=message,
+            timestamp=timestamp,
+            level=level,
+            logger=groups.get("logger"),
+            trace_id=extract_trace_id(message),
+            fields={g: groups[g] for g in self._extra_groups if groups[g] is not None}
+        )
+
+
+# Formatos conhecidos do projeto
+PYTHON_LOGGING = LineParser(
+    "python_logging",
+    # %(asctime)s - %(name)s - %(levelname)s - [%(funcName)s:%(lineno)d - ]%(message)s
+    rf"(?P<timestamp>{_TIMESTAMP}) - (?P<logger>\S+) - (?P<level>{_LEVEL}) - "
+    r"(?:(?P<function>[\w<>.]+):(?P<line>\d+) - )?(?P<message>.*)\Z"
+)
+BRACKETED = LineParser(
+    "bracketed",
+    # [2025-08-14T07:04:55.051Z] [INFO] [componente] mensagem (nível e componente opcionais)
+    rf"\[(?P<timestamp>{_TIMESTAMP})\]\s*(?:\[?(?P<level>{_LEVEL})\]?:?\s+)?"
+    r"(?:\[(?P<logger>[^\]]+)\]\s*)?(?P<message>.*)\Z"
+)
+ISO_PREFIXED = LineParser(
+    "iso_prefixed",
+    # 2025-08-14T07:04:55Z INFO [componente] mensagem
+    rf"(?P<timestamp>{_TIMESTAMP})\s+\[?(?P<level>{_LEVEL})\]?:?\s+"
+    r"(?:\[(?P<logger>[^\]]+)\]\s*)?(?P<message>.*)\Z"
+)
+PYTHON_BASIC = LineParser(
+    "python_basic",
+    # basicConfig padrão (INFO:nome:mensagem) e uvicorn (INFO:     mensagem)
+    r"(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL):(?:(?P<logger>[\w.\-]+):|\s+)(?P<message>.*)\Z"
+)
+
+DEFAULT_PARSERS: Tuple[LineParser, ...] = (PYTHON_LOGGING, BRACKETED, ISO_PREFIXED, PYTHON_BASIC)
+
+
+class ParserChain:
+    """Parsers de um arquivo; o último que reconheceu uma linha é tentado primeiro"""
+
+    def __init__(self, parsers: Tuple[LineParser, ...]):
+        self.parsers = parsers
+        self._last: Optional[LineParser] = None
+
+    def parse(self, line: str) -> Optional[ParsedLine]:
+        last = self._last
+        if last is not None:
+            parsed = last.parse(line)
+            if parsed is not None:
+                return parsed
+        for parser in self.parsers:
+            if parser is not last:
+                parsed = parser.parse(line)
+                if parsed is not None:
+                    self._last = parser
+                    return parsed
+        return None
+
+
+class ParserRegistry:
+    """
+    🗂️ Registro de parsers por fonte e por glob de arquivo
+
+    Para cada arquivo a cadeia é: parsers dos globs que casam com o caminho,
+    depois os da fonte, depois os padrão. Linhas que nenhum parser reconhece
+    continuam como texto simples, com nível detectado pelo LevelDetector.
+
+    Os globs usam fnmatch sobre o caminho completo: `*` também atravessa
+    diretórios (ex.: "*/claude-flow*/*.log").
+    """
+
+    def __init__(self, level_detector: Optional[LevelDetector] = None,
+                 defaults: Tuple[LineParser, ...] = DEFAULT_PARSERS):
+        self.level_detector = level_detector or LevelDetector()
+        self.defaults = defaults
+        self._by_source: Dict[LogSource, List[LineParser]] = {}
+        self._by_glob: List[Tuple[str, LineParser]] = []
+        self._chains: Dict[Tuple[Optional[LogSource], str], ParserChain] = {}
+
+    def register(self, parser: LineParser, source: Optional[LogSource] = None,
+                 glob: Optional[str] = None):
+        """Registra um parser para uma fonte e/ou um glob de arquivo"""
+        if source is None and glob is None:
+            raise ValueError("Informe source ou glob")
+        if glob is not None:
+            self._by_glob.append((glob, parser))
+        if source is not None:
+            self._by_source.setdefault(source, []).append(parser)
+        self._chains.clear()
+
+    def chain_for(self, source: Optional[LogSource], file_path: str = "") -> ParserChain:
+        key = (source, file_path)
+        chain = self._chains.get(key)
+        if chain is None:
+            parsers: List[LineParser] = [p for g, p in self._by_glob if fnmatchcase(file_path, g)]
+            parsers.extend(self._by_source.get(source, ()))
+            parsers.extend(self.defaults)
+            unique = tuple(dict.fromkeys(parsers))
+            chain = self._chains[key] = ParserChain(unique)
+        return chain
+
+    def _text_line(self, line: str) -> ParsedLine:
+        return ParsedLine(parser="text", message=line, trace_id=extract_trace_id(line))
+
+    def parse_line(self, line: str, source: Optional[LogSource] = None,
+                   file_path: str = "") -> ParsedLine:
+        """Interpreta uma linha de texto (sempre retorna um resultado)"""
+        parsed = self.chain_for(source, file_path).parse(line) or self._text_line(line)
+        if parsed.level is None:
+            detect_on = parsed.message if parsed.parser != "text" else line
+            parsed.level = self.level_detector.detect(detect_on, source)
+        return parsed
+
+    def parse_block(self, lines: List[str], source: Optional[LogSource] = None,
+                    file_path: str = "") -> List[Optional[ParsedLine]]:
+        """Interpreta um bloco; linhas JSON ('{...') ficam como None para o chamador
+
+        Os níveis que o formato não informa são detectados em uma única
+        chamada a detect_many para o bloco inteiro.
+        """
+        chain = self.chain_for(source, file_path)
+        results: List[Optional[ParsedLine]] = []
+        undetected: List[ParsedLine] = []
+        for line in lines:
+            if line[:1] == "{":
+                results.append(None)
+                continue
+            parsed = chain.parse(line) or self._text_line(line)
+            if parsed.level is None:
+                undetected.append(parsed)
+            results.append(parsed)
+
+        if undetected:
+            levels = self.level_detector.detect_many([p.message for p in undetected], source)
+            for parsed, level in zip(undetected, levels):
+                parsed.level = level
+        return results
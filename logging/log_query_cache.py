@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+🗃️ Log Query Cache - Claude-20x
+Cache de resultados de /logs por segmento:
+- Chave: (segmento, filtros normalizados); limites de tempo que não
+  cortam o dia do segmento saem da chave
+- Segmentos são append-only: as primeiras N entradas que casam nunca
+  mudam, então um resultado guardado atende qualquer limite <= N e o
+  segmento aberto de hoje só é relido a partir do último offset
+- Validação por (device, inode) e tamanho; compressão e remoção
+  invalidam explicitamente
+- LRU com orçamento em bytes (estimado pelo tamanho das linhas)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from log_reader import SegmentScanner
+from log_segments import segment_date
+
+# Custo fixo estimado de um dict de entrada além dos bytes da linha
+ENTRY_OVERHEAD = 400
+
+CacheKey = Tuple[str, Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+@dataclass
+class CachedScan:
+    """Entradas que casam em um segmento, do início até `offset`"""
+    identity: Tuple[int, int]
+    offset: int = 0        # Posição de leitura (descomprimida se comprimido)
+    size: int = 0          # Tamanho do arquivo quando foi lido
+    exhausted: bool = False  # A última leitura chegou ao fim do que existia
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    cost: int = 0
+
+
+def effective_bounds(log_date: Optional[date], start_time: Optional[str],
+                     end_time: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Remove limites de tempo que não excluem nada do dia do segmento
+
+    Os timestamps de um segmento começam com a data dele, e o filtro
+    compara strings: start_time <= "AAAA-MM-DD" aceita o dia inteiro, assim
+    como um end_time de um dia posterior.
+    """
+    if log_date is None:
+        return start_time, end_time
+    day = log_date.isoformat()
+    if start_time is not None and start_time <= day:
+        start_time = None
+    if end_time is not None and end_time[:10] > day:
+        end_time = None
+    return start_time, end_time
+
+
+class QueryCache:
+    """
+    🗃️ Cache de consultas com invalidação por segmento
+
+    read() é chamado de threads (asyncio.to_thread); o lock protege só a
+    contabilidade. A leitura do disco acontece fora dele e o resultado só
+    é aplicado se ninguém avançou a mesma entrada nesse meio tempo.
+    Entradas devolvidas são compartilhadas com o cache: somente leitura.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[CacheKey, CachedScan]' = OrderedDict()
+        self._by_path: Dict[str, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.counters = {"hits": 0, "incremental": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _key(self, file_path: Path, scanner: SegmentScanner) -> CacheKey:
+        start_time, end_time = effective_bounds(segment_date(file_path),
+                                                scanner.start_time, scanner.end_time)
+        return (str(file_path), scanner.source, scanner.level, start_time, end_time)
+
+    def read(self, file_path: Path, scanner: SegmentScanner, limit: int) -> List[Dict[str, Any]]:
+        """Até `limit` entradas do segmento, do cache quando possível"""
+        if not self.enabled:
+            return scanner.scan(file_path, limit)
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            self.invalidate(file_path)
+            return []
+        identity = (stat.st_dev, stat.st_ino)
+        key = self._key(file_path, scanner)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.identity != identity or stat.st_size < entry.size):
+                self._drop_locked(key)  # Arquivo recriado ou truncado
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if len(entry.results) >= limit or (entry.exhausted and stat.st_size == entry.size):
+                    self.counters["hits"] += 1
+                    return entry.results[:limit]
+                # A lista só cresce: o prefixo conhecido continua válido fora do lock
+                prefix, offset, known = entry.results, entry.offset, len(entry.results)
+                self.counters["incremental"] += 1
+            else:
+                prefix, offset, known = [], 0, 0
+                self.counters["misses"] += 1
+
+        matched_bytes = scanner.stats["matched_bytes"]
+        new_results, new_offset = scanner.scan_from(file_path, limit - known, offset)
+        added_cost = scanner.stats["matched_bytes"] - matched_bytes + ENTRY_OVERHEAD * len(new_results)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and offset == 0:
+                entry = self._entries[key] = CachedScan(identity=identity)
+                self._by_path.setdefault(key[0], set()).add(key)
+            if entry is None or entry.offset != offset or entry.identity != identity:
+                # Outra thread avançou ou invalidou a entrada: resultado só desta consulta
+                return prefix[:known] + new_results
+            entry.results.extend(new_results)
+            entry.offset = new_offset
+            entry.size = stat.st_size
+            entry.exhausted = len(new_results) < limit - known
+            entry.cost += added_cost
+            self.bytes += added_cost
+            results = entry.results[:limit]
+            self._evict_locked()
+        return results
+
+    def _drop_locked(self, key: CacheKey):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.cost
+        keys = self._by_path.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_path[key[0]]
+
+    def _evict_locked(self):
+        while self.bytes > self.max_bytes and self._entries:
+            self._drop_locked(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def invalidate(self, file_path: Path):
+        """Descarta os resultados de um segmento (comprimido, removido ou reescrito)"""
+        with self._lock:
+            keys = list(self._by_path.get(str(file_path), ()))
+            for key in keys:
+                self._drop_locked(key)
+            if keys:
+                self.counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_path.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
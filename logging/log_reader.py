@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+🔎 Log Reader - Claude-20x
+Leitura de segmentos para o caminho de consulta:
+- .jsonl via mmap: o arquivo não é copiado para strings Python e o RSS
+  não cresce com o tamanho do segmento
+- Pré-filtros em bytes ("level":"ERROR", "source":"ui", faixa de
+  timestamp) antes de qualquer decode; só linhas candidatas viram dict
+- Com filtro de nível ou fonte, mmap.find salta direto para a próxima
+  ocorrência e as linhas sem ela nem são percorridas
+- .jsonl.gz / .jsonl.zst lidos em streaming, linha a linha, com os mesmos
+  pré-filtros
+- .jsonl.gz em blocos com índice: só os blocos cuja faixa de timestamps
+  cruza a consulta (e que ficam depois do offset) são descomprimidos
+- scan_from retoma de um offset e devolve onde parou (sempre em fim de
+  linha): uma linha final ainda sendo escrita não é consumida
+"""
+
+import mmap
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import json_codec
+from log_compression import open_segment, read_archive_index, read_block
+from log_segments import is_archived
+
+_TIMESTAMP_KEY = b'"timestamp":'
+
+
+def field_needles(name: str, value: str) -> Tuple[bytes, ...]:
+    """Formas em bytes de "name":"value" (compacta e com espaço, de segmentos antigos)"""
+    return (f'"{name}":"{value}"'.encode('utf-8'), f'"{name}": "{value}"'.encode('utf-8'))
+
+
+class SegmentScanner:
+    """
+    🔎 Consulta filtrada sobre segmentos JSONL
+
+    Os pré-filtros só descartam linhas que com certeza não casam (o
+    writer grava os campos de topo sem escapes); falsos positivos, como
+    um "level" dentro de metadata, são resolvidos pela checagem exata
+    depois do decode. Filtros de valor são os enums já convertidos
+    (LogSource.value, LogLevel.value); o filtro de tempo compara strings
+    ISO, como antes.
+    """
+
+    def __init__(self, source: Optional[str] = None, level: Optional[str] = None,
+                 start_time: Optional[str] = None, end_time: Optional[str] = None):
+        self.source = source
+        self.level = level
+        self.start_time = start_time
+        self.end_time = end_time
+        self._start = start_time.encode('utf-8') if start_time else None
+        self._end = end_time.encode('utf-8') if end_time else None
+
+        needles = []
+        if level:
+            needles.append(field_needles("level", level))
+        if source:
+            needles.append(field_needles("source", source))
+        # Nível costuma ser o filtro mais seletivo: vira a âncora do mmap.find
+        self._anchor: Optional[Tuple[bytes, ...]] = needles[0] if needles else None
+        self._checks = needles[1:]
+        self.stats = {"bytes": 0, "candidates": 0, "decoded": 0, "matched": 0, "matched_bytes": 0,
+                      "blocks_read": 0, "blocks_skipped": 0}
+
+    # ---------- filtros ----------
+
+    def _timestamp_in_range(self, line: bytes) -> bool:
+        """Compara o timestamp em bytes; sem timestamp legível a decisão fica para o decode"""
+        index = line.find(_TIMESTAMP_KEY)
+        if index == -1:
+            return True
+        start = line.find(b'"', index + len(_TIMESTAMP_KEY))
+        end = line.find(b'"', start + 1) if start != -1 else -1
+        if end == -1:
+            return True
+        timestamp = line[start + 1:end]
+        if self._start is not None and timestamp < self._start:
+            return False
+        if self._end is not None and timestamp > self._end:
+            return False
+        return True
+
+    def _consider(self, line, results: List[Dict[str, Any]], anchor_checked: bool):
+        stats = self.stats
+        stats["candidates"] += 1
+        if not anchor_checked and self._anchor is not None:
+            if not any(needle in line for needle in self._anchor):
+                return
+        for needles in self._checks:
+            if not any(needle in line for needle in needles):
+                return
+        if (self._start is not None or self._end is not None) and not self._timestamp_in_range(line):
+            return
+
+        stats["decoded"] += 1
+        try:
+            log_data = json_codec.loads(line)
+        except json_codec.JSONDecodeError:
+            return
+        if not isinstance(log_data, dict):
+            return
+
+        # Checagem exata (mesma semântica da leitura completa)
+        if self.source and log_data.get('source') != self.source:
+            return
+        if self.level and log_data.get('level') != self.level:
+            return
+        if self.start_time or self.end_time:
+            log_time = log_data.get('timestamp')
+            if log_time:
+                if self.start_time and log_time < self.start_time:
+                    return
+                if self.end_time and log_time > self.end_time:
+                    return
+        stats["matched"] += 1
+        stats["matched_bytes"] += len(line)
+        results.append(log_data)
+
+    # ---------- leitura ----------
+
+    def scan(self, file_path: Path, limit: int) -> List[Dict[str, Any]]:
+        """Até `limit` entradas do segmento que passam nos filtros, em ordem de escrita"""
+        return self.scan_from(file_path, limit)[0]
+
+    def scan_from(self, file_path: Path, limit: int, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Como scan(), a partir de `offset`; retorna (entradas, offset após a última linha lida)
+
+        Em segmentos comprimidos o offset é na forma descomprimida.
+        """
+        if limit <= 0:
+            return [], offset
+        if is_archived(file_path):
+            return self._scan_archive(file_path, limit, offset)
+        return self._scan_mmap(file_path, limit, offset)
+
+    def _block_in_range(self, block) -> bool:
+        if self.start_time is not None and block[5] < self.start_time:
+            return False
+        if self.end_time is not None and block[4] > self.end_time:
+            return False
+        return True
+
+    def _scan_blocks(self, file_path: Path, blocks, limit: int, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Lê só os blocos que cruzam o offset e a faixa de tempo; os demais são saltados"""
+        results: List[Dict[str, Any]] = []
+        stats = self.stats
+        with open(file_path, 'rb') as f:
+            for block in blocks:
+                block_start, block_end = block[2], block[2] + block[3]
+                if block_end <= offset:
+                    continue
+                if not self._block_in_range(block):
+                    stats["blocks_skipped"] += 1
+                    offset = block_end
+                    continue
+                data = read_block(f, block)
+                stats["blocks_read"] += 1
+                pos = offset - block_start
+                size = data.rfind(b'\n') + 1
+                if size <= pos:
+                    break  # Linha final incompleta
+                if self._anchor is None:
+                    end = self._scan_lines(data, pos, size, limit, results)
+                else:
+                    end = self._scan_anchored(data, pos, size, limit, results)
+                stats["bytes"] += end - pos
+                offset = block_start + end
+                if len(results) >= limit or size < len(data):
+                    break
+        return results, offset
+
+    def _scan_archive(self, file_path: Path, limit: int, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        index = read_archive_index(file_path)
+        if index is not None:
+            return self._scan_blocks(file_path, index["blocks"], limit, offset)
+        results: List[Dict[str, Any]] = []
+        with open_segment(file_path) as f:
+            if offset:
+                f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Linha final incompleta
+                offset += len(line)
+                self.stats["bytes"] += len(line)
+                self._consider(line, results, anchor_checked=False)
+                if len(results) >= limit:
+                    break
+        return results, offset
+
+    def _scan_mmap(self, file_path: Path, limit: int, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        results: List[Dict[str, Any]] = []
+        with open(file_path, 'rb') as f:
+            size = f.seek(0, 2)
+            if size <= offset:
+                return results, offset  # Nada novo (e mmap não aceita arquivo vazio)
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                # Só linhas completas: o writer pode estar no meio de um write
+                size = mm.rfind(b'\n', offset) + 1
+                if size <= offset:
+                    return results, offset
+                if self._anchor is None:
+                    pos = self._scan_lines(mm, offset, size, limit, results)
+                else:
+                    pos = self._scan_anchored(mm, offset, size, limit, results)
+        self.stats["bytes"] += pos - offset
+        return results, pos
+
+    def _scan_lines(self, mm, pos: int, size: int, limit: int, results: List[Dict[str, Any]]) -> int:
+        """Sem filtro de valor: percorre linha a linha (o limite encerra cedo)"""
+        while pos < size and len(results) < limit:
+            end = mm.find(b'\n', pos, size)
+            if end > pos:
+                self._consider(mm[pos:end], results, anchor_checked=True)
+            pos = end + 1
+        return pos
+
+    def _scan_anchored(self, mm, pos: int, size: int, limit: int, results: List[Dict[str, Any]]) -> int:
+        """Salta de ocorrência em ocorrência da âncora; só essas linhas são fatiadas"""
+        anchor = self._anchor
+        hits = [mm.find(needle, pos, size) for needle in anchor]
+        while len(results) < limit:
+            found = [hit for hit in hits if hit != -1]
+            if not found:
+                return size
+            hit = min(found)
+            start = mm.rfind(b'\n', pos, hit) + 1 or pos
+            end = mm.find(b'\n', hit, size)
+            self._consider(mm[start:end], results, anchor_checked=True)
+            pos = end + 1
+            hits = [hit if hit == -1 or hit >= pos else mm.find(needle, pos, size)
+                    for hit, needle in zip(hits, anchor)]
+        return pos
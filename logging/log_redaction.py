@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+🛡️ Log Redaction - Claude-20x
+Remoção de segredos antes de qualquer escrita em disco:
+- Regras de chave compiladas uma vez, com cache de decisão por nome de chave
+- Metadata aninhado (dicts e listas) percorrido com cópia sob demanda
+- Padrões de valor (senhas, tokens, JWT, chaves AWS/privadas) na mensagem
+  e em strings do metadata, testados só onde seus anchors aparecem
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+REDACTED = "[REDACTED]"
+
+# Substrings de nomes de chave cujo valor inteiro é mascarado
+DEFAULT_SENSITIVE_KEYS: Tuple[str, ...] = ('password', 'token', 'key', 'secret', 'auth')
+
+
+@dataclass(frozen=True)
+class ValueRule:
+    """Padrão de segredo em texto livre
+
+    anchors são substrings minúsculas onde um match pode começar: a regex só
+    é testada (com match) nessas posições, encontradas com str.find. Sem
+    anchors a regex varre o texto inteiro. O grupo `value` é o trecho
+    substituído por [REDACTED].
+    """
+    name: str
+    pattern: str
+    anchors: Tuple[str, ...] = ()
+    flags: int = 0
+
+
+DEFAULT_VALUE_RULES: Tuple[ValueRule, ...] = (
+    ValueRule("private_key",
+              r"(?P<value>-----BEGIN [A-Z ]*PRIVATE KEY-----.*?-----END [A-Z ]*PRIVATE KEY-----)",
+              ("-----begin",), re.DOTALL),
+    ValueRule("aws_access_key", r"(?P<value>(?:AKIA|ASIA)[0-9A-Z]{16})(?![0-9A-Z])", ("akia", "asia")),
+    ValueRule("jwt", r"(?P<value>eyJ[\w-]{5,}\.[\w-]{5,}\.[\w-]{5,})", ("eyj",)),
+    # password=..., token: "...", api_key=..., Authorization: Bearer ...
+    # (client_secret, access_token etc. casam a partir de secret/token)
+    ValueRule("key_value",
+              r"(?:passw(?:or)?d|pwd|secret|token|api[_-]?key|authorization|auth)"
+              r"[\"']?\s*[=:]\s*[\"']?(?P<value>(?:(?:bearer|basic)\s+)?[^\s\"',;&]+)",
+              ("passw", "pwd", "secret", "token", "api_key", "api-key", "apikey", "auth"),
+              re.IGNORECASE),
+    ValueRule("bearer", r"bearer\s+(?P<value>[\w\-.~+/]+=*)", ("bearer",), re.IGNORECASE),
+)
+
+
+class Redactor:
+    """
+    🛡️ Mascara segredos em entradas de log
+
+    Chaves cujo nome contém uma das substrings sensíveis têm o valor
+    substituído por [REDACTED] em qualquer nível de aninhamento (até
+    max_depth; o que passa disso é mascarado inteiro). A decisão
+    por nome de chave é calculada uma vez e guardada em cache. Strings
+    (mensagem e valores do metadata) passam pelas ValueRule: o texto é
+    convertido para minúsculas uma vez e cada regex só roda nas posições
+    dos seus anchors. O caso comum (nenhum anchor presente) custa um
+    lower() e algumas buscas de substring.
+
+    Estruturas sem segredos são devolvidas sem cópia.
+    """
+
+    def __init__(self, sensitive_keys: Iterable[str] = DEFAULT_SENSITIVE_KEYS,
+                 value_rules: Iterable[ValueRule] = DEFAULT_VALUE_RULES,
+                 max_depth: int = 8,
+                 max_cached_keys: int = 10000):
+        self.sensitive_keys = tuple(k.lower() for k in sensitive_keys if k)
+        self.value_rules = tuple(value_rules)
+        self._compiled: List[Tuple[Tuple[str, ...], Pattern[str]]] = [
+            (tuple(a.lower() for a in rule.anchors), re.compile(rule.pattern, rule.flags))
+            for rule in self.value_rules
+        ]
+        # Rejeição rápida: sem nenhum anchor no texto nenhuma regra ancorada casa
+        self._all_anchors = tuple(dict.fromkeys(a for anchors, _ in self._compiled for a in anchors))
+        self._has_unanchored = any(not anchors for anchors, _ in self._compiled)
+        self.max_depth = max_depth
+        self.max_cached_keys = max_cached_keys
+        self._key_cache: Dict[Any, bool] = {}
+        # Strings curtas se repetem muito (file_path, logger, parse_method...)
+        self._short_text_cache: Dict[str, str] = {}
+        # A mensagem costuma ser o mesmo objeto que metadata["raw_line"]
+        self._last_scan: Tuple[Optional[str], Optional[str]] = (None, None)
+
+    # ---------- chaves ----------
+
+    def is_sensitive_key(self, key: Any) -> bool:
+        decision = self._key_cache.get(key)
+        if decision is None:
+            lowered = (key if isinstance(key, str) else str(key)).lower()
+            decision = False
+            for sensitive in self.sensitive_keys:
+                if sensitive in lowered:
+                    decision = True
+                    break
+            if len(self._key_cache) < self.max_cached_keys:
+                self._key_cache[key] = decision
+        return decision
+
+    # ---------- valores ----------
+
+    # Strings até este tamanho têm o resultado guardado em cache
+    SHORT_TEXT = 64
+
+    def redact_text(self, text: str) -> str:
+        """Mascara segredos em texto livre (retorna o mesmo objeto se não houver)"""
+        if not self._compiled or not text:
+            return text
+        if len(text) > self.SHORT_TEXT:
+            last_text, last_result = self._last_scan
+            if text is last_text:
+                return last_result
+            result = self._scan_text(text)
+            self._last_scan = (text, result)
+            return result
+        cached = self._short_text_cache.get(text)
+        if cached is None:
+            cached = self._scan_text(text)
+            if len(self._short_text_cache) < self.max_cached_keys:
+                self._short_text_cache[text] = cached
+        return text if cached == text else cached
+
+    def _scan_text(self, text: str) -> str:
+        lowered = text.lower()
+        if not self._has_unanchored:
+            for anchor in self._all_anchors:
+                if anchor in lowered:
+                    break
+            else:
+                return text
+
+        # lower() pode mudar o tamanho (ex.: 'İ'); aí as posições não batem
+        aligned = len(lowered) == len(text)
+        spans = []
+        for anchors, regex in self._compiled:
+            if not anchors or not aligned:
+                spans.extend(m.span('value') for m in regex.finditer(text))
+                continue
+            for anchor in anchors:
+                position = lowered.find(anchor)
+                while position != -1:
+                    match = regex.match(text, position)
+                    if match is not None:
+                        spans.append(match.span('value'))
+                    position = lowered.find(anchor, position + 1)
+
+        if not spans:
+            return text
+        parts = []
+        cursor = 0
+        for start, end in sorted(spans):
+            if end <= cursor:
+                continue  # Já coberto por um trecho anterior
+            parts.append(text[cursor:max(start, cursor)])
+            parts.append(REDACTED)
+            cursor = end
+        parts.append(text[cursor:])
+        return ''.join(parts)
+
+    def _redact_value(self, value: Any, depth: int) -> Any:
+        if isinstance(value, str):
+            return self.redact_text(value)
+        if isinstance(value, dict):
+            return self.redact_mapping(value, depth + 1)
+        if isinstance(value, (list, tuple)):
+            return self._redact_sequence(value, depth + 1)
+        return value
+
+    def _redact_sequence(self, items, depth: int):
+        if depth > self.max_depth:
+            return REDACTED  # Não percorrido: mascarado inteiro (fail closed)
+        changed = None
+        for index, item in enumerate(items):
+            new = self._redact_value(item, depth)
+            if new is not item:
+                if changed is None:
+                    changed = list(items)
+                changed[index] = new
+        return items if changed is None else changed
+
+    def redact_mapping(self, mapping: Dict[Any, Any], depth: int = 0) -> Dict[Any, Any]:
+        """Mascara chaves sensíveis e segredos em valores, em todos os níveis
+
+        Subárvores além de max_depth viram [REDACTED] inteiras.
+        """
+        if depth > self.max_depth:
+            return REDACTED
+        changed = None
+        is_sensitive_key = self.is_sensitive_key
+        for key, value in mapping.items():
+            if is_sensitive_key(key):
+                new = REDACTED
+            else:
+                new = self._redact_value(value, depth)
+            if new is not value:
+                if changed is None:
+                    changed = {}
+                changed[key] = new
+        if changed is None:
+            return mapping
+        result = dict(mapping)
+        result.update(changed)
+        return result
+
+    @classmethod
+    def from_config(cls, extra_keys: str = "", scan_values: bool = True) -> 'Redactor':
+        """Redactor a partir de LOGGER_REDACT_KEYS (lista separada por vírgula) e LOGGER_REDACT_VALUES"""
+        keys = DEFAULT_SENSITIVE_KEYS + tuple(k.strip() for k in extra_keys.split(',') if k.strip())
+        return cls(sensitive_keys=keys, value_rules=DEFAULT_VALUE_RULES if scan_values else ())
+
+
+DEFAULT_REDACTOR = Redactor()
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+📊 Log Rollups - Claude-20x
+Contagens por minuto para consultas de agregação (/logs/aggregate):
+- Chave: (level, source, service) por minuto ("HH:MM") de cada dia
+- Dias abertos (ontem em diante, UTC): contados em memória pelo BatchWriter
+  a cada batch escrito, somados à leitura única do que já estava em disco
+  quando o processo subiu
+- Dias fechados: rollup persistido em logs/rollups/, construído dos
+  segmentos uma vez; se um segmento cresceu (entrada atrasada) só a cauda
+  a partir do offset guardado é lida
+- Agregações somam rollups por hora quando o intervalo permite, então a
+  janela de retenção inteira responde em milissegundos
+"""
+
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import json_codec
+from log_compression import archive_size, open_segment
+from log_schema import LogEntry
+from log_segments import SEGMENT_PATTERN, is_archived, list_segments, plain_path
+
+GROUP_FIELDS = ("level", "source", "service")
+MAX_BUCKETS = 10000
+ROLLUP_VERSION = 1
+
+RollupKey = Tuple[str, str, str]
+
+
+def _base_name(path: Path) -> str:
+    """Nome do segmento sem .gz/.zst: a compressão não muda o conteúdo descomprimido"""
+    return plain_path(path).name
+
+
+class DayRollup:
+    """Contagens de um dia por minuto e os offsets já lidos de cada segmento"""
+
+    def __init__(self, day: str):
+        self.day = day
+        self.minutes: Dict[str, Dict[RollupKey, int]] = {}
+        # nome base -> {"file": nome atual, "size": bytes em disco, "offset": descomprimido}
+        self.segments: Dict[str, Dict[str, Any]] = {}
+        self._hours: Optional[Dict[str, Dict[RollupKey, int]]] = None
+
+    def add(self, minute: str, key: RollupKey, count: int = 1):
+        counts = self.minutes.get(minute)
+        if counts is None:
+            counts = self.minutes[minute] = {}
+        counts[key] = counts.get(key, 0) + count
+        self._hours = None
+
+    def merge(self, other: 'DayRollup'):
+        for minute, counts in other.minutes.items():
+            for key, count in counts.items():
+                self.add(minute, key, count)
+
+    @property
+    def hours(self) -> Dict[str, Dict[RollupKey, int]]:
+        """Rollup por hora ("HH"), derivado dos minutos sob demanda"""
+        if self._hours is None:
+            hours: Dict[str, Dict[RollupKey, int]] = {}
+            for minute, counts in self.minutes.items():
+                target = hours.setdefault(minute[:2], {})
+                for key, count in counts.items():
+                    target[key] = target.get(key, 0) + count
+            self._hours = hours
+        return self._hours
+
+    def count_segment(self, path: Path, offset: int = 0, stop: Optional[int] = None) -> int:
+        """Conta as linhas completas de um segmento a partir de `offset` (até `stop`)
+
+        Retorna o offset após a última linha contada; em segmentos
+        comprimidos, na forma descomprimida.
+        """
+        with open_segment(path) as f:
+            if offset:
+                f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n') or (stop is not None and offset + len(line) > stop):
+                    break  # Linha final incompleta ou além do limite
+                offset += len(line)
+                try:
+                    log = json_codec.loads(line)
+                    timestamp = log['timestamp']
+                    key = (log['level'], log['source'], log['service'])
+                except (json_codec.JSONDecodeError, KeyError, TypeError):
+                    continue
+                if isinstance(timestamp, str) and timestamp[:10] == self.day:
+                    self.add(timestamp[11:16], key)
+        return offset
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": ROLLUP_VERSION,
+            "day": self.day,
+            "segments": self.segments,
+            "minutes": {minute: [[*key, count] for key, count in counts.items()]
+                        for minute, counts in self.minutes.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'DayRollup':
+        rollup = cls(data["day"])
+        rollup.segments = data.get("segments", {})
+        rollup.minutes = {minute: {(level, source, service): count
+                                   for level, source, service, count in rows}
+                          for minute, rows in data.get("minutes", {}).items()}
+        return rollup
+
+
+class RollupStore:
+    """
+    📊 Rollups por minuto de todos os dias com segmentos
+
+    record() roda no BatchWriter; aggregate() em threads da API. O lock
+    cobre os dias abertos e o cache de dias fechados; a leitura de disco
+    para um dia fechado acontece com o lock de construção (uma por vez).
+
+    Contagens de dias abertos são exatas sem coordenação com o writer:
+    os tamanhos dos segmentos são anotados na criação do store, antes de
+    qualquer escrita deste processo, e só esses bytes são lidos do disco;
+    o resto vem de record(). Quando o dia fecha, o rollup persistido
+    (construído dos segmentos) passa a valer e a contagem em memória sai.
+    """
+
+    def __init__(self, logs_dir: Path, max_cached_days: int = 400, now=None):
+        self.logs_dir = logs_dir
+        self.rollups_dir = logs_dir / "rollups"
+        self.max_cached_days = max_cached_days
+        self._now = now or (lambda: datetime.now(timezone.utc))
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._open: Dict[str, DayRollup] = {}
+        self._closed: 'OrderedDict[str, DayRollup]' = OrderedDict()
+        self.counters = {"recorded": 0, "built": 0, "tail_scans": 0, "loaded": 0}
+
+        # Bytes já em disco nos dias abertos: lidos uma vez, no primeiro uso
+        open_from = self.open_from()
+        self._baseline: Dict[str, Dict[Path, Optional[int]]] = defaultdict(dict)
+        open_days = {match.group(1) for match in map(SEGMENT_PATTERN.match,
+                                                     (path.name for path in logs_dir.glob("central-*.jsonl*")))
+                     if match and match.group(1) >= open_from}
+        for day in open_days:
+            for path in list_segments(logs_dir, date.fromisoformat(day)):
+                try:
+                    # Comprimido não cresce: lido até o fim
+                    self._baseline[day][path] = None if is_archived(path) else path.stat().st_size
+                except OSError:
+                    continue
+
+    def open_from(self) -> str:
+        """Primeiro dia ainda aberto: ontem (UTC) absorve atrasos da virada e fusos"""
+        return (self._now().date() - timedelta(days=1)).isoformat()
+
+    # ---------- escrita ----------
+
+    def record(self, entries: Iterable[LogEntry]):
+        """Conta entradas já escritas (chamado pelo BatchWriter após o write)"""
+        open_from = self.open_from()
+        recorded = 0
+        with self._lock:
+            for entry in entries:
+                day = entry.timestamp[:10]
+                if day < open_from:
+                    continue  # Dia fechado: o rollup lê a cauda do segmento
+                rollup = self._open.get(day)
+                if rollup is None:
+                    rollup = self._open[day] = DayRollup(day)
+                rollup.add(entry.timestamp[11:16], (entry.level.value, entry.source.value, entry.service))
+                recorded += 1
+            self.counters["recorded"] += recorded
+
+    # ---------- leitura ----------
+
+    def _open_day(self, day: str) -> DayRollup:
+        with self._build_lock:
+            baseline = self._baseline.pop(day, None)
+            if baseline:
+                # Contado fora do lock e somado depois: contagens são aditivas
+                counted = DayRollup(day)
+                for path, stop in baseline.items():
+                    try:
+                        counted.count_segment(path, stop=stop)
+                    except OSError:
+                        continue
+                with self._lock:
+                    self._open.setdefault(day, DayRollup(day)).merge(counted)
+        with self._lock:
+            return self._open.setdefault(day, DayRollup(day))
+
+    def _rollup_path(self, day: str) -> Path:
+        return self.rollups_dir / f"rollup-{day}.json"
+
+    def _load(self, day: str) -> Optional[DayRollup]:
+        try:
+            data = json_codec.loads(self._rollup_path(day).read_bytes())
+        except (OSError, json_codec.JSONDecodeError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != ROLLUP_VERSION:
+            return None
+        self.counters["loaded"] += 1
+        return DayRollup.from_json(data)
+
+    def _save(self, rollup: DayRollup):
+        self.rollups_dir.mkdir(parents=True, exist_ok=True)
+        path = self._rollup_path(rollup.day)
+        temp = path.with_suffix('.tmp')
+        temp.write_bytes(json_codec.dumps_bytes(rollup.to_json()))
+        os.replace(temp, path)
+
+    def _refresh(self, rollup: DayRollup, segments: List[Path]) -> bool:
+        """Lê o que os segmentos ganharam desde o rollup; True se algo mudou
+
+        A leitura vai para um rollup à parte, somado sob o lock: aggregate()
+        pode estar percorrendo o mesmo rollup.
+        """
+        delta = DayRollup(rollup.day)
+        updated = {}
+        for path in segments:
+            base = _base_name(path)
+            state = rollup.segments.get(base)
+            size = path.stat().st_size
+            if state is not None and state["file"] == path.name and state["size"] == size:
+                continue
+            offset = state["offset"] if state is not None else 0
+            # Só comprimido (mesmo tamanho descomprimido): nada novo para contar
+            if state is None or path.suffix != '.gz' or archive_size(path) % 2 ** 32 != offset % 2 ** 32:
+                if state is not None:
+                    self.counters["tail_scans"] += 1
+                offset = delta.count_segment(path, offset)
+            updated[base] = {"file": path.name, "size": size, "offset": offset}
+        if updated:
+            with self._lock:
+                rollup.merge(delta)
+                rollup.segments.update(updated)
+        return bool(updated)
+
+    def _closed_day(self, day: str) -> DayRollup:
+        segments = list_segments(self.logs_dir, date.fromisoformat(day))
+        with self._build_lock:
+            if not segments:
+                self._drop(day)  # Sem dados ou segmentos removidos (retenção)
+                return DayRollup(day)
+            with self._lock:
+                rollup = self._closed.get(day)
+                if rollup is not None:
+                    self._closed.move_to_end(day)
+            if rollup is None:
+                rollup = self._load(day)
+            if rollup is None:
+                rollup = DayRollup(day)
+                self.counters["built"] += 1
+            if self._refresh(rollup, segments):
+                self._save(rollup)
+            with self._lock:
+                self._closed[day] = rollup
+                self._closed.move_to_end(day)
+                while len(self._closed) > self.max_cached_days:
+                    self._closed.popitem(last=False)
+            return rollup
+
+    def _drop(self, day: str):
+        with self._lock:
+            self._closed.pop(day, None)
+        try:
+            self._rollup_path(day).unlink()
+        except FileNotFoundError:
+            pass
+
+    def day_rollup(self, day: str) -> DayRollup:
+        """Rollup de um dia; o retornado não deve ser modificado"""
+        if day >= self.open_from():
+            return self._open_day(day)
+        return self._closed_day(day)
+
+    def close_days(self):
+        """Persiste os dias que fecharam e libera a contagem em memória deles"""
+        open_from = self.open_from()
+        with self._lock:
+            closed = [day for day in self._open if day < open_from]
+        for day in closed:
+            self._closed_day(day)
+            with self._lock:
+                self._open.pop(day, None)
+
+    def forget(self, day: str):
+        """Descarta o rollup de um dia (segmentos removidos)"""
+        with self._build_lock:
+            self._drop(day)
+
+    # ---------- agregação ----------
+
+    def aggregate(self, start_time: Optional[str] = None, end_time: Optional[str] = None,
+                  group_by: Optional[str] = "level", interval: int = 60, top: int = 10,
+                  level: Optional[str] = None, source: Optional[str] = None,
+                  service: Optional[str] = None,
+                  start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
+        """Contagens totais, top-k e histograma por intervalo (em minutos)
+
+        Os limites de tempo valem no minuto: start_time/end_time são
+        truncados em "AAAA-MM-DDTHH:MM" e o minuto de cada limite entra.
+        """
+        if group_by is not None and group_by not in GROUP_FIELDS:
+            raise ValueError(f"group_by deve ser um de {GROUP_FIELDS}")
+        if interval < 1:
+            raise ValueError("interval deve ser >= 1 minuto")
+        if top < 1:
+            raise ValueError("top deve ser >= 1")
+        self.close_days()
+        today = self._now().date()
+        start_date = start_date or (date.fromisoformat(start_time[:10]) if start_time else today)
+        end_date = end_date or (date.fromisoformat(end_time[:10]) if end_time else today)
+        if ((end_date - start_date).days + 1) * 1440 // interval > MAX_BUCKETS:
+            raise ValueError(f"Intervalo pequeno demais: mais de {MAX_BUCKETS} buckets")
+        start_minute = start_time[:16].replace(' ', 'T') if start_time else None
+        end_minute = end_time[:16].replace(' ', 'T') if end_time else None
+        filters = [(i, value) for i, value in enumerate((level, source, service)) if value]
+        group_index = GROUP_FIELDS.index(group_by) if group_by else None
+
+        buckets: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # Poucas chaves distintas: filtro e grupo decididos uma vez por chave
+        groups: Dict[RollupKey, Optional[str]] = {}
+
+        def group_of(key: RollupKey) -> Optional[str]:
+            if any(key[i] != value for i, value in filters):
+                return None
+            return key[group_index] if group_index is not None else "total"
+
+        def accumulate(counts: Dict[RollupKey, int], bucket: int):
+            target = buckets[bucket]
+            for key, count in counts.items():
+                group = groups.get(key, "")
+                if group == "":
+                    group = groups[key] = group_of(key)
+                if group is not None:
+                    target[group] += count
+
+        current = start_date
+        while current <= end_date:
+            day = current.isoformat()
+            rollup = self.day_rollup(day)
+            day_start = current.toordinal() * 1440
+            lo = start_minute[11:] if start_minute and start_minute[:10] == day else None
+            hi = end_minute[11:] if end_minute and end_minute[:10] == day else None
+            # Horas inteiras dentro do intervalo vêm do rollup por hora; minutos
+            # só são percorridos nos dias das bordas
+            use_hours = interval % 60 == 0
+            with self._lock:
+                minutes = list(rollup.minutes.items()) if not use_hours or lo or hi else []
+                hours = list(rollup.hours.items()) if use_hours else []
+            if use_hours:
+                for hour, counts in hours:
+                    if (lo is None or lo <= f"{hour}:00") and (hi is None or hi >= f"{hour}:59"):
+                        index = day_start + int(hour) * 60
+                        accumulate(counts, index - index % interval)
+            for minute, counts in minutes:
+                if (lo is not None and minute < lo) or (hi is not None and minute > hi):
+                    continue
+                if use_hours and (lo is None or lo <= f"{minute[:2]}:00") and (hi is None or hi >= f"{minute[:2]}:59"):
+                    continue  # Já somado pela hora
+                index = day_start + int(minute[:2]) * 60 + int(minute[3:5])
+                accumulate(counts, index - index % interval)
+            current += timedelta(days=1)
+
+        histogram = []
+        totals: Dict[str, int] = defaultdict(int)
+        for index in sorted(buckets):
+            counts = buckets[index]
+            if not counts:
+                continue
+            for group, count in counts.items():
+                totals[group] += count
+            moment = datetime.fromordinal(index // 1440) + timedelta(minutes=index % 1440)
+            histogram.append({"time": moment.strftime("%Y-%m-%dT%H:%M"),
+                              "total": sum(counts.values()), "counts": dict(counts)})
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        return {
+            "total": sum(totals.values()),
+            "group_by": group_by,
+            "interval_minutes": interval,
+            "top": [{"key": key, "count": count} for key, count in ranked[:top]],
+            "histogram": histogram,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "open_days": len(self._open),
+            "cached_days": len(self._closed),
+        }
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+📏 Log Rules - Claude-20x
+Regras de alerta avaliadas incrementalmente sobre o fluxo de ingestão:
+- rate: contagem por fonte/serviço em janela deslizante acima de um limite
+- pattern: mensagens que casam um texto/regex, com limite e janela
+- absence: "nenhum log do serviço X há N minutos"
+Estado por chave em contadores de ring buffer (memória constante), no
+lugar de cron jobs que relêem os arquivos diários via /logs.
+Janelas no tempo do evento: cada entrada conta no instante do seu
+timestamp (limitado ao relógio de parede, para que um relógio adiantado
+não conte no futuro) e os ticks usam o relógio de parede. Um backfill
+mais antigo que a janela não dispara taxa; entradas atrasadas ainda
+dentro da janela contam normalmente, e uma ausência só resolve com um
+log mais novo que o último visto.
+"""
+
+import json
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Pattern, Set, Tuple
+
+from log_schema import LogEntry, LogLevel, SubscriptionFilter
+from log_windows import SlidingWindowCounter
+
+# Chave de agrupamento: valores dos campos de group_by, na ordem
+GroupKey = Tuple[str, ...]
+Emit = Callable[[Dict[str, Any], float], None]
+
+GROUP_FIELDS = ("source", "service")
+# Buckets por janela: resolução de window/60 com mínimo de 1s
+BUCKETS_PER_WINDOW = 60
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Rule:
+    """Base das regras: escopo (nível/fonte/serviço) e formato do alerta"""
+
+    kind = ""
+
+    def __init__(self, name: str, scope: SubscriptionFilter,
+                 severity: LogLevel = LogLevel.ERROR, description: str = ""):
+        self.name = name
+        self.scope = scope
+        self.severity = severity
+        self.description = description
+        self.fired = 0
+
+    def matches(self, entry: LogEntry) -> bool:
+        return self.scope.matches(entry)
+
+    def record(self, entry: LogEntry, now: float):
+        raise NotImplementedError
+
+    def tick(self, now: float, emit: Emit):
+        raise NotImplementedError
+
+    def _alert(self, state: str, message: str, **fields) -> Dict[str, Any]:
+        if state == "firing":
+            self.fired += 1
+        return {
+            "type": "rule",
+            "rule": self.name,
+            "rule_type": self.kind,
+            "state": state,
+            "timestamp": _now_iso(),
+            "level": self.severity.value,
+            "message": message,
+            **fields,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"type": self.kind, "fired": self.fired}
+
+
+class WindowRule(Rule):
+    """
+    Conta entradas do escopo por chave (group_by) numa janela deslizante
+
+    A regra dispara quando a contagem da chave atinge `threshold` e volta
+    a ficar armada (com alerta "resolved") quando cai abaixo dele. Só chaves
+    tocadas desde o último tick podem cruzar o limite, então o tick não
+    percorre todas as chaves; chaves ociosas são removidas a cada janela.
+    """
+
+    kind = "rate"
+
+    def __init__(self, name: str, scope: SubscriptionFilter, threshold: int,
+                 window_seconds: float = 300.0,
+                 group_by: Iterable[str] = ("service",),
+                 max_keys: int = 1000, **kwargs):
+        super().__init__(name, scope, **kwargs)
+        self.group_by = tuple(group_by)
+        for group_field in self.group_by:
+            if group_field not in GROUP_FIELDS:
+                raise ValueError(f"group_by inválido na regra {name}: {group_field}")
+        if threshold < 1:
+            raise ValueError(f"threshold da regra {name} deve ser >= 1")
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.bucket_seconds = max(1.0, window_seconds / BUCKETS_PER_WINDOW)
+        self.max_keys = max_keys
+        self._counters: 'OrderedDict[GroupKey, SlidingWindowCounter]' = OrderedDict()
+        self._touched: Set[GroupKey] = set()
+        self._firing: Set[GroupKey] = set()
+        self._next_sweep: Optional[float] = None
+        self.evicted = 0
+
+    def _key(self, entry: LogEntry) -> GroupKey:
+        return tuple(entry.source.value if f == "source" else entry.service for f in self.group_by)
+
+    def record(self, entry: LogEntry, now: float):
+        key = self._key(entry)
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.max_keys:
+                evicted, _ = self._counters.popitem(last=False)
+                self._touched.discard(evicted)
+                self._firing.discard(evicted)
+                self.evicted += 1
+            counter = self._counters[key] = SlidingWindowCounter(self.window_seconds, self.bucket_seconds)
+        counter.add(1, now)
+        self._touched.add(key)
+
+    def tick(self, now: float, emit: Emit):
+        counters = self._counters
+        for key in self._touched:
+            counter = counters.get(key)
+            if counter is None or key in self._firing:
+                continue
+            count = counter.total(now)
+            if count >= self.threshold:
+                self._firing.add(key)
+                emit(self._window_alert("firing", key, count), now)
+        self._touched.clear()
+
+        for key in list(self._firing):
+            count = counters[key].total(now)
+            if count < self.threshold:
+                self._firing.discard(key)
+                emit(self._window_alert("resolved", key, count), now)
+
+        if self._next_sweep is None:
+            self._next_sweep = now + self.window_seconds
+        elif now >= self._next_sweep:
+            self._next_sweep = now + self.window_seconds
+            for key in [k for k, c in counters.items() if k not in self._firing and not c.total(now)]:
+                del counters[key]
+
+    def _window_alert(self, state: str, key: GroupKey, count: int) -> Dict[str, Any]:
+        labels = dict(zip(self.group_by, key))
+        scope = ", ".join(f"{k}={v}" for k, v in labels.items()) or "total"
+        message = self.description or (
+            f"{count} ocorrências em {self.window_seconds:g}s ({scope}); limite {self.threshold}"
+        )
+        return self._alert(state, message, count=count, threshold=self.threshold,
+                           window_seconds=self.window_seconds,
+                           rate_per_second=round(count / self.window_seconds, 3), **labels)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "keys": len(self._counters),
+                "firing": len(self._firing), "evicted": self.evicted}
+
+
+class PatternRule(WindowRule):
+    """
+    WindowRule restrita a mensagens com um texto (`contains`) e/ou regex
+
+    `contains` é testado com `in` antes da regex: em CPython uma busca de
+    substring custa uma fração de um re.search, e a maioria das linhas é
+    descartada aí.
+    """
+
+    kind = "pattern"
+
+    def __init__(self, name: str, scope: SubscriptionFilter, threshold: int = 1,
+                 window_seconds: float = 60.0, group_by: Iterable[str] = (),
+                 contains: Optional[str] = None, pattern: Optional[str] = None,
+                 ignore_case: bool = False, **kwargs):
+        if not contains and not pattern:
+            raise ValueError(f"Regra {name} precisa de 'contains' ou 'pattern'")
+        super().__init__(name, scope, threshold, window_seconds, group_by, **kwargs)
+        self.ignore_case = ignore_case
+        self.contains = (contains.lower() if ignore_case else contains) if contains else None
+        self.regex: Optional[Pattern[str]] = (
+            re.compile(pattern, re.IGNORECASE if ignore_case else 0) if pattern else None
+        )
+
+    def matches(self, entry: LogEntry) -> bool:
+        if not self.scope.matches(entry):
+            return False
+        message = entry.message
+        if self.contains is not None:
+            if (self.contains not in message.lower()) if self.ignore_case else (self.contains not in message):
+                return False
+        return self.regex is None or self.regex.search(message) is not None
+
+
+class AbsenceRule(Rule):
+    """
+    Dispara quando um serviço (ou fonte) do escopo fica `timeout` segundos
+    sem logs; resolve quando volta a logar. O relógio começa no primeiro
+    tick, então um serviço que nunca logou também dispara.
+    """
+
+    kind = "absence"
+
+    def __init__(self, name: str, scope: SubscriptionFilter, timeout_seconds: float,
+                 **kwargs):
+        if not scope.services and not scope.sources:
+            raise ValueError(f"Regra de ausência {name} precisa de 'service' ou 'source'")
+        super().__init__(name, scope, **kwargs)
+        self.timeout_seconds = timeout_seconds
+        self.by_service = bool(scope.services)
+        watched = scope.services if self.by_service else [s.value for s in scope.sources]
+        self._last_seen: Dict[str, Optional[float]] = dict.fromkeys(sorted(watched))
+        self._firing: Set[str] = set()
+
+    def record(self, entry: LogEntry, now: float):
+        watched = entry.service if self.by_service else entry.source.value
+        seen = self._last_seen.get(watched)
+        if seen is None or now > seen:  # Entrada atrasada não recua o relógio
+            self._last_seen[watched] = now
+
+    def tick(self, now: float, emit: Emit):
+        field = "service" if self.by_service else "source"
+        for watched, seen in self._last_seen.items():
+            if seen is None:
+                self._last_seen[watched] = seen = now
+            silent = now - seen
+            if silent >= self.timeout_seconds:
+                if watched not in self._firing:
+                    self._firing.add(watched)
+                    message = self.description or (
+                        f"Nenhum log de {field}={watched} há {silent / 60:.1f} min"
+                    )
+                    emit(self._alert("firing", message, silent_seconds=round(silent, 1),
+                                     timeout_seconds=self.timeout_seconds, **{field: watched}), now)
+            elif watched in self._firing:
+                self._firing.discard(watched)
+                emit(self._alert("resolved", f"{field}={watched} voltou a enviar logs",
+                                 timeout_seconds=self.timeout_seconds, **{field: watched}), now)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "watched": len(self._last_seen), "firing": len(self._firing)}
+
+
+def _window(spec: Mapping[str, Any], default_seconds: float) -> float:
+    if "minutes" in spec:
+        return float(spec["minutes"]) * 60
+    return float(spec.get("window", default_seconds))
+
+
+def _group_by(spec: Mapping[str, Any], default: Tuple[str, ...]) -> Tuple[str, ...]:
+    value = spec.get("group_by")
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return tuple(v.strip() for v in value.split(',') if v.strip())
+    return tuple(value)
+
+
+def rule_from_config(spec: Mapping[str, Any]) -> Rule:
+    """Cria uma regra a partir do dicionário de configuração
+
+    Campos comuns: name, type (rate|pattern|absence), level, min_level,
+    source, service (mesma sintaxe dos filtros do WebSocket), severity e
+    description. rate: threshold, window (s) ou minutes, group_by (padrão
+    service) e, sem level/min_level, conta só ERROR e CRITICAL. pattern:
+    contains e/ou pattern, ignore_case, threshold (padrão 1), window,
+    group_by (padrão nenhum). absence: minutes ou window, com service ou
+    source obrigatório.
+    """
+    name = spec.get("name")
+    if not name:
+        raise ValueError("Regra sem 'name'")
+    kind = spec.get("type", "rate")
+    params = dict(spec)
+    if kind == "rate" and not params.get("level") and not params.get("min_level"):
+        params["min_level"] = "ERROR"
+    scope = SubscriptionFilter.from_params(params)
+    common = {
+        "severity": LogLevel(str(spec.get("severity", "ERROR")).upper()),
+        "description": spec.get("description", ""),
+    }
+    if kind == "rate":
+        return WindowRule(name, scope, int(spec["threshold"]), _window(spec, 300.0),
+                          _group_by(spec, ("service",)), **common)
+    if kind == "pattern":
+        return PatternRule(name, scope, int(spec.get("threshold", 1)), _window(spec, 60.0),
+                           _group_by(spec, ()), contains=spec.get("contains"),
+                           pattern=spec.get("pattern"),
+                           ignore_case=bool(spec.get("ignore_case", False)), **common)
+    if kind == "absence":
+        return AbsenceRule(name, scope, _window(spec, 600.0), **common)
+    raise ValueError(f"Tipo de regra desconhecido: {kind}")
+
+
+class RuleEngine:
+    """
+    📏 Avalia regras sobre os lotes entregues ao AlertEngine
+
+    observe() roda na thread de alertas para cada lote: cada entrada é
+    testada contra o escopo de cada regra e só atualiza contadores. tick()
+    roda uma vez por ciclo e decide disparos/resoluções; os alertas passam
+    pelo mesmo limite de taxa e escrita em lote do AlertEngine.
+
+    O `now` monotônico do AlertEngine é ignorado: as regras registram cada
+    entrada no instante do seu timestamp (epoch) e os ticks usam `clock`
+    (relógio de parede). Entradas sem timestamp legível contam em clock().
+    """
+
+    def __init__(self, rules: Iterable[Rule] = (), clock: Callable[[], float] = time.time):
+        self.rules: List[Rule] = list(rules)
+        self.clock = clock
+        self._emit: Optional[Emit] = None
+        self.entries_evaluated = 0
+
+    def add(self, rule: Rule):
+        if any(r.name == rule.name for r in self.rules):
+            raise ValueError(f"Regra duplicada: {rule.name}")
+        self.rules.append(rule)
+
+    def attach(self, alert_engine):
+        """Pluga no AlertEngine como avaliador"""
+        self._emit = alert_engine.emit
+        alert_engine.add_evaluator(self)
+
+    def load_config(self, raw: str):
+        """Carrega regras de LOGGER_ALERT_RULES: lista JSON ou caminho de um arquivo JSON"""
+        if not raw or not raw.strip():
+            return
+        raw = raw.strip()
+        if not raw.startswith('['):
+            raw = Path(raw).read_text(encoding='utf-8')
+        specs = json.loads(raw)
+        if not isinstance(specs, list):
+            raise ValueError("LOGGER_ALERT_RULES deve ser uma lista JSON")
+        for spec in specs:
+            self.add(rule_from_config(spec))
+
+    def _event_time(self, entry: LogEntry, wall: float) -> float:
+        try:
+            moment = datetime.fromisoformat(entry.timestamp)
+        except (TypeError, ValueError):
+            return wall
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        # Timestamp no futuro (relógio do cliente adiantado) conta como agora
+        return min(moment.timestamp(), wall)
+
+    def observe(self, entries: List[LogEntry], now: Optional[float] = None):
+        rules = self.rules
+        if not rules:
+            return
+        wall = self.clock()
+        for entry in entries:
+            event_time = None  # Parse só se alguma regra casar
+            for rule in rules:
+                if rule.matches(entry):
+                    if event_time is None:
+                        event_time = self._event_time(entry, wall)
+                    rule.record(entry, event_time)
+        self.entries_evaluated += len(entries)
+
+    def tick(self, now: Optional[float] = None):
+        if self._emit is None:
+            return
+        wall = self.clock()
+        # O limite de taxa do AlertEngine segue no relógio dele (monotônico)
+        emit = self._emit
+        for rule in self.rules:
+            rule.tick(wall, lambda alert, _: emit(alert, now))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries_evaluated": self.entries_evaluated,
+            "rules": {rule.name: rule.stats() for rule in self.rules},
+        }
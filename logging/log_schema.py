@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+📐 Schema de Logs - Claude-20x
+Estrutura padronizada de entradas de log compartilhada entre o
+Central Logger e os clientes que enviam logs para ele, e o filtro por
+nível/fonte/serviço usado pelo WebSocket e pelas regras de alerta
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional
+
+from log_redaction import Redactor, DEFAULT_REDACTOR
+
+
+class LogLevel(Enum):
+    """Níveis de log padronizados"""
+    DEBUG = "DEBUG"
+    INFO = "INFO"
+    WARNING = "WARNING"
+    ERROR = "ERROR"
+    CRITICAL = "CRITICAL"
+
+
+class LogSource(Enum):
+    """Fontes de log identificadas na auditoria"""
+    UI = "ui"
+    AGENT_HELLOWORLD = "agent_helloworld"
+    MCP_SERVER = "mcp_server"
+    CLAUDE_FLOW = "claude_flow"
+    A2A_INSPECTOR = "a2a_inspector"
+    GENERAL = "general"
+
+
+MAX_STORED_MESSAGE = 10000
+
+
+@dataclass(slots=True)
+class LogEntry:
+    """Estrutura padronizada de log com validação
+
+    O construtor valida todos os campos e deve ser usado em fronteiras não
+    confiáveis (API, lotes recebidos, JSON de arquivos). Entradas geradas
+    internamente, com campos já garantidos, usam LogEntry.trusted().
+    """
+    timestamp: str
+    level: LogLevel
+    source: LogSource
+    service: str
+    message: str
+    metadata: Dict[str, Any]
+    trace_id: Optional[str] = None
+    session_id: Optional[str] = None
+    user_id: Optional[str] = None
+    
+    def __post_init__(self):
+        """Validação após inicialização"""
+        self._validate()
+    
+    def _validate(self):
+        """Valida campos obrigatórios e tipos"""
+        if not isinstance(self.message, str):
+            raise ValueError("Message deve ser string")
+        
+        if not self.message or self.message.isspace():
+            raise ValueError("Message não pode estar vazia")
+        
+        if not isinstance(self.service, str) or not self.service or self.service.isspace():
+            raise ValueError("Service deve ser string não vazia")
+        
+        if not isinstance(self.metadata, dict):
+            raise ValueError("Metadata deve ser dict")
+        
+        # Validar timestamp (fromisoformat aceita 'Z' desde o Python 3.11)
+        try:
+            datetime.fromisoformat(self.timestamp)
+        except (TypeError, ValueError):
+            raise ValueError("Timestamp deve estar em formato ISO")
+
+    @classmethod
+    def trusted(cls, timestamp: str, level: LogLevel, source: LogSource,
+                service: str, message: str, metadata: Dict[str, Any],
+                trace_id: Optional[str] = None, session_id: Optional[str] = None,
+                user_id: Optional[str] = None) -> 'LogEntry':
+        """Construtor sem validação para entradas geradas internamente
+
+        O chamador garante: timestamp de isoformat(), message e service não
+        vazios e metadata dict.
+        """
+        entry = _new_entry(cls)
+        entry.timestamp = timestamp
+        entry.level = level
+        entry.source = source
+        entry.service = service
+        entry.message = message
+        entry.metadata = metadata
+        entry.trace_id = trace_id
+        entry.session_id = session_id
+        entry.user_id = user_id
+        return entry
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict serializável (metadata é compartilhado, não copiado)"""
+        return {
+            'timestamp': self.timestamp,
+            'level': self.level.value,
+            'source': self.source.value,
+            'service': self.service,
+            'message': self.message,
+            'metadata': self.metadata,
+            'trace_id': self.trace_id,
+            'session_id': self.session_id,
+            'user_id': self.user_id
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], trusted: bool = False) -> 'LogEntry':
+        """Reconstrói uma entrada a partir do formato de armazenamento
+
+        trusted=True pula a validação para dados que o próprio logger gravou.
+        """
+        return (cls.trusted if trusted else cls)(
+            timestamp=data['timestamp'],
+            level=LogLevel(data['level']),
+            source=LogSource(data['source']),
+            service=data['service'],
+            message=data['message'],
+            metadata=data.get('metadata') or {},
+            trace_id=data.get('trace_id'),
+            session_id=data.get('session_id'),
+            user_id=data.get('user_id')
+        )
+
+    def sanitize_for_storage(self, redactor: Optional[Redactor] = None) -> Dict[str, Any]:
+        """Sanitiza dados para armazenamento seguro
+
+        Monta o dict final em uma passada; mensagem e metadata (em todos os
+        níveis) só são copiados quando algum segredo precisa ser mascarado.
+        """
+        redactor = redactor or DEFAULT_REDACTOR
+        message = self.message
+        if len(message) > MAX_STORED_MESSAGE:
+            message = message[:MAX_STORED_MESSAGE] + "... [TRUNCATED]"
+        message = redactor.redact_text(message)
+
+        # Remover dados sensíveis do metadata
+        metadata = self.metadata
+        if isinstance(metadata, dict):
+            metadata = redactor.redact_mapping(metadata)
+
+        return {
+            'timestamp': self.timestamp,
+            'level': self.level.value,
+            'source': self.source.value,
+            'service': self.service,
+            'message': message,
+            'metadata': metadata,
+            'trace_id': self.trace_id,
+            'session_id': self.session_id,
+            'user_id': self.user_id
+        }
+
+
+_new_entry = object.__new__
+
+
+LEVEL_ORDER: Dict[LogLevel, int] = {
+    LogLevel.DEBUG: 0, LogLevel.INFO: 1, LogLevel.WARNING: 2,
+    LogLevel.ERROR: 3, LogLevel.CRITICAL: 4,
+}
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in value.split(',') if v.strip()] if value else []
+
+
+@dataclass(frozen=True)
+class SubscriptionFilter:
+    """Filtro de uma assinatura; campos vazios aceitam tudo"""
+    levels: FrozenSet[LogLevel] = frozenset()
+    sources: FrozenSet[LogSource] = frozenset()
+    services: FrozenSet[str] = frozenset()
+
+    def matches(self, entry: LogEntry) -> bool:
+        return ((not self.levels or entry.level in self.levels) and
+                (not self.sources or entry.source in self.sources) and
+                (not self.services or entry.service in self.services))
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, Any]) -> 'SubscriptionFilter':
+        """Cria o filtro a partir de query params ou de uma mensagem do cliente
+
+        Aceita level (lista separada por vírgula), min_level, source e service.
+        Valores inválidos levantam ValueError.
+        """
+        levels = {LogLevel(v.upper()) for v in _split(params.get('level'))}
+        min_level = params.get('min_level')
+        if min_level:
+            threshold = LEVEL_ORDER[LogLevel(str(min_level).upper())]
+            at_least = {lvl for lvl, order in LEVEL_ORDER.items() if order >= threshold}
+            levels = (levels & at_least) if levels else at_least
+        sources = {LogSource(v.lower()) for v in _split(params.get('source'))}
+        return cls(
+            levels=frozenset(levels),
+            sources=frozenset(sources),
+            services=frozenset(_split(params.get('service')))
+        )
+
+    def describe(self) -> Dict[str, List[str]]:
+        return {
+            "level": sorted(l.value for l in self.levels),
+            "source": sorted(s.value for s in self.sources),
+            "service": sorted(self.services),
+        }
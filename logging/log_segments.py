@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+🗂️ Log Segments - Claude-20x
+Segmentos do Central Logger em disco:
+- Nomes: central-{data}.jsonl (writer no processo) e central-{data}.w{N}.jsonl
+  (writer de shard N no modo multi-processo); rotações dentro do dia ganham
+  um sequencial (central-{data}.{seq}.jsonl, central-{data}.w{N}.{seq}.jsonl)
+  e a compressão acrescenta .gz ou .zst
+- SegmentWriter: handles abertos entre batches, group commit e rotação
+  por tamanho (max_bytes) e idade (max_age); segmentos selados vão para
+  o callback on_seal (compressão)
+- Listagem dos segmentos de uma data para consultas e compressão
+"""
+
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import json_codec
+from log_redaction import Redactor, DEFAULT_REDACTOR
+from log_schema import LogEntry
+from profiler import SpanTracer
+
+# central-2025-01-01.jsonl, central-2025-01-01.w3.jsonl, central-2025-01-01.w3.2.jsonl,
+# ... (.gz ou .zst quando comprimido)
+SEGMENT_PATTERN = re.compile(
+    r"^central-(\d{4}-\d{2}-\d{2})(?:\.w(\d+))?(?:\.(\d+))?\.jsonl(\.gz|\.zst)?$"
+)
+ARCHIVE_SUFFIXES = (".gz", ".zst")
+
+# Segmento de um dia anterior sem writes há este tempo é selado no tick()
+IDLE_SEAL_SECONDS = 60.0
+
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024 ** 2, "MB": 1024 ** 2,
+               "G": 1024 ** 3, "GB": 1024 ** 3}
+
+
+def parse_size(value: str) -> int:
+    """"100MB" -> bytes (unidades binárias: B, KB, MB, GB); "0" desliga"""
+    match = re.match(r"^\s*(\d+(?:\.\d+)?)\s*([A-Za-z]*)\s*$", str(value))
+    if not match or match.group(2).upper() not in _SIZE_UNITS:
+        raise ValueError(f"Tamanho inválido: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def segment_name(log_date: str, shard: Optional[int] = None, seq: int = 0) -> str:
+    """Nome do segmento de uma data (YYYY-MM-DD), opcionalmente de um shard
+
+    O primeiro segmento do dia (seq 0) mantém o nome sem sequencial.
+    """
+    name = f"central-{log_date}" if shard is None else f"central-{log_date}.w{shard}"
+    return f"{name}.{seq}.jsonl" if seq else f"{name}.jsonl"
+
+
+def segment_date(path: Path) -> Optional[date]:
+    """Data de um segmento pelo nome; None se o arquivo não é um segmento"""
+    match = SEGMENT_PATTERN.match(path.name)
+    return datetime.strptime(match.group(1), "%Y-%m-%d").date() if match else None
+
+
+def segment_shard(path: Path) -> Optional[int]:
+    """Shard dono do segmento (None para o writer no processo)"""
+    match = SEGMENT_PATTERN.match(path.name)
+    return int(match.group(2)) if match and match.group(2) is not None else None
+
+
+def segment_seq(path: Path) -> int:
+    """Sequencial do segmento dentro do dia (0 para o primeiro)"""
+    match = SEGMENT_PATTERN.match(path.name)
+    return int(match.group(3)) if match and match.group(3) is not None else 0
+
+
+def is_archived(path: Path) -> bool:
+    return path.suffix in ARCHIVE_SUFFIXES
+
+
+def plain_path(path: Path) -> Path:
+    """Caminho do segmento sem a extensão de compressão"""
+    return path.with_suffix('') if is_archived(path) else path
+
+
+def list_segments(logs_dir: Path, log_date: date) -> List[Path]:
+    """Segmentos de uma data, em ordem de writer (processo, shards) e sequencial
+
+    Para cada segmento, o .jsonl tem preferência sobre a versão comprimida
+    (existem juntos só durante a compressão).
+    """
+    found: Dict[Tuple[int, int], Path] = {}
+    for path in logs_dir.glob(f"central-{log_date.isoformat()}*.jsonl*"):
+        match = SEGMENT_PATTERN.match(path.name)
+        if match is None:
+            continue
+        shard = int(match.group(2)) if match.group(2) is not None else -1
+        key = (shard, int(match.group(3) or 0))
+        if key not in found or not match.group(4):
+            found[key] = path
+    return [found[key] for key in sorted(found)]
+
+
+class FsyncPolicy(Enum):
+    """Políticas de durabilidade para o writer de segmentos"""
+    NONE = "none"          # Deixa o flush para o sistema operacional
+    BATCH = "batch"        # fsync após cada batch escrito
+    INTERVAL = "interval"  # fsync no máximo a cada fsync_interval segundos
+
+
+@dataclass
+class _OpenSegment:
+    """Segmento com handle aberto no writer"""
+    path: Path
+    handle: Any
+    size: int
+    opened_at: float
+    last_write: float
+
+
+class SegmentWriter:
+    """
+    ✍️ Writer de segmentos diários com group commit e rotação
+
+    Mantém os arquivos diários abertos entre batches, serializa o batch
+    inteiro em um único buffer e faz um único write por arquivo.
+
+    Com durable_latency, as marcas (quantidade, entrada na queue) de cada
+    batch ficam pendentes até o fsync que as cobre: BATCH registra no
+    próprio write, INTERVAL no próximo sync e NONE ao entregar ao sistema
+    operacional (a durabilidade fica com ele).
+
+    Rotação: quando o próximo write passaria de max_bytes, as linhas que
+    cabem vão para o segmento atual, ele é selado (fechado, nunca mais
+    estendido) e o restante continua no próximo sequencial do dia. O
+    mesmo vale para um segmento aberto há max_age segundos. tick() também
+    sela segmentos de dias anteriores (UTC) parados há IDLE_SEAL_SECONDS.
+    """
+
+    def __init__(self, logs_dir: Path,
+                 fsync_policy: FsyncPolicy = FsyncPolicy.NONE,
+                 fsync_interval: float = 1.0,
+                 max_open_files: int = 4,
+                 redactor: Optional[Redactor] = None,
+                 tracer: Optional[SpanTracer] = None,
+                 durable_latency=None,
+                 shard: Optional[int] = None,
+                 max_bytes: int = 0,
+                 max_age: float = 0.0,
+                 on_seal: Optional[Callable[[Path], Any]] = None):
+        self.logs_dir = logs_dir
+        self.shard = shard
+        self.redactor = redactor or DEFAULT_REDACTOR
+        self.tracer = tracer
+        self.durable_latency = durable_latency  # WindowedHistogram opcional (telemetry)
+        self._unsynced_marks: List[Tuple[int, float]] = []
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.max_open_files = max_open_files
+        self.max_bytes = max_bytes  # 0 = sem rotação por tamanho
+        self.max_age = max_age      # 0 = sem rotação por idade
+        self.on_seal = on_seal
+        self._handles: Dict[str, _OpenSegment] = {}
+        # data -> primeiro sequencial que ainda pode ser aberto (os anteriores foram selados)
+        self._next_seq: Dict[str, int] = {}
+        self._dirty: set = set()
+        self._last_fsync = time.monotonic()
+        self._lock = threading.Lock()
+        self.bytes_written = 0
+        self.sealed = 0
+
+    def segment_path(self, log_date: str) -> Path:
+        """Caminho do segmento atual para uma data (YYYY-MM-DD)"""
+        segment = self._handles.get(log_date)
+        return segment.path if segment is not None else self._locate(log_date)[0]
+
+    def _locate(self, log_date: str) -> Tuple[Path, int]:
+        """Segmento a estender para a data: o último deste writer, se ainda cabe
+
+        Um segmento com versão comprimida (ou em compressão) está selado.
+        """
+        first = self._next_seq.get(log_date, 0)
+        latest: Optional[Path] = None
+        for path in list_segments(self.logs_dir, date.fromisoformat(log_date)):
+            if segment_shard(path) == self.shard and segment_seq(path) >= first:
+                latest = path  # list_segments ordena por sequencial
+        if latest is None:
+            return self.logs_dir / segment_name(log_date, self.shard, first), 0
+        seq = segment_seq(latest)
+        sealed = is_archived(latest) or any(
+            latest.with_name(latest.name + suffix).exists() for suffix in ARCHIVE_SUFFIXES)
+        size = 0 if sealed else latest.stat().st_size
+        if sealed or (self.max_bytes and size >= self.max_bytes):
+            return self.logs_dir / segment_name(log_date, self.shard, seq + 1), 0
+        return latest, size
+
+    @staticmethod
+    def _entry_date(timestamp: str) -> str:
+        """Extrai a data de um timestamp ISO sem reparsear quando possível"""
+        if len(timestamp) >= 10 and timestamp[4] == '-' and timestamp[7] == '-':
+            return timestamp[:10]
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).date().isoformat()
+
+    def _get_handle(self, log_date: str) -> _OpenSegment:
+        segment = self._handles.get(log_date)
+        if segment is None:
+            # Fechar o segmento aberto há mais tempo se atingiu o limite
+            if len(self._handles) >= self.max_open_files:
+                oldest = min(self._handles)
+                self._close_handle(oldest)
+            path, size = self._locate(log_date)
+            now = time.monotonic()
+            segment = _OpenSegment(path, open(path, 'ab', buffering=0), size, now, now)
+            self._handles[log_date] = segment
+        return segment
+
+    def _close_handle(self, log_date: str):
+        segment = self._handles.pop(log_date, None)
+        if segment is None:
+            return
+        try:
+            if log_date in self._dirty and self.fsync_policy != FsyncPolicy.NONE:
+                os.fsync(segment.handle.fileno())
+        finally:
+            self._dirty.discard(log_date)
+            segment.handle.close()
+
+    def _mark_sealed(self, log_date: str, seq: int):
+        self._next_seq[log_date] = max(self._next_seq.get(log_date, 0), seq + 1)
+        if len(self._next_seq) > 64:
+            del self._next_seq[min(self._next_seq)]
+
+    def _seal_locked(self, log_date: str):
+        """Fecha o segmento atual da data para sempre e o entrega ao on_seal"""
+        segment = self._handles.get(log_date)
+        if segment is None:
+            return
+        self._close_handle(log_date)
+        self._mark_sealed(log_date, segment_seq(segment.path))
+        self.sealed += 1
+        if self.on_seal is not None:
+            self.on_seal(segment.path)
+
+    def _write_date_locked(self, log_date: str, data: bytes, now: float):
+        """Escreve as linhas de uma data, selando e seguindo no próximo segmento se não cabem
+
+        Cada segmento recebe um único write com as linhas inteiras que
+        couberem; uma linha maior que max_bytes ocupa um segmento sozinha.
+        """
+        segment = self._get_handle(log_date)
+        if self.max_age and segment.size and now - segment.opened_at >= self.max_age:
+            self._seal_locked(log_date)
+            segment = self._get_handle(log_date)
+        view = memoryview(data)
+        start = 0
+        while start < len(data):
+            end = len(data)
+            if self.max_bytes and segment.size + end - start > self.max_bytes:
+                room = self.max_bytes - segment.size
+                end = data.rfind(b'\n', start, start + max(room, 0)) + 1
+                if end <= start:
+                    if segment.size:
+                        self._seal_locked(log_date)
+                        segment = self._get_handle(log_date)
+                        continue
+                    end = data.find(b'\n', start) + 1  # Linha sozinha maior que o limite
+            self._write_all(segment.handle, view[start:end])
+            segment.size += end - start
+            segment.last_write = now
+            self._dirty.add(log_date)
+            start = end
+            if start < len(data):
+                self._seal_locked(log_date)
+                segment = self._get_handle(log_date)
+
+    @staticmethod
+    def _write_all(handle, data: bytes):
+        """Escreve o buffer completo (FileIO pode fazer writes parciais)"""
+        view = memoryview(data)
+        while view:
+            written = handle.write(view)
+            view = view[written:]
+
+    def write_batch(self, entries: List[LogEntry],
+                    marks: Sequence[Tuple[int, float]] = ()) -> int:
+        """Serializa e escreve um batch; retorna bytes escritos
+
+        marks: (quantidade, instante de entrada na queue) das entradas do batch
+        """
+        lines_by_date: Dict[str, List[str]] = defaultdict(list)
+        redactor = self.redactor
+        dumps = json_codec.dumps
+        tracer = self.tracer
+        started = tracer.start() if tracer is not None else 0.0
+        for log_entry in entries:
+            # Redação acontece na mesma passada da serialização
+            lines_by_date[self._entry_date(log_entry.timestamp)].append(
+                dumps(log_entry.sanitize_for_storage(redactor))
+            )
+        if started:
+            tracer.record("serialize", started, count=len(entries))
+            started = tracer.start()
+
+        total = 0
+        with self._lock:
+            now = time.monotonic()
+            for log_date, lines in lines_by_date.items():
+                lines.append('')
+                data = '\n'.join(lines).encode('utf-8')
+                self._write_date_locked(log_date, data, now)
+                total += len(data)
+
+            if marks and self.durable_latency is not None:
+                self._unsynced_marks.extend(marks)
+            if self.fsync_policy == FsyncPolicy.BATCH:
+                self._sync_locked()
+            elif self.fsync_policy == FsyncPolicy.INTERVAL:
+                self._maybe_sync_locked()
+            else:
+                self._release_marks_locked()
+
+        if started:
+            tracer.record("write", started, count=len(entries))
+        self.bytes_written += total
+        return total
+
+    def _sync_locked(self):
+        for log_date in list(self._dirty):
+            segment = self._handles.get(log_date)
+            if segment is not None:
+                os.fsync(segment.handle.fileno())
+        self._dirty.clear()
+        self._last_fsync = time.monotonic()
+        self._release_marks_locked()
+
+    def _release_marks_locked(self):
+        """Registra ingest_to_durable das entradas cobertas pelo último fsync"""
+        if not self._unsynced_marks:
+            return
+        now = time.monotonic()
+        durable_latency = self.durable_latency
+        for count, enqueued_at in self._unsynced_marks:
+            durable_latency.record(now - enqueued_at, count)
+        self._unsynced_marks.clear()
+
+    def _maybe_sync_locked(self):
+        if self._dirty and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._sync_locked()
+
+    def _seal_idle_locked(self):
+        """Sela segmentos vencidos por idade e os de dias anteriores já parados"""
+        now = time.monotonic()
+        today = datetime.now(timezone.utc).date().isoformat()
+        for log_date, segment in list(self._handles.items()):
+            expired = bool(self.max_age) and now - segment.opened_at >= self.max_age
+            finished = log_date < today and now - segment.last_write >= IDLE_SEAL_SECONDS
+            if expired or finished:
+                self._seal_locked(log_date)
+
+    def tick(self):
+        """Chamado periodicamente: política INTERVAL e rotação por tempo"""
+        with self._lock:
+            if self.fsync_policy == FsyncPolicy.INTERVAL:
+                self._maybe_sync_locked()
+            if self._handles:
+                self._seal_idle_locked()
+
+    def close_segment(self, log_file: Path):
+        """Fecha o handle de um segmento (ex.: antes de comprimir ou remover)
+
+        O segmento não volta a ser estendido: o próximo write da data abre
+        o sequencial seguinte.
+        """
+        with self._lock:
+            for log_date, segment in list(self._handles.items()):
+                if segment.path == log_file:
+                    self._close_handle(log_date)
+            log_date = segment_date(log_file)
+            if log_date is not None and segment_shard(log_file) == self.shard:
+                self._mark_sealed(log_date.isoformat(), segment_seq(log_file))
+
+    def close(self):
+        """Fecha todos os handles abertos"""
+        with self._lock:
+            for log_date in list(self._handles):
+                self._close_handle(log_date)
+            self._release_marks_locked()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+🧩 Log Shards - Claude-20x
+Writers em processos separados para fontes de alto volume:
+- O BatchWriter particiona cada batch por fonte ou serviço (hash estável)
+- Cada processo worker redige, serializa e escreve os próprios segmentos
+  (central-{data}.w{N}.jsonl), fora do GIL do processo principal
+- Transporte por Pipe: o lote vai como tuplas (pickle em C, ~1µs por
+  entrada contra ~4µs de redação + serialização que saem do processo)
+- Os workers respondem com os bytes escritos, as latências até o fsync e
+  os segmentos que selaram, então as métricas de durabilidade e a
+  compressão continuam no processo principal
+"""
+
+import multiprocessing
+import signal
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from log_redaction import Redactor
+from log_schema import LogEntry, LogSource
+from log_segments import FsyncPolicy, SegmentWriter, segment_shard
+from profiler import SpanTracer
+
+SHARD_KEYS = ("source", "service")
+
+# Falhas de transporte: o worker morreu ou o pipe foi fechado
+_PIPE_ERRORS = (EOFError, OSError, ValueError)
+
+
+class ShardWriteError(IOError):
+    """Falha em parte dos shards; `entries` contém só as entradas não escritas"""
+
+    def __init__(self, message: str, entries: List[LogEntry]):
+        super().__init__(message)
+        self.entries = entries
+
+
+class _LatencyOutbox:
+    """Coleta os record() do SegmentWriter no worker para devolver na resposta"""
+
+    def __init__(self):
+        self.pairs: List[Tuple[float, int]] = []
+
+    def record(self, value: float, count: int = 1):
+        self.pairs.append((value, count))
+
+    def drain(self) -> List[Tuple[float, int]]:
+        pairs, self.pairs = self.pairs, []
+        return pairs
+
+
+def _shard_worker(shard: int, conn, logs_dir: str, fsync_policy: str, fsync_interval: float,
+                  redact_keys: str, redact_values: bool, max_bytes: int = 0, max_age: float = 0.0):
+    """Loop do processo worker: uma resposta (status, valor, latências, selados) por comando"""
+    # Ctrl+C chega ao grupo inteiro; quem encerra os workers é o processo principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    durable = _LatencyOutbox()
+    sealed: List[str] = []
+    writer = SegmentWriter(
+        Path(logs_dir),
+        fsync_policy=FsyncPolicy(fsync_policy),
+        fsync_interval=fsync_interval,
+        redactor=Redactor.from_config(redact_keys, scan_values=redact_values),
+        durable_latency=durable,
+        shard=shard,
+        max_bytes=max_bytes,
+        max_age=max_age,
+        on_seal=lambda path: sealed.append(str(path))
+    )
+    trusted = LogEntry.trusted
+    while True:
+        try:
+            command, payload = conn.recv()
+        except EOFError:
+            break  # Processo principal encerrado
+        try:
+            if command == "write":
+                rows, marks = payload
+                reply = ("ok", writer.write_batch([trusted(*row) for row in rows], marks))
+            elif command == "tick":
+                writer.tick()
+                reply = ("ok", 0)
+            elif command == "close_segment":
+                writer.close_segment(Path(payload))
+                reply = ("ok", 0)
+            elif command == "stop":
+                writer.close()
+                reply = ("ok", 0)
+            else:
+                reply = ("error", f"Comando desconhecido: {command}")
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        conn.send((*reply, durable.drain(), sealed[:]))
+        sealed.clear()
+        if command == "stop":
+            break
+    writer.close()
+
+
+class ShardedWriter:
+    """
+    🧩 Writer multi-processo com a mesma interface do SegmentWriter
+
+    write_batch particiona o batch por shard_key, envia a partição de cada
+    shard antes de esperar qualquer resposta (os workers escrevem em
+    paralelo) e retorna quando todos confirmaram. Um shard que falha não
+    invalida os demais: ShardWriteError leva só as entradas daquele shard,
+    e um worker morto é recriado no próximo uso. Se o worker morrer depois
+    de escrever e antes de responder, o reenvio duplica o lote
+    (entrega pelo menos uma vez).
+
+    As marcas (quantidade, entrada na queue) seguem com cada partição; o
+    worker mede a latência até o fsync com time.monotonic, que no Linux é
+    o mesmo relógio para todos os processos.
+    """
+
+    def __init__(self, logs_dir: Path, processes: int,
+                 shard_key: str = "source",
+                 fsync_policy: FsyncPolicy = FsyncPolicy.NONE,
+                 fsync_interval: float = 1.0,
+                 redact_keys: str = "",
+                 redact_values: bool = True,
+                 tracer: Optional[SpanTracer] = None,
+                 durable_latency=None,
+                 max_bytes: int = 0,
+                 max_age: float = 0.0,
+                 on_seal: Optional[Callable[[Path], Any]] = None,
+                 start_method: str = "spawn"):
+        if processes < 1:
+            raise ValueError("processes deve ser >= 1")
+        if shard_key not in SHARD_KEYS:
+            raise ValueError(f"shard_key deve ser um de {SHARD_KEYS}")
+        self.logs_dir = logs_dir
+        self.processes = processes
+        self.shard_key = shard_key
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.redact_keys = redact_keys
+        self.redact_values = redact_values
+        self.tracer = tracer
+        self.durable_latency = durable_latency  # WindowedHistogram opcional (telemetry)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.on_seal = on_seal  # Recebe os segmentos selados pelos workers
+        self._context = multiprocessing.get_context(start_method)
+        self._workers: List[Optional[Tuple[Any, Any]]] = [None] * processes
+        self._shard_cache: Dict[str, int] = {}
+        self._source_shards = {source: i % processes for i, source in enumerate(LogSource)}
+        # BatchWriter e LogCompressor compartilham os pipes
+        self._lock = threading.Lock()
+        self.bytes_written = 0
+        self.restarts = 0
+        self.sealed = 0
+        self.shard_entries = [0] * processes
+
+    # ---------- processos ----------
+
+    def start(self):
+        """Cria os processos worker (idempotente)"""
+        with self._lock:
+            for shard in range(self.processes):
+                self._ensure(shard)
+
+    def _ensure(self, shard: int):
+        worker = self._workers[shard]
+        if worker is not None:
+            if worker[0].is_alive():
+                return worker[1]
+            worker[1].close()
+            self.restarts += 1
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_shard_worker,
+            args=(shard, child, str(self.logs_dir), self.fsync_policy.value, self.fsync_interval,
+                  self.redact_keys, self.redact_values, self.max_bytes, self.max_age),
+            daemon=True,
+            name=f"LogShardWriter-{shard}"
+        )
+        process.start()
+        child.close()
+        self._workers[shard] = (process, parent)
+        return parent
+
+    def _discard(self, shard: int):
+        """Abandona um worker com pipe quebrado; o próximo uso cria outro"""
+        worker = self._workers[shard]
+        if worker is not None:
+            worker[0].kill()
+            worker[0].join(timeout=1)
+
+    def _receive(self, shard: int) -> Tuple[str, Any]:
+        try:
+            status, value, durable, sealed = self._workers[shard][1].recv()
+        except _PIPE_ERRORS as e:
+            self._discard(shard)
+            return "error", f"Worker {shard} indisponível: {e}"
+        if durable and self.durable_latency is not None:
+            for latency, count in durable:
+                self.durable_latency.record(latency, count)
+        self.sealed += len(sealed)
+        if sealed and self.on_seal is not None:
+            for path in sealed:
+                self.on_seal(Path(path))
+        return status, value
+
+    def _broadcast_locked(self, command: str, payloads: Dict[int, Any]) -> Dict[int, Tuple[str, Any]]:
+        """Envia um comando a vários shards e só então coleta as respostas"""
+        results: Dict[int, Tuple[str, Any]] = {}
+        sent = []
+        for shard, payload in payloads.items():
+            try:
+                self._ensure(shard).send((command, payload))
+                sent.append(shard)
+            except _PIPE_ERRORS as e:
+                self._discard(shard)
+                results[shard] = ("error", f"Worker {shard} indisponível: {e}")
+        for shard in sent:
+            results[shard] = self._receive(shard)
+        return results
+
+    # ---------- particionamento ----------
+
+    def shard_of(self, entry: LogEntry) -> int:
+        """Shard estável da entrada
+
+        Fontes são um enum pequeno: distribuídas pela posição (round-robin),
+        já que um hash deixaria shards vazios. Serviços usam crc32.
+        """
+        if self.shard_key == "source":
+            return self._source_shards[entry.source]
+        value = entry.service
+        shard = self._shard_cache.get(value)
+        if shard is None:
+            shard = zlib.crc32(value.encode("utf-8")) % self.processes
+            if len(self._shard_cache) < 10000:  # Serviços são poucos; limitar por segurança
+                self._shard_cache[value] = shard
+        return shard
+
+    def _partition(self, entries: List[LogEntry], marks: Sequence[Tuple[int, float]]):
+        shard_entries: Dict[int, List[LogEntry]] = {}
+        shard_rows: Dict[int, List[tuple]] = {}
+        shard_marks: Dict[int, List[List[Any]]] = {}
+        stamps = iter([enqueued_at for count, enqueued_at in marks for _ in range(count)])
+        shard_of = self.shard_of
+        for entry in entries:
+            shard = shard_of(entry)
+            rows = shard_rows.get(shard)
+            if rows is None:
+                rows = shard_rows[shard] = []
+                shard_entries[shard] = []
+                shard_marks[shard] = []
+            shard_entries[shard].append(entry)
+            rows.append((entry.timestamp, entry.level, entry.source, entry.service, entry.message,
+                         entry.metadata, entry.trace_id, entry.session_id, entry.user_id))
+            enqueued_at = next(stamps, None)
+            if enqueued_at is not None:
+                runs = shard_marks[shard]
+                if runs and runs[-1][1] == enqueued_at:
+                    runs[-1][0] += 1
+                else:
+                    runs.append([1, enqueued_at])
+        return shard_entries, shard_rows, shard_marks
+
+    # ---------- interface do SegmentWriter ----------
+
+    def write_batch(self, entries: List[LogEntry],
+                    marks: Sequence[Tuple[int, float]] = ()) -> int:
+        """Particiona e escreve um batch nos workers; retorna bytes escritos"""
+        tracer = self.tracer
+        started = tracer.start() if tracer is not None else 0.0
+        shard_entries, shard_rows, shard_marks = self._partition(entries, marks)
+        payloads = {shard: (rows, [tuple(run) for run in shard_marks[shard]])
+                    for shard, rows in shard_rows.items()}
+        with self._lock:
+            results = self._broadcast_locked("write", payloads)
+
+        total = 0
+        failed: List[LogEntry] = []
+        errors = []
+        for shard, (status, value) in results.items():
+            if status == "ok":
+                total += value
+                self.shard_entries[shard] += len(shard_entries[shard])
+            else:
+                failed.extend(shard_entries[shard])
+                errors.append(f"shard {shard}: {value}")
+        self.bytes_written += total
+        if started:
+            tracer.record("write", started, count=len(entries))
+        if failed:
+            raise ShardWriteError("; ".join(errors), failed)
+        return total
+
+    def tick(self):
+        """Política INTERVAL e rotação por tempo nos workers; coleta latências e selados"""
+        with self._lock:
+            self._broadcast_locked("tick", {shard: None for shard in range(self.processes)
+                                            if self._workers[shard] is not None})
+
+    def close_segment(self, log_file: Path):
+        """Pede ao shard dono do segmento que feche o handle (ex.: antes de comprimir)"""
+        shard = segment_shard(log_file)
+        if shard is None or shard >= self.processes or self._workers[shard] is None:
+            return
+        with self._lock:
+            status, value = self._broadcast_locked("close_segment", {shard: str(log_file)})[shard]
+        if status != "ok":
+            raise IOError(value)
+
+    def close(self):
+        """Encerra os workers depois de fecharem (e sincronizarem) os segmentos"""
+        with self._lock:
+            running = {shard: None for shard, worker in enumerate(self._workers)
+                       if worker is not None and worker[0].is_alive()}
+            self._broadcast_locked("stop", running)
+            for shard, worker in enumerate(self._workers):
+                if worker is None:
+                    continue
+                process, conn = worker
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.kill()
+                conn.close()
+                self._workers[shard] = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "processes": self.processes,
+            "alive": sum(1 for worker in self._workers if worker is not None and worker[0].is_alive()),
+            "shard_key": self.shard_key,
+            "restarts": self.restarts,
+            "sealed": self.sealed,
+            "entries_by_shard": list(self.shard_entries),
+        }
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+🚚 Log Shipper - Claude-20x
+Handler de `logging` para serviços que enviam logs ao Central Logger:
+- Buffer em memória (emit não faz I/O)
+- Lotes NDJSON comprimidos com gzip para POST /logs/batch
+- Conexão HTTP keep-alive reutilizada entre lotes
+- Spool local quando o Central Logger está fora do ar, reenviado depois
+- Só 2xx conta como enviado: 413 divide o lote, outros 4xx e as linhas
+  recusadas pelo servidor entram em `rejected`
+
+Uso:
+    import logging
+    from log_shipper import CentralLogHandler
+
+    logging.getLogger().addHandler(
+        CentralLogHandler("http://localhost:8003", service="helloworld",
+                          source=LogSource.AGENT_HELLOWORLD)
+    )
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+import requests
+
+from log_schema import LogLevel, LogSource, LogEntry
+
+_log = logging.getLogger(__name__)
+
+
+# Atributos padrão de LogRecord; o restante vem de `extra=` e vira metadata
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+_ENTRY_FIELDS = ("trace_id", "session_id", "user_id")
+
+
+def _level_for(levelno: int) -> LogLevel:
+    """Mapeia níveis numéricos do `logging` para LogLevel"""
+    if levelno >= logging.CRITICAL:
+        return LogLevel.CRITICAL
+    if levelno >= logging.ERROR:
+        return LogLevel.ERROR
+    if levelno >= logging.WARNING:
+        return LogLevel.WARNING
+    if levelno >= logging.INFO:
+        return LogLevel.INFO
+    return LogLevel.DEBUG
+
+
+class CentralLogHandler(logging.Handler):
+    """
+    📤 Handler que envia registros ao Central Logger em background
+
+    emit() apenas formata o registro e o coloca no buffer; serialização,
+    compressão, rede e spool acontecem na thread LogShipper.
+    """
+
+    def __init__(self, url: str = "http://localhost:8003",
+                 service: str = "app",
+                 source: LogSource = LogSource.GENERAL,
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 max_buffer: int = 10000,
+                 spool_path: Optional[str] = None,
+                 spool_max_bytes: int = 64 * 1024 * 1024,
+                 compress: bool = True,
+                 timeout: float = 5.0,
+                 level: int = logging.NOTSET):
+        super().__init__(level)
+        self.endpoint = url.rstrip('/') + "/logs/batch"
+        self.service = service
+        self.source = source
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.timeout = timeout
+        self.spool_path = Path(spool_path) if spool_path else None
+        self.spool_max_bytes = spool_max_bytes
+
+        self._buffer: deque = deque()
+        self._max_buffer = max_buffer
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._io_lock = threading.Lock()
+        self._session = requests.Session()  # Keep-alive entre lotes
+        self._retry_at = 0.0
+        self._backoff = 1.0
+        self.stats: Dict[str, int] = {"sent": 0, "spooled": 0, "dropped": 0, "replayed": 0, "rejected": 0}
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name="LogShipper")
+        self._thread.start()
+
+    # ---------- caminho do serviço (sem I/O) ----------
+
+    def emit(self, record: logging.LogRecord):
+        # Ignorar logs gerados pelo próprio envio (urllib3, requests)
+        if threading.current_thread() is self._thread:
+            return
+        try:
+            if len(self._buffer) >= self._max_buffer:
+                self.stats["dropped"] += 1
+                return
+            self._buffer.append((record, self.format(record)))
+            if len(self._buffer) >= self.batch_size:
+                self._wake.set()
+        except Exception:
+            self.handleError(record)
+
+    # ---------- thread de envio ----------
+
+    def _to_payload(self, record: logging.LogRecord, message: str) -> Dict[str, Any]:
+        """Converte o registro para o schema LogEntry"""
+        extras = {k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRS}
+        metadata = {
+            "logger": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "pid": record.process,
+        }
+        metadata.update({k: v for k, v in extras.items() if k not in _ENTRY_FIELDS})
+
+        entry = LogEntry(
+            timestamp=datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            level=_level_for(record.levelno),
+            source=self.source,
+            service=self.service,
+            message=message or record.levelname,
+            metadata=metadata,
+            trace_id=extras.get("trace_id"),
+            session_id=extras.get("session_id"),
+            user_id=extras.get("user_id")
+        )
+        return entry.to_dict()
+
+    def _drain(self) -> List[Tuple[logging.LogRecord, str]]:
+        popleft = self._buffer.popleft
+        return [popleft() for _ in range(min(len(self._buffer), self.batch_size))]
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(timeout=self.flush_interval)
+            self._wake.clear()
+            try:
+                self._ship_pending()
+            except Exception:
+                pass  # Nunca derrubar o serviço por causa de logging
+
+    def _ship_pending(self):
+        with self._io_lock:
+            while self._buffer:
+                lines = []
+                for record, message in self._drain():
+                    try:
+                        lines.append(json.dumps(self._to_payload(record, message),
+                                                ensure_ascii=False, default=str))
+                    except (ValueError, TypeError):
+                        self.stats["dropped"] += 1
+                unsent = self._send(lines) if lines else []
+                if unsent:
+                    self._spool(unsent)
+            self._replay_spool()
+
+    def _send(self, lines: List[str], counter: str = "sent") -> List[str]:
+        """Envia um lote; retorna as linhas não entregues (Central Logger indisponível)
+
+        Linhas recusadas pelo servidor (4xx, sem sentido reenviar) contam
+        como resolvidas; um 413 divide o lote ao meio e envia cada parte.
+        """
+        if time.monotonic() < self._retry_at:
+            return lines
+
+        body = ('\n'.join(lines) + '\n').encode('utf-8')
+        headers = {"Content-Type": "application/x-ndjson"}
+        if self.compress:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+        try:
+            response = self._session.post(self.endpoint, data=body, headers=headers,
+                                          timeout=self.timeout)
+        except requests.RequestException:
+            response = None
+
+        status = response.status_code if response is not None else None
+        if status is None or status >= 500 or status == 429:
+            self._retry_at = time.monotonic() + self._backoff
+            self._backoff = min(self._backoff * 2, 30.0)
+            return lines
+        self._backoff = 1.0
+        self._retry_at = 0.0
+
+        if 200 <= status < 300:
+            self._count_accepted(response, lines, counter)
+            return []
+        if status == 413 and len(lines) > 1:
+            middle = len(lines) // 2
+            return self._send(lines[:middle], counter) + self._send(lines[middle:], counter)
+        self.stats["rejected"] += len(lines)
+        _log.warning("Central Logger recusou lote de %d linhas (HTTP %d): %s",
+                     len(lines), status, response.text[:200])
+        return []
+
+    def _count_accepted(self, response, lines: List[str], counter: str):
+        """Usa as contagens por linha da resposta (rejected/dropped) quando existem"""
+        try:
+            result = response.json()
+        except ValueError:
+            result = None
+        if not isinstance(result, dict):
+            self.stats[counter] += len(lines)
+            return
+        rejected = int(result.get("rejected") or 0)
+        dropped = int(result.get("dropped") or 0)
+        self.stats[counter] += int(result.get("accepted", len(lines) - rejected - dropped))
+        self.stats["rejected"] += rejected
+        self.stats["dropped"] += dropped
+        if rejected:
+            _log.warning("Central Logger recusou %d de %d linhas: %s",
+                         rejected, len(lines), result.get("errors", [])[:3])
+
+    # ---------- spool local ----------
+
+    def _spool(self, lines: List[str]):
+        if self.spool_path is None:
+            self.stats["dropped"] += len(lines)
+            return
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        try:
+            size = self.spool_path.stat().st_size if self.spool_path.exists() else 0
+            if size + len(data) > self.spool_max_bytes:
+                self.stats["dropped"] += len(lines)
+                return
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spool_path, 'ab') as f:
+                f.write(data)
+            self.stats["spooled"] += len(lines)
+        except OSError:
+            self.stats["dropped"] += len(lines)
+
+    def _replay_spool(self):
+        """Reenvia o spool em lotes; o que não for enviado volta para o arquivo"""
+        if self.spool_path is None or not self.spool_path.exists():
+            return
+        if time.monotonic() < self._retry_at:
+            return
+
+        try:
+            with open(self.spool_path, 'r', encoding='utf-8') as f:
+                pending = [line.rstrip('\n') for line in f if line.strip()]
+        except OSError:
+            return
+
+        sent = 0
+        remaining = pending
+        while sent < len(pending):
+            chunk = pending[sent:sent + self.batch_size]
+            unsent = self._send(chunk, counter="replayed")
+            sent += len(chunk)
+            if unsent:
+                remaining = unsent + pending[sent:]
+                break
+        else:
+            remaining = []
+
+        try:
+            if not remaining:
+                os.remove(self.spool_path)
+            elif len(remaining) != len(pending):
+                tmp_path = self.spool_path.with_suffix(self.spool_path.suffix + ".tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(remaining) + '\n')
+                os.replace(tmp_path, self.spool_path)
+        except OSError:
+            pass
+
+    # ---------- ciclo de vida ----------
+
+    def flush(self):
+        """Envia (ou faz spool de) tudo que está no buffer"""
+        try:
+            self._ship_pending()
+        except Exception:
+            pass
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=self.timeout)
+        self.flush()
+        self._session.close()
+        super().close()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+👁️ Log Tailer - Claude-20x
+Acompanhamento de múltiplos arquivos de log em uma única thread:
+- inotify (via ctypes) quando disponível, polling como fallback
+- Rotação e truncamento detectados por inode/tamanho
+- Offsets persistidos para retomar sem lacunas após restart
+- Com is_durable, um offset só é gravado depois que as linhas lidas até
+  ele foram escritas pelo consumidor (at-least-once: após uma queda, as
+  linhas entre o último offset gravado e a queda são lidas de novo)
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import select
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+              IN_MOVED_TO | IN_CREATE | IN_DELETE)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Wrapper mínimo de inotify via ctypes (somente Linux)"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+
+    @classmethod
+    def create(cls) -> Optional['Inotify']:
+        """Retorna uma instância ou None se inotify não estiver disponível"""
+        try:
+            return cls()
+        except (OSError, AttributeError):
+            return None
+
+    def add_watch(self, path: Path, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch falhou para {path}")
+        return wd
+
+    def read_events(self) -> List[tuple]:
+        """Lê eventos pendentes: lista de (wd, mask, nome)"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    return events
+                raise
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+                offset += length
+                events.append((wd, mask, name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+@dataclass
+class TailedFile:
+    """Estado de um arquivo acompanhado"""
+    path: Path
+    tag: Any
+    inode: int = 0
+    device: int = 0
+    offset: int = 0  # Bytes consumidos até a última linha completa
+    partial: bytes = b""
+    handle: Any = None
+    errors: int = 0
+
+
+class LogTailer:
+    """
+    📜 Tailer multiplexado de arquivos de log
+
+    Uma thread acompanha todos os arquivos. Com inotify ela dorme até o
+    kernel avisar de uma escrita; sem inotify verifica os arquivos a cada
+    poll_interval. Dados novos são lidos em blocos de chunk_size bytes e
+    as linhas completas de cada bloco são entregues de uma vez a
+    on_lines(tag, path, lines).
+
+    on_lines só enfileira; com is_durable(instante) o estado gravado é o
+    snapshot de offsets mais recente cujas linhas (todas entregues antes do
+    instante do snapshot) o consumidor já confirmou como escritas.
+    """
+
+    def __init__(self, on_lines: Callable[[Any, Path, List[str]], None],
+                 state_file: Optional[Path] = None,
+                 poll_interval: float = 1.0,
+                 use_inotify: bool = True,
+                 on_error: Optional[Callable[[Path, Exception], None]] = None,
+                 persist_interval: float = 2.0,
+                 chunk_size: int = 1024 * 1024,
+                 is_durable: Optional[Callable[[float], bool]] = None,
+                 max_checkpoints: int = 64):
+        self.on_lines = on_lines
+        self.chunk_size = chunk_size
+        self.on_error = on_error
+        self.state_file = state_file
+        self.poll_interval = poll_interval
+        self.persist_interval = persist_interval
+        self.is_durable = is_durable
+        # Snapshots (instante, offsets) aguardando as linhas ficarem duráveis
+        self._checkpoints: deque = deque(maxlen=max_checkpoints)
+        self.files: Dict[str, TailedFile] = {}
+        self._inotify = Inotify.create() if use_inotify else None
+        self._watches: Dict[int, Path] = {}
+        self._watched_dirs: Dict[Path, int] = {}
+        self._state = self._load_state()
+        self._state_dirty = False
+        self._last_persist = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    # ---------- estado persistido ----------
+
+    def _load_state(self) -> Dict[str, Dict[str, int]]:
+        if self.state_file is None or not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _durable_state(self) -> Optional[Dict[str, Dict[str, int]]]:
+        """Snapshot mais recente já durável no consumidor (None se nenhum)"""
+        with self._lock:
+            state = {
+                key: {"inode": tf.inode, "device": tf.device, "offset": tf.offset}
+                for key, tf in self.files.items() if tf.inode
+            }
+        if self.is_durable is None:
+            return state
+        checkpoints = self._checkpoints
+        if not checkpoints or checkpoints[-1][1] != state:
+            # O instante vem depois da entrega: on_lines já enfileirou essas linhas
+            checkpoints.append((time.monotonic(), state))
+        durable = None
+        while checkpoints and self.is_durable(checkpoints[0][0]):
+            durable = checkpoints.popleft()[1]
+        return durable
+
+    def persist_state(self):
+        """Grava offsets atomicamente (tmp + rename)"""
+        if self.state_file is None:
+            return
+        state = self._durable_state()
+        if state is None:
+            self._last_persist = time.monotonic()
+            return
+        tmp_path = self.state_file.with_suffix(self.state_file.suffix + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_file)
+            self._state_dirty = bool(self._checkpoints)  # Ainda há snapshots esperando
+        except OSError as e:
+            self._report(self.state_file, e)
+        self._last_persist = time.monotonic()
+
+    # ---------- registro de arquivos ----------
+
+    def add(self, path: Path, tag: Any):
+        """Passa a acompanhar um arquivo (retoma do offset salvo se houver)"""
+        key = str(path)
+        tf = TailedFile(path=path, tag=tag)
+        saved = self._state.get(key)
+
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            st = None
+
+        if st is not None:
+            if saved and saved.get("inode") == st.st_ino and saved.get("offset", 0) <= st.st_size:
+                tf.offset = saved["offset"]
+            elif saved and saved.get("inode"):
+                # Arquivo rotacionado enquanto o logger estava parado:
+                # terminar o antigo (se ainda existir no diretório) e ler o novo inteiro
+                self._drain_rotated(path, tag, saved)
+                tf.offset = 0
+            else:
+                tf.offset = st.st_size  # Sem estado: comportamento de tail -f
+            self._open(tf, st)
+
+        with self._lock:
+            self.files[key] = tf
+        self._watch_dir(path.parent)
+
+    def _drain_rotated(self, path: Path, tag: Any, saved: Dict[str, int]):
+        try:
+            for candidate in path.parent.iterdir():
+                st = candidate.stat()
+                if st.st_ino == saved["inode"] and st.st_dev == saved.get("device", st.st_dev):
+                    old = TailedFile(path=candidate, tag=tag, offset=saved.get("offset", 0))
+                    self._open(old, st)
+                    self._read_new(old, report_path=path, final=True)
+                    old.handle.close()
+                    return
+        except OSError as e:
+            self._report(path, e)
+
+    def _watch_dir(self, directory: Path):
+        if self._inotify is None or directory in self._watched_dirs:
+            return
+        try:
+            wd = self._inotify.add_watch(directory)
+            self._watches[wd] = directory
+            self._watched_dirs[directory] = wd
+        except OSError as e:
+            self._report(directory, e)
+
+    def _open(self, tf: TailedFile, st: os.stat_result):
+        tf.handle = open(tf.path, "rb", buffering=0)
+        tf.handle.seek(tf.offset)
+        tf.inode = st.st_ino
+        tf.device = st.st_dev
+
+    # ---------- leitura ----------
+
+    def _read_new(self, tf: TailedFile, report_path: Optional[Path] = None,
+                  final: bool = False):
+        """Lê blocos a partir do offset e entrega as linhas completas em lote
+
+        Com final=True (arquivo rotacionado) a última linha sem quebra
+        também é entregue, já que ninguém mais vai completá-la.
+        """
+        read = tf.handle.read
+        path = report_path or tf.path
+        while True:
+            chunk = read(self.chunk_size)
+            if not chunk:
+                break
+            data = tf.partial + chunk if tf.partial else chunk
+            cut = data.rfind(b"\n") + 1
+            tf.partial = data[cut:]
+            if cut:
+                tf.offset += cut
+                self._state_dirty = True
+                lines = data[:cut - 1].decode("utf-8", "ignore").split("\n")
+                self.on_lines(tf.tag, path, lines)
+
+        if final and tf.partial:
+            tf.offset += len(tf.partial)
+            self.on_lines(tf.tag, path, [tf.partial.decode("utf-8", "ignore")])
+            tf.partial = b""
+
+    def _check(self, tf: TailedFile):
+        """Verifica rotação/truncamento e lê dados novos"""
+        try:
+            st = os.stat(tf.path)
+        except FileNotFoundError:
+            st = None
+
+        if tf.handle is not None:
+            if st is None or (st.st_ino, st.st_dev) != (tf.inode, tf.device):
+                # Rotação: terminar o arquivo antigo antes de trocar
+                self._read_new(tf, final=True)
+                tf.handle.close()
+                tf.handle = None
+            elif st.st_size < tf.offset + len(tf.partial):
+                # Truncamento: recomeçar do início
+                tf.offset = 0
+                tf.partial = b""
+                tf.handle.seek(0)
+
+        if tf.handle is None:
+            if st is None:
+                return
+            tf.offset = 0
+            tf.partial = b""
+            self._open(tf, st)
+
+        self._read_new(tf)
+
+    def _check_safely(self, tf: TailedFile):
+        try:
+            self._check(tf)
+            tf.errors = 0
+        except Exception as e:
+            tf.errors += 1
+            if tf.handle is not None:
+                try:
+                    tf.handle.close()
+                except OSError:
+                    pass
+                tf.handle = None
+            self._report(tf.path, e)
+
+    def _report(self, path: Path, error: Exception):
+        if self.on_error is not None:
+            self.on_error(path, error)
+
+    # ---------- loop principal ----------
+
+    def _files_for_events(self, events: List[tuple]) -> List[TailedFile]:
+        with self._lock:
+            files = self.files
+            if any(mask & IN_Q_OVERFLOW for _, mask, _ in events):
+                return list(files.values())
+            touched = []
+            for wd, _mask, name in events:
+                directory = self._watches.get(wd)
+                if directory is None or not name:
+                    continue
+                tf = files.get(str(directory / name))
+                if tf is not None and tf not in touched:
+                    touched.append(tf)
+            return touched
+
+    def _run(self):
+        last_full_scan = 0.0
+        while not self._stopped.is_set():
+            if self._inotify is not None:
+                ready, _, _ = select.select([self._inotify.fd], [], [], self.poll_interval)
+                if ready:
+                    for tf in self._files_for_events(self._inotify.read_events()):
+                        self._check_safely(tf)
+            else:
+                self._stopped.wait(self.poll_interval)
+
+            now = time.monotonic()
+            # Verificação completa periódica: fallback do polling e rede de
+            # segurança para eventos perdidos (ex.: diretórios recriados)
+            if self._inotify is None or now - last_full_scan >= self.poll_interval * 5:
+                with self._lock:
+                    files = list(self.files.values())
+                for tf in files:
+                    self._check_safely(tf)
+                last_full_scan = now
+
+            if self._state_dirty and now - self._last_persist >= self.persist_interval:
+                self.persist_state()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name="LogTailer")
+        self.thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.poll_interval * 2)
+        self.persist_state()
+        with self._lock:
+            for tf in self.files.values():
+                if tf.handle is not None:
+                    tf.handle.close()
+                    tf.handle = None
+        if self._inotify is not None:
+            self._inotify.close()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+🪟 Log Windows - Claude-20x
+Contadores em janela deslizante com memória constante, compartilhados
+pelas métricas de throughput e pelas regras de alerta.
+"""
+
+import time
+from typing import Optional
+
+
+class SlidingWindowCounter:
+    """Contador em janela deslizante sobre ring buffer (memória constante)"""
+
+    def __init__(self, window_seconds: float = 60, bucket_seconds: float = 1.0):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.size = max(1, int(window_seconds / bucket_seconds))
+        self._counts = [0] * self.size
+        self._epochs = [-1] * self.size
+
+    def add(self, n: int = 1, now: Optional[float] = None):
+        """Soma n ao bucket do instante (instantes fora da janela são ignorados)"""
+        epoch = int((time.monotonic() if now is None else now) / self.bucket_seconds)
+        idx = epoch % self.size
+        if epoch < self._epochs[idx]:
+            return  # O bucket já guarda uma volta mais nova do ring: fora da janela
+        if self._epochs[idx] != epoch:
+            self._epochs[idx] = epoch
+            self._counts[idx] = 0
+        self._counts[idx] += n
+
+    def total(self, now: Optional[float] = None) -> int:
+        """Soma dos buckets dentro da janela (buckets à frente de now não contam)"""
+        epoch = int((time.monotonic() if now is None else now) / self.bucket_seconds)
+        oldest = epoch - self.size
+        return sum(count for count, bucket_epoch in zip(self._counts, self._epochs)
+                   if oldest < bucket_epoch <= epoch)
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Taxa média por segundo na janela"""
+        return self.total(now) / self.window_seconds
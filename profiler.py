@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+🔬 Profiler - Claude-20x
+Diagnóstico em produção, sem reiniciar sob um profiler, compartilhado
+pelo Central Logger e pelo Service Discovery:
+- SamplingProfiler: amostra as pilhas das threads (sys._current_frames) por
+  um tempo limitado e devolve stacks colapsadas (formato do flamegraph.pl /
+  speedscope: "thread;func (arquivo:linha);... contagem")
+- SpanTracer: tempo por estágio (parse, validate, enqueue, serialize,
+  write, probe...) ligável em runtime; desligado custa uma leitura de atributo
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from telemetry import MetricsRegistry, WindowedHistogram
+
+MAX_PROFILE_SECONDS = 60.0
+MIN_INTERVAL_SECONDS = 0.001
+
+
+# Topo de pilha (Python) de uma thread parada esperando: não é custo de CPU.
+# Chamadas C como time.sleep não aparecem como frame; a pilha termina no chamador.
+IDLE_FUNCTIONS = frozenset({"wait", "select", "poll", "_wait_for_tstate_lock"})
+
+
+class ProfilerBusyError(RuntimeError):
+    """Já existe um profile em andamento"""
+
+
+def admin_allowed(expected_token: str, provided: Optional[str]) -> bool:
+    """Confere o X-Admin-Token; sem ADMIN_TOKEN configurado os endpoints ficam fechados
+
+    Os serviços escutam em 0.0.0.0 com CORS aberto e o profiler expõe
+    pilhas e nomes de threads: o acesso só existe com um token definido.
+    """
+    if not expected_token:
+        return False
+    return provided is not None and hmac.compare_digest(provided.encode(), expected_token.encode())
+
+
+def parse_thread_names(value: Optional[str]) -> Optional[List[str]]:
+    """"LogProcessor,BatchWriter" -> lista de nomes (None = todas as threads)"""
+    names = [name.strip() for name in value.split(',') if name.strip()] if value else []
+    return names or None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """
+    🔬 Profiler por amostragem de todas as threads do processo
+
+    A thread que chama profile() acorda a cada `interval` segundos, lê as
+    pilhas de todas as threads com sys._current_frames() e conta cada pilha
+    colapsada.
+    Nenhum hook é instalado nas threads amostradas: o custo fica na thread
+    do profiler (proporcional a threads x profundidade por amostra) e some
+    quando o profile termina. Só um profile roda por vez.
+    """
+
+    def __init__(self, max_seconds: float = MAX_PROFILE_SECONDS):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self.last_run: Optional[Dict[str, float]] = None
+
+    def profile(self, seconds: float = 5.0, interval: float = 0.005,
+                threads: Optional[Iterable[str]] = None,
+                include_idle: bool = False) -> str:
+        """Amostra por `seconds` e devolve stacks colapsadas (uma por linha)
+
+        threads filtra pelo nome da thread (ex.: LogProcessor, BatchWriter);
+        sem filtro todas são amostradas. Com include_idle=False pilhas cujo
+        topo é uma espera (wait/select/poll) são descartadas.
+        """
+        seconds = min(max(seconds, 0.0), self.max_seconds)
+        interval = max(interval, MIN_INTERVAL_SECONDS)
+        wanted = set(threads) if threads else None
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("Já existe um profile em andamento")
+        try:
+            counts = self._sample(seconds, interval, wanted, include_idle)
+        finally:
+            self._lock.release()
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    def _sample(self, seconds: float, interval: float, wanted: Optional[set],
+                include_idle: bool) -> Counter:
+        counts: Counter = Counter()
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        samples = 0
+        started = time.perf_counter()
+        while True:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                name = names.get(ident, f"thread-{ident}")
+                if wanted is not None and name not in wanted:
+                    continue
+                if not include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(name)
+                counts[";".join(reversed(stack))] += 1
+            samples += 1
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(interval)
+        self.last_run = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "samples": samples,
+            "stacks": len(counts),
+        }
+        return counts
+
+
+class SpanTracer:
+    """
+    Tempo por estágio do pipeline, ligável em runtime
+
+    Uso no caminho quente:
+        started = tracer.start()
+        ...
+        if started:
+            tracer.record("parse", started, count=len(lines))
+
+    start() devolve 0.0 quando desligado, então o custo é um teste de
+    atributo. Ligado, cada estágio alimenta um histograma span_<estágio>
+    (valor por item quando count > 1) no mesmo MetricsRegistry do serviço.
+    """
+
+    def __init__(self, registry: MetricsRegistry, stages: Sequence[str], enabled: bool = False):
+        self.enabled = enabled
+        self.stages = tuple(stages)
+        self.histograms: Dict[str, WindowedHistogram] = {
+            stage: registry.histogram(f"span_{stage}_seconds", f"Span do estágio {stage} (por item)")
+            for stage in self.stages
+        }
+
+    def start(self) -> float:
+        return time.perf_counter() if self.enabled else 0.0
+
+    def record(self, stage: str, started: float, count: int = 1):
+        if count > 0:
+            self.histograms[stage].record((time.perf_counter() - started) / count, count)
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "spans": {stage: h.snapshot() for stage, h in self.histograms.items()},
+        }
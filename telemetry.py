@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+📊 Telemetria - Claude-20x
+Histogramas de streaming e exposição Prometheus compartilhados pelo
+Central Logger e pelo Service Discovery.
+
+Buckets log-lineares no estilo HDR: cada potência de 2 é dividida em
+sub-buckets lineares, então o erro relativo de um percentil é limitado
+(~3% com 5 bits) independentemente da faixa de valores. Registrar custa
+O(1) (bit_length e um incremento), a memória é fixa e dois histogramas
+com a mesma configuração podem ser somados bucket a bucket.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_PERCENTILES: Tuple[float, ...] = (50.0, 95.0, 99.0)
+
+
+class Histogram:
+    """
+    Histograma log-linear cumulativo (mergeable)
+
+    Valores são convertidos para inteiros com `scale` (1e6 para registrar
+    segundos com resolução de microssegundos; 1 para contagens). Valores
+    acima de 2**max_exponent unidades caem no último bucket; min, max,
+    soma e contagem são exatos.
+    """
+
+    def __init__(self, scale: float = 1e6, sub_bucket_bits: int = 5, max_exponent: int = 40):
+        self.scale = scale
+        self.sub_bucket_bits = sub_bucket_bits
+        self.max_exponent = max_exponent
+        self._sub = 1 << sub_bucket_bits
+        self._half = self._sub >> 1
+        self._size = self._sub + (max_exponent - sub_bucket_bits + 1) * self._half
+        self.counts: List[int] = [0] * self._size
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _index(self, units: int) -> int:
+        if units < self._sub:
+            return units
+        shift = units.bit_length() - self.sub_bucket_bits
+        index = self._sub + (shift - 1) * self._half + ((units >> shift) - self._half)
+        return index if index < self._size else self._size - 1
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        """Menor e maior valor inteiro que caem no bucket"""
+        if index < self._sub:
+            return index, index
+        shift = (index - self._sub) // self._half + 1
+        mantissa = (index - self._sub) % self._half + self._half
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value: float, count: int = 1):
+        """Registra `count` ocorrências de `value` (O(1))"""
+        if value < 0:
+            value = 0.0
+        index = self._index(int(value * self.scale))
+        with self._lock:
+            self.counts[index] += count
+            self.count += count
+            self.total += value * count
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def merge(self, other: 'Histogram'):
+        """Soma outro histograma com a mesma configuração"""
+        if (other.scale, other.sub_bucket_bits, other.max_exponent) != \
+                (self.scale, self.sub_bucket_bits, self.max_exponent):
+            raise ValueError("Histogramas com configurações diferentes não podem ser somados")
+        with other._lock:
+            counts = list(other.counts)
+            count, total, low, high = other.count, other.total, other.min, other.max
+        with self._lock:
+            mine = self.counts
+            for index, n in enumerate(counts):
+                if n:
+                    mine[index] += n
+            self.count += count
+            self.total += total
+            if low is not None and (self.min is None or low < self.min):
+                self.min = low
+            if high is not None and (self.max is None or high > self.max):
+                self.max = high
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * self._size
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = None
+
+    def percentiles(self, qs: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[float, float]:
+        """Percentis (0-100) numa única passada pelos buckets"""
+        with self._lock:
+            counts = list(self.counts)
+            count, low, high = self.count, self.min, self.max
+        result = {q: 0.0 for q in qs}
+        if not count:
+            return result
+        targets = sorted((max(1, -(-q * count // 100)), q) for q in qs)
+        cumulative = 0
+        position = 0
+        for index, n in enumerate(counts):
+            if not n:
+                continue
+            cumulative += n
+            while position < len(targets) and cumulative >= targets[position][0]:
+                lower, upper = self._bounds(index)
+                value = (lower + upper) / 2 / self.scale
+                # O valor representativo nunca sai do intervalo observado
+                result[targets[position][1]] = min(max(value, low), high)
+                position += 1
+            if position == len(targets):
+                break
+        return result
+
+    def buckets(self) -> Iterator[Tuple[float, int]]:
+        """(limite superior, contagem cumulativa) dos buckets não vazios"""
+        with self._lock:
+            counts = list(self.counts)
+        cumulative = 0
+        for index, n in enumerate(counts):
+            if n:
+                cumulative += n
+                yield (self._bounds(index)[1] + 1) / self.scale, cumulative
+
+    def cumulative(self, bounds: Sequence[float]) -> List[int]:
+        """Contagem de valores <= cada limite
+
+        Um bucket que atravessa o limite conta inteiro se começa nele ou
+        antes (erro dentro da precisão relativa do histograma).
+        """
+        with self._lock:
+            counts = list(self.counts)
+        limits = [bound * self.scale for bound in bounds]
+        result = [0] * len(limits)
+        position = 0
+        cumulative = 0
+        for index, n in enumerate(counts):
+            if not n:
+                continue
+            lower = self._bounds(index)[0]
+            while position < len(limits) and lower > limits[position]:
+                result[position] = cumulative
+                position += 1
+            cumulative += n
+        for rest in range(position, len(limits)):
+            result[rest] = cumulative
+        return result
+
+    def snapshot(self, qs: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+        values = self.percentiles(qs)
+        stats = {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0,
+            "min": self.min or 0,
+            "max": self.max or 0,
+        }
+        for q, value in values.items():
+            stats[f"p{q:g}"] = value
+        return stats
+
+
+class WindowedHistogram:
+    """
+    Histograma cumulativo + janela deslizante de histogramas por fatia
+
+    A janela é um ring de `slots` histogramas de window_seconds/slots
+    segundos; registrar toca o total e a fatia atual, e o snapshot soma
+    as fatias vivas. Percentis da janela mostram a cauda recente, que a
+    média desde o início esconde.
+    """
+
+    def __init__(self, scale: float = 1e6, window_seconds: float = 60.0, slots: int = 6, **kwargs):
+        self.window_seconds = window_seconds
+        self.slot_seconds = window_seconds / slots
+        self.total = Histogram(scale, **kwargs)
+        self._slots = [Histogram(scale, **kwargs) for _ in range(slots)]
+        self._epochs = [-1] * slots
+        self._kwargs = kwargs
+        self.scale = scale
+        # Um lock para o total e as fatias: record atualiza os dois de uma vez
+        self._lock = self.total._lock
+        for slot in self._slots:
+            slot._lock = self._lock
+
+    def record(self, value: float, count: int = 1, now: Optional[float] = None):
+        if value < 0:
+            value = 0.0
+        total = self.total
+        index = total._index(int(value * self.scale))
+        epoch = int((time.monotonic() if now is None else now) / self.slot_seconds)
+        position = epoch % len(self._slots)
+        slot = self._slots[position]
+        with self._lock:
+            if self._epochs[position] != epoch:
+                self._epochs[position] = epoch
+                slot.counts = [0] * len(slot.counts)
+                slot.count, slot.total, slot.min, slot.max = 0, 0.0, None, None
+            for histogram in (total, slot):
+                histogram.counts[index] += count
+                histogram.count += count
+                histogram.total += value * count
+                if histogram.min is None or value < histogram.min:
+                    histogram.min = value
+                if histogram.max is None or value > histogram.max:
+                    histogram.max = value
+
+    def window(self, now: Optional[float] = None) -> Histogram:
+        """Soma das fatias dentro da janela"""
+        epoch = int((time.monotonic() if now is None else now) / self.slot_seconds)
+        oldest = epoch - len(self._slots)
+        merged = Histogram(self.scale, **self._kwargs)
+        for slot, slot_epoch in zip(self._slots, self._epochs):
+            if slot_epoch > oldest:
+                merged.merge(slot)
+        return merged
+
+    def snapshot(self, qs: Sequence[float] = DEFAULT_PERCENTILES,
+                 now: Optional[float] = None) -> Dict[str, Any]:
+        """Percentis da janela recente e contagem/média desde o início"""
+        stats = self.window(now).snapshot(qs)
+        stats["window_seconds"] = self.window_seconds
+        stats["total_count"] = self.total.count
+        stats["total_avg"] = self.total.total / self.total.count if self.total.count else 0
+        return stats
+
+
+# Limites (le) da exposição Prometheus: fixos para que as séries não mudem entre scrapes
+LATENCY_BOUNDS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                                     0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BOUNDS: Tuple[float, ...] = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_help(text: str) -> str:
+    """HELP escapa só barra invertida e quebra de linha (aspas ficam literais)"""
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value == float('inf'):
+        return "+Inf"
+    if value == float('-inf'):
+        return "-Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Contador monotônico"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Valor instantâneo; com `fn` é lido só no scrape"""
+
+    def __init__(self, fn: Optional[Callable[[], float]] = None):
+        self.value = 0
+        self.fn = fn
+
+    def set(self, value: float):
+        self.value = value
+
+    def read(self) -> float:
+        return self.fn() if self.fn is not None else self.value
+
+
+class _Family:
+    """Métrica exposta: cabeçalho pré-formatado e séries (labels, objeto)"""
+
+    def __init__(self, name: str, kind: str, description: str):
+        self.name = name
+        self.kind = kind
+        self.header = f"# HELP {name} {_escape_help(description)}\n# TYPE {name} {kind}\n"
+        self.series: List[Tuple[str, Dict[str, Any], Any]] = []
+        # Séries dinâmicas: fn() -> {valor do label: número}
+        self.label: Optional[str] = None
+        self.collect: Optional[Callable[[], Dict[Any, float]]] = None
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas pré-alocadas de um serviço
+
+    Histogramas alimentam o JSON de /metrics (percentis da janela) e a
+    exposição Prometheus (buckets cumulativos desde o início). Contadores e
+    gauges são criados na inicialização; gauges e contadores com `fn` leem
+    o estado já mantido pelo serviço (tamanho de queue, contadores de
+    ingestão...) só no scrape, sem custo no caminho quente.
+    """
+
+    def __init__(self, namespace: str = ""):
+        self.namespace = namespace
+        self.histograms: Dict[str, WindowedHistogram] = {}
+        self.descriptions: Dict[str, str] = {}
+        self._families: Dict[str, _Family] = {}
+        self._bounds: Dict[str, Tuple[float, ...]] = {}
+
+    def _full_name(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def _family(self, name: str, kind: str, description: str) -> _Family:
+        full_name = self._full_name(name)
+        family = self._families.get(full_name)
+        if family is None:
+            family = self._families[full_name] = _Family(full_name, kind, description)
+        elif family.kind != kind:
+            raise ValueError(f"Métrica {full_name} já registrada como {family.kind}")
+        return family
+
+    def histogram(self, name: str, description: str = "", scale: float = 1e6,
+                  window_seconds: float = 60.0,
+                  bounds: Optional[Sequence[float]] = None) -> WindowedHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = WindowedHistogram(scale, window_seconds)
+            self.descriptions[name] = description
+            suffix = "" if scale == 1 or name.endswith("_seconds") else "_seconds"
+            family = self._family(name + suffix, "histogram", description)
+            family.series.append(("", {}, histogram))
+            self._bounds[family.name] = tuple(bounds or (COUNT_BOUNDS if scale == 1 else LATENCY_BOUNDS))
+        return histogram
+
+    def counter(self, name: str, description: str = "", labels: Optional[Dict[str, Any]] = None,
+                fn: Optional[Callable[[], Any]] = None, label: Optional[str] = None) -> Optional[Counter]:
+        """Contador (nome sem _total). Com fn e label, fn() devolve {valor do label: total}"""
+        family = self._family(name + "_total", "counter", description)
+        if fn is not None:
+            if label is not None:
+                family.label, family.collect = label, fn
+                return None
+            family.series.append((_labels(labels or {}), labels or {}, Gauge(fn)))
+            return None
+        counter = Counter()
+        family.series.append((_labels(labels or {}), labels or {}, counter))
+        return counter
+
+    def gauge(self, name: str, description: str = "", labels: Optional[Dict[str, Any]] = None,
+              fn: Optional[Callable[[], Any]] = None, label: Optional[str] = None) -> Optional[Gauge]:
+        """Gauge; com fn é lido no scrape. Com fn e label, fn() devolve {valor do label: valor}"""
+        family = self._family(name, "gauge", description)
+        if fn is not None and label is not None:
+            family.label, family.collect = label, fn
+            return None
+        gauge = Gauge(fn)
+        family.series.append((_labels(labels or {}), labels or {}, gauge))
+        return gauge
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        return {name: h.snapshot(now=now) for name, h in self.histograms.items()}
+
+    def render(self) -> str:
+        """Exposição em texto Prometheus/OpenMetrics (formato 0.0.4)"""
+        out: List[str] = []
+        for family in self._families.values():
+            out.append(family.header)
+            name = family.name
+            if family.kind == "histogram":
+                bounds = self._bounds[name]
+                for _, _, windowed in family.series:
+                    total = windowed.total
+                    for le, cumulative in zip(bounds, total.cumulative(bounds)):
+                        out.append(f'{name}_bucket{{le="{_number(le)}"}} {cumulative}\n')
+                    out.append(f'{name}_bucket{{le="+Inf"}} {total.count}\n')
+                    out.append(f"{name}_sum {_number(total.total)}\n")
+                    out.append(f"{name}_count {total.count}\n")
+                continue
+            for label_text, _, metric in family.series:
+                try:
+                    value = metric.read() if isinstance(metric, Gauge) else metric.value
+                    out.append(f"{name}{label_text} {_number(value)}\n")
+                except Exception:
+                    continue  # Scrape nunca falha por uma métrica (componente parado, fn -> None)
+            if family.collect is not None:
+                try:
+                    samples = family.collect()
+                except Exception:
+                    samples = {}  # Scrape nunca falha por uma métrica
+                for label_value, value in samples.items():
+                    if value is None:
+                        continue
+                    out.append(f'{name}{{{family.label}="{_escape(label_value)}"}} {_number(value)}\n')
+        return "".join(out)